@@ -0,0 +1,152 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Adaptive scale and tileScale for Earth Engine reductions.
+"""
+import hashlib
+import json
+import logging
+
+import ee
+from django.contrib.gis.geos import GEOSGeometry
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+# Equal-area projection (EASE-Grid 2.0) used to measure AOI locally
+EQUAL_AREA_SRID = 6933
+
+# Escalation ladder: (scale multiplier, tileScale)
+REDUCTION_LADDER = [
+    (1, 4),
+    (1, 8),
+    (2, 8),
+    (2, 16),
+    (4, 16),
+]
+
+# Minimum AOI area in hectares to start at each ladder level
+AREA_LEVEL_THRESHOLDS = [
+    (2_000_000, 3),
+    (500_000, 2),
+    (50_000, 1),
+]
+
+# Error messages from EE that can be solved with coarser settings
+RESOURCE_ERROR_MESSAGES = [
+    'computation timed out',
+    'memory limit exceeded',
+    'too many concurrent aggregations',
+    'too many pixels',
+    'output of image computation is too large',
+]
+
+# Keep the successful level of an AOI for one day
+SUCCESS_LEVEL_TTL_IN_S = 60 * 60 * 24
+
+
+def is_resource_error(ex: Exception) -> bool:
+    """Check whether EE error is caused by memory or timeout limit."""
+    if not isinstance(ex, ee.EEException):
+        return False
+    message = str(ex).lower()
+    return any(msg in message for msg in RESOURCE_ERROR_MESSAGES)
+
+
+def get_geometry_area_ha(geom: dict):
+    """
+    Calculate area of GeoJSON geometry in hectares.
+
+    :param geom: GeoJSON geometry in EPSG:4326
+    :return: area in hectares or None if it cannot be calculated
+    """
+    if not geom:
+        return None
+    try:
+        geometry = GEOSGeometry(json.dumps(geom), srid=4326)
+        geometry.transform(EQUAL_AREA_SRID)
+        return geometry.area / 10000
+    except Exception as ex:
+        logger.warning(f'Failed to calculate area of geometry: {ex}')
+        return None
+
+
+class AdaptiveReduction:
+    """Run EE reduction with settings escalated on resource errors."""
+
+    def __init__(self, name: str, area_ha: float = None, aoi=None):
+        """Initialize adaptive reduction.
+
+        :param name: name of the reduction, e.g. Baseline
+        :param area_ha: area of AOI in hectares, None for communities
+        :param aoi: JSON serializable AOI, e.g. geometry or point, the
+            successful level is only kept for the same AOI
+        """
+        self.name = name
+        self.area_ha = area_ha
+        self.aoi = aoi
+        self.level = None
+
+    @property
+    def area_level(self) -> int:
+        """Get ladder level based on the AOI area."""
+        if self.area_ha is None:
+            return 0
+        for threshold, level in AREA_LEVEL_THRESHOLDS:
+            if self.area_ha >= threshold:
+                return level
+        return 0
+
+    def cache_key(self):
+        """Get cache key of the successful level, None without AOI."""
+        if self.aoi is None:
+            return None
+        aoi_hash = hashlib.sha256(
+            json.dumps(self.aoi, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        return f'adaptive-reduction-{self.name}-{aoi_hash}'
+
+    def start_level(self) -> int:
+        """Get the level to start the reduction with."""
+        key = self.cache_key()
+        level = cache.get(key) if key else None
+        if level is None:
+            return self.area_level
+        return min(int(level), len(REDUCTION_LADDER) - 1)
+
+    @property
+    def scale_factor(self) -> int:
+        """Get scale multiplier of the last run, or of the start level."""
+        level = self.level if self.level is not None else self.start_level()
+        return REDUCTION_LADDER[level][0]
+
+    def run(self, compute):
+        """
+        Run compute function through the escalation ladder.
+
+        :param compute: function that accepts scale multiplier and
+            tileScale, and returns the computed result (e.g. getInfo)
+        :return: result of compute function
+        """
+        last_level = len(REDUCTION_LADDER) - 1
+        level = self.start_level()
+        while True:
+            scale_factor, tile_scale = REDUCTION_LADDER[level]
+            try:
+                result = compute(scale_factor, tile_scale)
+            except Exception as ex:
+                if not is_resource_error(ex) or level >= last_level:
+                    raise
+                logger.warning(
+                    f'{self.name} reduction failed with scale x'
+                    f'{scale_factor} and tileScale {tile_scale}: {ex}'
+                )
+                level += 1
+                continue
+            self.level = level
+            key = self.cache_key()
+            if key:
+                cache.set(key, level, timeout=SUCCESS_LEVEL_TTL_IN_S)
+            return result
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.gis.admin import OSMGeoAdmin
-from django.http import StreamingHttpResponse, Http404
+from django.http import FileResponse, StreamingHttpResponse, Http404
 from django.urls import re_path, reverse
 from django.utils.html import format_html
 
@@ -12,10 +12,16 @@ from .models import (
     UserAnalysisResults,
     GEEAsset,
     AnalysisResultsCache,
+    TemporalStatisticCache,
     AnalysisRasterOutput
 )
 from analysis.utils import get_gdrive_file
-from analysis.tasks import generate_temporal_analysis_raster_output
+from analysis.tasks import (
+    fetch_landscape_areas,
+    generate_community_pmtiles,
+    generate_temporal_analysis_raster_output,
+    sync_gee_statistic_tables
+)
 
 
 @admin.register(Analysis)
@@ -82,9 +88,12 @@ class InterventionAreaAdmin(OSMGeoAdmin):
 
 
 def fetch_landscape_area(modeladmin, request, queryset):
-    """Fetch all Landscape Area objects for a given queryset."""
+    """Trigger task to fetch areas of each landscape in the queryset."""
     for landscape in queryset:
-        landscape.fetch_areas()
+        fetch_landscape_areas.delay(landscape.id)
+    modeladmin.message_user(
+        request, f'Fetching areas of {queryset.count()} landscapes is started.'
+    )
 
 
 @admin.register(Landscape)
@@ -98,12 +107,21 @@ class LandscapeAdmin(OSMGeoAdmin):
     actions = [fetch_landscape_area]
 
 
+def generate_community_tiles(modeladmin, request, queryset):
+    """Trigger task to build PMTiles of all communities."""
+    generate_community_pmtiles.delay()
+    modeladmin.message_user(
+        request, 'Generation of community PMTiles is started.'
+    )
+
+
 @admin.register(LandscapeCommunity)
 class LandscapeCommunityAdmin(OSMGeoAdmin):
     """Admin for LandscapeCommunity model."""
 
     list_display = ('landscape', 'community_id', 'community_name',)
     search_fields = ('community_name',)
+    actions = [generate_community_tiles]
     list_filter = ('landscape',)
 
     map_template = 'gis/admin/osm.html'
@@ -122,6 +140,14 @@ class UserAnalysisResultsAdmin(admin.ModelAdmin):
 admin.site.register(UserAnalysisResults, UserAnalysisResultsAdmin)
 
 
+def sync_statistic_tables(modeladmin, request, queryset):
+    """Trigger task to mirror temporal and baseline tables from GEE."""
+    sync_gee_statistic_tables.delay()
+    modeladmin.message_user(
+        request, 'Sync of temporal and baseline tables is started.'
+    )
+
+
 @admin.register(GEEAsset)
 class GEEAssetAdmin(admin.ModelAdmin):
     """Admin for GEEAsset model."""
@@ -129,13 +155,25 @@ class GEEAssetAdmin(admin.ModelAdmin):
     list_display = ('key', 'type', 'source',)
     search_fields = ('key', 'source',)
     list_filter = ('type',)
+    actions = [sync_statistic_tables]
 
 
 @admin.register(AnalysisResultsCache)
 class AnalysisResultsCacheAdmin(admin.ModelAdmin):
     """Admin for AnalysisResultsCache model."""
 
-    list_display = ('id', 'expired_at',)
+    list_display = (
+        'id', 'expired_at', 'hit_count', 'last_accessed_at', 'size',
+    )
+
+
+@admin.register(TemporalStatisticCache)
+class TemporalStatisticCacheAdmin(admin.ModelAdmin):
+    """Admin for TemporalStatisticCache model."""
+
+    list_display = ('area_key', 'resolution', 'year', 'period', 'created_at')
+    search_fields = ('area_key',)
+    list_filter = ('resolution', 'year')
 
 
 def generate_raster_output(modeladmin, request, queryset):
@@ -185,6 +223,14 @@ class AnalysisRasterOutputAdmin(admin.ModelAdmin):
         if result.status != 'COMPLETED':
             raise Http404('File is not generated')
 
+        if result.file:
+            return FileResponse(
+                result.file.open('rb'),
+                as_attachment=True,
+                filename=result.name,
+                content_type='image/tiff'
+            )
+
         file = get_gdrive_file(result.raster_filename)
         if not file:
             raise Http404("File not found in Google Drive")
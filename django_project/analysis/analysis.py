@@ -1,15 +1,74 @@
 import datetime
 import time
 import base64
+import logging
+import threading
 from dateutil.relativedelta import relativedelta
 
 import ee
+import json
 import os
-from analysis.models import AnalysisResultsCache, GEEAsset
+from django.contrib.gis.geos import GEOSGeometry, Point
+from django.db.models import Q
+from django.utils import timezone
+from analysis.models import (
+    AnalysisResultsCache, GEEAsset, LandscapeCommunity
+)
+from analysis.ee_calls import (
+    ACTIVE_EXPORT_STATES,
+    get_info,
+    start_export,
+    get_export_status
+)
+from analysis.ee_circuit_breaker import circuit_breaker
+from analysis.ee_metrics import UNKNOWN, track_analysis_type
+from analysis.feature_collection import (
+    build_feature_collection,
+    sort_features
+)
+from analysis.paged_fetch import get_collection_info
+from analysis.stale_results import (
+    is_stale_allowed,
+    mark_stale,
+    trigger_revalidation
+)
+from analysis.statistic_mirror import StatisticMirror
+from analysis.tiled_reduction import (
+    TiledReduction,
+    should_tile,
+    to_ee_geometry
+)
+from analysis.temporal_cache import (
+    TemporalPeriodCache,
+    community_area_key,
+    geometry_area_key,
+    get_community_area_keys,
+    month_periods,
+    period_date_millis,
+    scaled_area_key
+)
+from analysis.adaptive_reduction import (
+    AdaptiveReduction,
+    get_geometry_area_ha
+)
+from core.models import Preferences
+
+logger = logging.getLogger(__name__)
 
 SERVICE_ACCOUNT_KEY = os.environ.get('SERVICE_ACCOUNT_KEY', '')
 SERVICE_ACCOUNT = os.environ.get('SERVICE_ACCOUNT', '')
 
+# Refresh the service account token before its one hour expiry
+EE_TOKEN_REFRESH_INTERVAL_IN_S = 45 * 60
+
+# Per-process state of Earth Engine initialization
+_engine_lock = threading.RLock()
+_engine_state = {
+    'pid': None,
+    'credentials': None,
+    'refresh_timer': None
+}
+
 # Sentinel-2 bands and names
 S2_BANDS = ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7', 'B8', 'B11', 'B12']
 S2_NAMES = [
@@ -539,30 +598,64 @@ class InputLayer:
 class AnalysisResultsCacheUtils:
     """Analysis results cache utilities."""
 
-    def __init__(self, inputs):
+    def __init__(self, inputs, reduction: AdaptiveReduction = None):
+        """Initialize the cache.
+
+        :param inputs: analysis inputs
+        :param reduction: adaptive reduction of the analysis, results of
+            coarser scale are cached with the scale factor
+        """
+        self._inputs = inputs
+        self.reduction = reduction
+
+    @property
+    def inputs(self):
+        """Get cache key of the analysis inputs."""
         from analysis.utils import sort_nested_structure
-        self.inputs = sort_nested_structure(inputs)
+        inputs = self._inputs
+        if self.reduction is not None and self.reduction.scale_factor != 1:
+            inputs = dict(inputs, scale_factor=self.reduction.scale_factor)
+        return sort_nested_structure(inputs)
 
     def get_analysis_cache(self):
-        """Get analysis cache."""
+        """Get analysis cache that is not expired."""
         cache = AnalysisResultsCache.objects.filter(
+            Q(expired_at__isnull=True) | Q(expired_at__gte=timezone.now()),
             analysis_inputs=self.inputs
-        )
-        if cache.exists():
-            cache = cache.first()
+        ).order_by('-created_at').first()
+        if cache:
+            preferences = Preferences.load()
+            cache.record_hit(
+                preferences.result_cache_ttl,
+                preferences.result_cache_max_age
+            )
+            return cache.analysis_results
+        return None
+
+    def get_stale_analysis_cache(self):
+        """Get the most recent expired analysis cache."""
+        cache = AnalysisResultsCache.objects.filter(
+            analysis_inputs=self.inputs,
+            expired_at__lt=timezone.now()
+        ).order_by('-created_at').first()
+        if cache:
+            cache.record_hit()
             return cache.analysis_results
         return None
 
     def create_analysis_cache(self, results, ttl: int = None):
-        """Create analysis cache."""
+        """Create analysis cache, replacing the older cache."""
         from analysis.utils import sort_nested_structure
 
         results = sort_nested_structure(results)
-        AnalysisResultsCache.save_cache_with_ttl(
+        obj = AnalysisResultsCache.save_cache_with_ttl(
             ttl=ttl,
             analysis_inputs=self.inputs,
             analysis_results=results
         )
+        AnalysisResultsCache.objects.filter(
+            analysis_inputs=self.inputs
+        ).exclude(id=obj.id).delete()
         return results
 
 
@@ -603,6 +696,72 @@ def get_rel_diff(
     return rel_diff
 
 
+def without_geometry(collection):
+    """Remove geometries from features of the collection."""
+    return collection.map(lambda feature: feature.setGeometry(None))
+
+
+def add_community_ids(result: dict):
+    """
+    Add LandscapeCommunity id to features of getInfo result.
+
+    Features of community collection keep the community id from GEE,
+    otherwise the community is matched by its name.
+    The id is stored in properties['community_id'] so it can be joined
+    against landscape vector tiles.
+    """
+    features = result.get('features', []) if result else []
+    ids = [feature.get('id') for feature in features if feature.get('id')]
+    names = [
+        feature.get('properties', {}).get('Name') for feature in features
+    ]
+    community_ids = set(
+        LandscapeCommunity.objects.filter(
+            community_id__in=ids
+        ).values_list('community_id', flat=True)
+    )
+    ids_by_name = dict(
+        LandscapeCommunity.objects.filter(
+            community_name__in=[name for name in names if name]
+        ).values_list('community_name', 'community_id')
+    )
+    for feature in features:
+        properties = feature.setdefault('properties', {})
+        if feature.get('id') in community_ids:
+            properties['community_id'] = feature['id']
+        else:
+            properties['community_id'] = ids_by_name.get(
+                properties.get('Name')
+            )
+    return result
+
+
+def drop_result_geometry(result: dict):
+    """Remove geometries from getInfo result and add community ids."""
+    for feature in result.get('features', []):
+        feature['geometry'] = None
+    return add_community_ids(result)
+
+
+def get_reduction_name(analysis_dict: dict) -> str:
+    """Get name of the adaptive reduction of the analysis."""
+    name = analysis_dict.get('analysisType', UNKNOWN)
+    if name == 'Temporal':
+        name = analysis_dict.get('t_resolution', UNKNOWN)
+    return name
+
+
+def get_analysis_type_label(lat, lon, analysis_dict: dict, *args, **kwargs):
+    """Get analysis type label of EE call metrics."""
+    label = analysis_dict.get('analysisType', UNKNOWN)
+    if label == 'Temporal':
+        label = f"{label}-{analysis_dict.get('t_resolution', UNKNOWN)}"
+    if kwargs.get('custom_geom'):
+        label = f'{label}-custom'
+    return label
+
+
+@track_analysis_type(get_analysis_type_label)
 def run_analysis(lat: float, lon: float, analysis_dict: dict, *args, **kwargs):
     """
     Run baseline, spatial, and temporal analysis
@@ -611,16 +770,30 @@ def run_analysis(lat: float, lon: float, analysis_dict: dict, *args, **kwargs):
     :param lon: Longitude
     :param analysis_dict: Analysis Dictionary
     """
+    # area of custom geometry to pick the reduction scale and tileScale
+    area_ha = get_geometry_area_ha(kwargs.get('custom_geom', None))
+    reduction = AdaptiveReduction(
+        get_reduction_name(analysis_dict), area_ha,
+        kwargs.get('custom_geom', None) or [lat, lon]
+    )
     analysis_cache = AnalysisResultsCacheUtils({
         'lat': lat,
         'lon': lon,
         'analysis_dict': analysis_dict,
         'args': args,
         'kwargs': kwargs
-    })
+    }, reduction)
     output = analysis_cache.get_analysis_cache()
     if output:
         return output
+    if is_stale_allowed():
+        output = analysis_cache.get_stale_analysis_cache()
+        if output:
+            # serve the stale result and recompute in background
+            mark_stale(analysis_cache.inputs)
+            if not circuit_breaker.is_open():
+                trigger_revalidation(analysis_cache.inputs)
+            return output
     input_layers = InputLayer()
     selected_geos = input_layers.get_selected_geos()
     communities = input_layers.get_communities()
@@ -633,6 +806,11 @@ def run_analysis(lat: float, lon: float, analysis_dict: dict, *args, **kwargs):
     select_names = None
 
     custom_geom = kwargs.get('custom_geom', None)
+    # local mirror of the pre-exported statistic tables
+    statistic_mirror = StatisticMirror(
+        GEOSGeometry(json.dumps(custom_geom), srid=4326) if custom_geom
+        else Point(lon, lat, srid=4326)
+    )
     if custom_geom:
         custom_geom = ee.FeatureCollection([
             ee.Feature(
@@ -641,13 +819,29 @@ def run_analysis(lat: float, lon: float, analysis_dict: dict, *args, **kwargs):
                 ee.Geometry.MultiPolygon(custom_geom['coordinates'])
             )
         ])
-        select_names = communities.filterBounds(custom_geom).distinct(
-            ['Name']
-        ).reduceColumns(ee.Reducer.toList(), ['Name']).getInfo()['list']
-    else:
-        select_names = communities.filterBounds(selected_geos).distinct(
-            ['Name']
-        ).reduceColumns(ee.Reducer.toList(), ['Name']).getInfo()['list']
+
+    def get_select_names():
+        # names of selected communities, only fetched when needed
+        nonlocal select_names
+        if select_names is None:
+            select_names = get_info(
+                communities.filterBounds(
+                    custom_geom if custom_geom else selected_geos
+                ).distinct(
+                    ['Name']
+                ).reduceColumns(ee.Reducer.toList(), ['Name'])
+            )['list']
+        return select_names
+
+    include_geometry = kwargs.get('include_geometry', True)
+
+    def get_features_info(collection):
+        if include_geometry:
+            return get_collection_info(collection)
+        # geometries are drawn from vector tiles, join by community_id
+        return add_community_ids(
+            get_collection_info(without_geometry(collection))
+        )
 
     if analysis_dict['analysisType'] == "Spatial":
         reference_layer = kwargs.get('reference_layer', None)
@@ -663,16 +857,22 @@ def run_analysis(lat: float, lon: float, analysis_dict: dict, *args, **kwargs):
             analysis_dict,
             reference_layer
         )
-        reduced = rel_diff.reduceRegions(
-            collection=(
-                custom_geom if custom_geom else
-                communities.filterBounds(selected_geos)
-            ),
-            reducer=ee.Reducer.mean(),
-            scale=60,
-            tileScale=4
+
+        def compute_spatial(scale_factor, tile_scale):
+            reduced = rel_diff.reduceRegions(
+                collection=(
+                    custom_geom if custom_geom else
+                    communities.filterBounds(selected_geos)
+                ),
+                reducer=ee.Reducer.mean(),
+                scale=60 * scale_factor,
+                tileScale=tile_scale
+            )
+            return get_features_info(reduced)
+
+        return analysis_cache.create_analysis_cache(
+            reduction.run(compute_spatial)
         )
-        return analysis_cache.create_analysis_cache(reduced.getInfo())
 
     if analysis_dict['analysisType'] == "Baseline":
         has_dates = (
@@ -681,27 +881,57 @@ def run_analysis(lat: float, lon: float, analysis_dict: dict, *args, **kwargs):
         )
         if has_dates:
             if custom_geom:
-                select = calculate_baseline(
-                    ee.Geometry.Polygon(custom_geom['coordinates']) if
-                    custom_geom['type'] == 'Polygon' else
-                    ee.Geometry.MultiPolygon(custom_geom['coordinates']),
-                    analysis_dict['Baseline']['startDate'],
-                    analysis_dict['Baseline']['endDate'],
-                    is_custom_geom=True
+                aoi = (
+                    ee.Geometry.Polygon(
+                        kwargs['custom_geom']['coordinates']
+                    ) if kwargs['custom_geom']['type'] == 'Polygon' else
+                    ee.Geometry.MultiPolygon(
+                        kwargs['custom_geom']['coordinates']
+                    )
                 )
             else:
-                select = calculate_baseline(
-                    geo,
+                aoi = geo
+
+            def compute_baseline(scale_factor, tile_scale):
+                if custom_geom and should_tile(area_ha):
+                    results = calculate_baseline_tiled(
+                        kwargs['custom_geom'],
+                        analysis_dict['Baseline']['startDate'],
+                        analysis_dict['Baseline']['endDate'],
+                        scale=100 * scale_factor,
+                        tile_scale=tile_scale
+                    )
+                    return (
+                        results if include_geometry else
+                        drop_result_geometry(results)
+                    )
+                return get_features_info(calculate_baseline(
+                    aoi,
                     analysis_dict['Baseline']['startDate'],
                     analysis_dict['Baseline']['endDate'],
-                    is_custom_geom=False
-                )
+                    is_custom_geom=custom_geom is not None,
+                    scale=100 * scale_factor,
+                    tile_scale=tile_scale
+                ))
+
+            return analysis_cache.create_analysis_cache(
+                reduction.run(compute_baseline)
+            )
+
+        features = statistic_mirror.baseline_features()
+        if features is not None:
+            results = build_feature_collection(features)
+            if not include_geometry:
+                drop_result_geometry(results)
+            return analysis_cache.create_analysis_cache(results)
+
+        if custom_geom:
+            select = baseline_table.filterBounds(custom_geom)
         else:
-            if custom_geom:
-                select = baseline_table.filterBounds(custom_geom)
-            else:
-                select = baseline_table.filterBounds(selected_geos)
-        return analysis_cache.create_analysis_cache(select.getInfo())
+            select = baseline_table.filterBounds(selected_geos)
+        return analysis_cache.create_analysis_cache(
+            get_features_info(select)
+        )
 
     if analysis_dict['analysisType'] == "Temporal":
         res = analysis_dict['t_resolution']
@@ -711,33 +941,10 @@ def run_analysis(lat: float, lon: float, analysis_dict: dict, *args, **kwargs):
 
         if res == "Quarterly":
             landscapes_dict = input_layers.get_landscape_dict()
-            if (
-                    analysis_dict['Temporal']['Annual']['ref'] == 2023 or
-                    analysis_dict['Temporal']['Annual']['test'] == 2023
-            ):
-                new_stats = get_latest_stats(
-                    custom_geom if custom_geom else
-                    landscapes_dict[analysis_dict['landscape']],
-                    custom_geom if custom_geom else
-                    communities.filterBounds(selected_geos)
-                )
-                new_stats = new_stats.select(
-                    ['Name', 'ndvi', 'evi', 'bare', 'year', 'month'],
-                    ['Name', 'NDVI', 'EVI', 'Bare ground', 'year', 'month']
-                )
-                new_stats = new_stats.map(lambda ft: ft.set(
-                    'date', ee.Date.parse(
-                        'yyyy-mm-dd',
-                        ee.String(
-                            ft.get('year')
-                        ).cat(
-                            ee.String('-01-01')
-                        )
-                    ).advance(
-                        ee.Number(ft.get('month')), 'months'
-                    ).millis()
-                ))
-                temporal_table = temporal_table.merge(new_stats)
+            use_latest_stats = (
+                analysis_dict['Temporal']['Annual']['ref'] == 2023 or
+                analysis_dict['Temporal']['Annual']['test'] == 2023
+            )
 
             baseline_quart = quarter_dict[
                 analysis_dict['Temporal']['Quarterly']['ref']
@@ -746,86 +953,242 @@ def run_analysis(lat: float, lon: float, analysis_dict: dict, *args, **kwargs):
                 analysis_dict['Temporal']['Quarterly']['test']
             ]
 
-            to_plot = temporal_table.filter(
-                ee.Filter.inList('Name', select_names)
-            ).filter(
-                ee.Filter.Or(
-                    ee.Filter.And(
-                        ee.Filter.eq('year', baseline_yr),
-                        ee.Filter.eq('month', baseline_quart)
-                    ),
-                    ee.Filter.And(
-                        ee.Filter.eq('year', test_yr),
-                        ee.Filter.eq('month', test_quart)
+            quarter_periods = {
+                (baseline_yr, baseline_quart), (test_yr, test_quart)
+            }
+            to_plot_ts = (
+                None if use_latest_stats else
+                statistic_mirror.temporal_features()
+            )
+            if to_plot_ts is not None:
+                to_plot = [
+                    feature for feature in to_plot_ts
+                    if (
+                        feature['properties']['year'],
+                        feature['properties']['month']
+                    ) in quarter_periods
+                ]
+                return analysis_cache.create_analysis_cache(
+                    (
+                        build_feature_collection(to_plot),
+                        build_feature_collection(to_plot_ts)
+                    )
+                )
+
+            def compute_quarterly(scale_factor, tile_scale):
+                quarterly_table = temporal_table
+                if use_latest_stats:
+                    new_stats = get_latest_stats(
+                        custom_geom if custom_geom else
+                        landscapes_dict[analysis_dict['landscape']],
+                        custom_geom if custom_geom else
+                        communities.filterBounds(selected_geos),
+                        scale=120 * scale_factor,
+                        tile_scale=tile_scale
+                    )
+                    new_stats = new_stats.select(
+                        ['Name', 'ndvi', 'evi', 'bare', 'year', 'month'],
+                        ['Name', 'NDVI', 'EVI', 'Bare ground', 'year',
+                         'month']
                     )
+                    new_stats = new_stats.map(lambda ft: ft.set(
+                        'date', ee.Date.parse(
+                            'yyyy-mm-dd',
+                            ee.String(
+                                ft.get('year')
+                            ).cat(
+                                ee.String('-01-01')
+                            )
+                        ).advance(
+                            ee.Number(ft.get('month')), 'months'
+                        ).millis()
+                    ))
+                    quarterly_table = quarterly_table.merge(new_stats)
+
+                to_plot = quarterly_table.filter(
+                    ee.Filter.inList('Name', get_select_names())
+                ).filter(
+                    ee.Filter.Or(
+                        ee.Filter.And(
+                            ee.Filter.eq('year', baseline_yr),
+                            ee.Filter.eq('month', baseline_quart)
+                        ),
+                        ee.Filter.And(
+                            ee.Filter.eq('year', test_yr),
+                            ee.Filter.eq('month', test_quart)
+                        )
+                    )
+                )
+                to_plot = to_plot.sort('Name').sort('date')
+
+                to_plot_ts = quarterly_table.filter(
+                    ee.Filter.inList('Name', get_select_names())
+                )
+                to_plot_ts = to_plot_ts.sort('Name').sort('date')
+                return (
+                    get_collection_info(to_plot),
+                    get_collection_info(to_plot_ts)
+                )
+
+            return analysis_cache.create_analysis_cache(
+                reduction.run(
+                    compute_quarterly
                 )
             )
         elif res == 'Monthly':
             select_geo = geo
             if custom_geom:
                 select_geo = (
-                    ee.Geometry.Polygon(custom_geom['coordinates']) if
-                    custom_geom['type'] == 'Polygon' else
-                    ee.Geometry.MultiPolygon(custom_geom['coordinates'])
+                    ee.Geometry.Polygon(
+                        kwargs['custom_geom']['coordinates']
+                    ) if kwargs['custom_geom']['type'] == 'Polygon' else
+                    ee.Geometry.MultiPolygon(
+                        kwargs['custom_geom']['coordinates']
+                    )
                 )
             baseline_month = int(analysis_dict['Temporal']['Monthly']['ref'])
             test_month = int(analysis_dict['Temporal']['Monthly']['test'])
-            baseline_dt = datetime.date(
-                baseline_yr, baseline_month, 1
-            ).isoformat()
-            # advance 1 month test_dt to include last month
-            test_dt = (
-                datetime.date(test_yr, test_month, 1) + relativedelta(months=1)
-            ).isoformat()
-            monthly_table = calculate_temporal(
-                select_geo,
-                baseline_dt,
-                test_dt,
-                resolution='month',
-                resolution_step=1,
-                is_custom_geom=(custom_geom is not None)
-            )
-            monthly_table = monthly_table.map(
-                lambda feature: feature.setGeometry(None)
+
+            # compute only the months that are not in the period cache
+            if custom_geom:
+                base_area_keys = [geometry_area_key(kwargs['custom_geom'])]
+            else:
+                base_area_keys = get_community_area_keys(lat, lon)
+            # rows of coarser scale are cached with the scale factor
+            area_keys = [
+                scaled_area_key(key, reduction.scale_factor)
+                for key in base_area_keys
+            ]
+            period_cache = TemporalPeriodCache('Monthly', area_keys)
+            periods = month_periods(
+                datetime.date(baseline_yr, baseline_month, 1),
+                datetime.date(test_yr, test_month, 1)
             )
-            # Format the table correctly
-            monthly_table = monthly_table.select(
-                ['Name', 'ndvi', 'evi', 'bare', 'year', 'month'],
-                ['Name', 'NDVI', 'EVI', 'Bare ground', 'year', 'month']
+            cached_rows = period_cache.get_rows(periods) if area_keys else {}
+            missing_periods = (
+                period_cache.missing_periods(periods, cached_rows)
+                if area_keys else periods
             )
+            missing_period_set = set(missing_periods)
+            features = [
+                feature for (_, year, month), feature in cached_rows.items()
+                if feature and (year, month) not in missing_period_set
+            ]
 
-            # Map function to create a 'date' property
-            def add_date(ft):
-                date = ee.Date.parse(
-                    'yyyy-MM-dd',
-                    ee.String(ft.get('year')).cat(ee.String('-01-01'))
-                ).advance(
-                    ee.Number(ft.get('month')), 'months'
-                ).advance(-1, 'months')
-                return ft.set('date', date.millis())
-            monthly_table = monthly_table.map(add_date)
-            monthly_table = monthly_table.map(
-                lambda feature: feature.setGeometry(None)
-            )
-            date_list_ee = ee.List(
-                [
-                    baseline_dt,
-                    datetime.date(test_yr, test_month, 1).isoformat()
+            def get_area_key(feature):
+                if custom_geom:
+                    area_key = base_area_keys[0]
+                else:
+                    area_key = community_area_key(
+                        feature.get('properties', {}).get('Name')
+                    )
+                return scaled_area_key(area_key, reduction.scale_factor)
+
+            def compute_monthly(scale_factor, tile_scale):
+                # advance 1 month end date to include last month
+                start_year, start_month = missing_periods[0]
+                end_year, end_month = missing_periods[-1]
+                start_dt = datetime.date(
+                    start_year, start_month, 1
+                ).isoformat()
+                end_dt = (
+                    datetime.date(end_year, end_month, 1) +
+                    relativedelta(months=1)
+                ).isoformat()
+                if custom_geom and should_tile(area_ha):
+                    return {
+                        'features': calculate_temporal_tiled(
+                            kwargs['custom_geom'],
+                            start_dt,
+                            end_dt,
+                            resolution='month',
+                            resolution_step=1,
+                            scale=120 * scale_factor,
+                            tile_scale=tile_scale
+                        )
+                    }
+                monthly_table = calculate_temporal(
+                    select_geo,
+                    start_dt,
+                    end_dt,
+                    resolution='month',
+                    resolution_step=1,
+                    is_custom_geom=(custom_geom is not None),
+                    scale=120 * scale_factor,
+                    tile_scale=tile_scale
+                )
+                monthly_table = monthly_table.map(
+                    lambda feature: feature.setGeometry(None)
+                )
+                # Format the table correctly
+                monthly_table = monthly_table.select(
+                    ['Name', 'ndvi', 'evi', 'bare', 'year', 'month'],
+                    ['Name', 'NDVI', 'EVI', 'Bare ground', 'year', 'month']
+                )
+
+                # Map function to create a 'date' property
+                def add_date(ft):
+                    date = ee.Date.parse(
+                        'yyyy-MM-dd',
+                        ee.String(ft.get('year')).cat(ee.String('-01-01'))
+                    ).advance(
+                        ee.Number(ft.get('month')), 'months'
+                    ).advance(-1, 'months')
+                    return ft.set('date', date.millis())
+                monthly_table = monthly_table.map(add_date)
+                return get_collection_info(monthly_table)
+
+            if missing_periods:
+                computed = reduction.run(
+                    compute_monthly
+                )['features']
+                if area_keys:
+                    TemporalPeriodCache(
+                        'Monthly',
+                        [
+                            scaled_area_key(key, reduction.scale_factor)
+                            for key in base_area_keys
+                        ]
+                    ).save(computed, missing_periods, get_area_key)
+                features += [
+                    feature for feature in computed
+                    if (
+                        feature['properties'].get('year'),
+                        feature['properties'].get('month')
+                    ) in missing_period_set
                 ]
-            ).map(lambda d: ee.Date(d).millis())
-            to_plot_ts = monthly_table.sort('Name').sort('date')
-            to_plot = to_plot_ts.filter(
-                ee.Filter.inList('date', date_list_ee)
-            )
+
+            # assemble the results like sorting EE table by Name and date
+            plot_dates = [
+                period_date_millis(baseline_yr, baseline_month),
+                period_date_millis(test_yr, test_month)
+            ]
+            to_plot_ts = sort_features(features, 'Name', 'date')
+            to_plot = [
+                feature for feature in to_plot_ts
+                if feature['properties'].get('date') in plot_dates
+            ]
             return analysis_cache.create_analysis_cache(
                 (
-                    to_plot.getInfo(),
-                    to_plot_ts.getInfo()
+                    build_feature_collection(to_plot),
+                    build_feature_collection(to_plot_ts)
                 )
             )
         else:
+            to_plot_ts = statistic_mirror.temporal_features()
+            if to_plot_ts is not None:
+                to_plot = statistic_mirror.annual_features(
+                    [baseline_yr, test_yr]
+                )
+                return analysis_cache.create_analysis_cache(
+                    (
+                        build_feature_collection(to_plot),
+                        build_feature_collection(to_plot_ts)
+                    )
+                )
+
             to_plot = temporal_table_yr.filter(
-                ee.Filter.inList('Name', select_names)
+                ee.Filter.inList('Name', get_select_names())
             ).filter(
                 ee.Filter.inList('year', [baseline_yr, test_yr])
             )
@@ -833,36 +1196,86 @@ def run_analysis(lat: float, lon: float, analysis_dict: dict, *args, **kwargs):
         to_plot = to_plot.sort('Name').sort('date')
 
         to_plot_ts = temporal_table.filter(
-            ee.Filter.inList('Name', select_names)
+            ee.Filter.inList('Name', get_select_names())
         )
         to_plot_ts = to_plot_ts.sort('Name').sort('date')
         return analysis_cache.create_analysis_cache(
             (
-                to_plot.getInfo(),
-                to_plot_ts.getInfo()
+                get_collection_info(to_plot),
+                get_collection_info(to_plot_ts)
             )
         )
 
 
-def initialize_engine_analysis():
-    """
-    Initializes the Earth Engine API for analysis.
-    """
+def _get_service_account_credentials():
+    """Build service account credentials from the configured key."""
     if os.path.exists(SERVICE_ACCOUNT_KEY):
-        credentials = ee.ServiceAccountCredentials(
+        return ee.ServiceAccountCredentials(
             SERVICE_ACCOUNT,
             SERVICE_ACCOUNT_KEY)
-    else:
-        credentials = ee.ServiceAccountCredentials(
-            SERVICE_ACCOUNT,
-            key_data=base64.b64decode(SERVICE_ACCOUNT_KEY).decode('utf-8')
-        )
+    return ee.ServiceAccountCredentials(
+        SERVICE_ACCOUNT,
+        key_data=base64.b64decode(SERVICE_ACCOUNT_KEY).decode('utf-8')
+    )
+
+
+def _refresh_engine_token():
+    """Refresh the access token before it expires."""
+    from google.auth.transport.requests import Request
+
     try:
-        # Initialize the Earth Engine API with the service account
-        ee.Initialize(credentials)
-        print("Earth Engine initialized successfully.")
-    except ee.EEException as e:
-        print("Earth Engine initialization failed:", e)
+        with _engine_lock:
+            _engine_state['credentials'].refresh(Request())
+    except Exception as e:
+        logger.warning(f'Earth Engine token refresh failed: {e}')
+    _schedule_engine_token_refresh()
+
+
+def _schedule_engine_token_refresh():
+    """Schedule background refresh of the access token."""
+    timer = threading.Timer(
+        EE_TOKEN_REFRESH_INTERVAL_IN_S, _refresh_engine_token
+    )
+    timer.daemon = True
+    timer.start()
+    _engine_state['refresh_timer'] = timer
+
+
+def initialize_engine_analysis(force: bool = False):
+    """
+    Initializes the Earth Engine API for analysis.
+
+    Earth Engine is initialized once per process, the credentials are
+    reused and the token is refreshed in a background thread.
+    Subsequent calls are no-op unless force is True.
+    """
+    pid = os.getpid()
+    if not force and _engine_state['pid'] == pid:
+        return
+    with _engine_lock:
+        if not force and _engine_state['pid'] == pid:
+            return
+        # credentials and timer from parent process are not reused
+        # after fork
+        forked = _engine_state['pid'] not in (None, pid)
+        if forked:
+            _engine_state['credentials'] = None
+            _engine_state['refresh_timer'] = None
+        if _engine_state['credentials'] is None or force:
+            _engine_state['credentials'] = (
+                _get_service_account_credentials()
+            )
+        try:
+            # Initialize the Earth Engine API with the service account
+            ee.Initialize(_engine_state['credentials'])
+            print("Earth Engine initialized successfully.")
+        except ee.EEException as e:
+            print("Earth Engine initialization failed:", e)
+            return
+        _engine_state['pid'] = pid
+        if force and _engine_state['refresh_timer'] is not None:
+            _engine_state['refresh_timer'].cancel()
+        _schedule_engine_token_refresh()
 
 
 def add_indices(image):
@@ -1235,7 +1648,7 @@ def classify_bgt(image, classifier):
     return perc_gc
 
 
-def get_latest_stats(geo, communities_select):
+def get_latest_stats(geo, communities_select, scale=120, tile_scale=4):
     """
     Calculates mean values of EVI, NDVI, and bare ground cover
      for specified regions.
@@ -1247,6 +1660,10 @@ def get_latest_stats(geo, communities_select):
     communities_select : ee.FeatureCollection
         The collection of regions (e.g., communities) over which
         to compute the statistics.
+    scale : int
+        Scale in meters of the reduction.
+    tile_scale : int
+        tileScale of the reduction.
 
     Returns
     -------
@@ -1277,8 +1694,8 @@ def get_latest_stats(geo, communities_select):
         reduced = img.reduceRegions(
             collection=communities_select,
             reducer=ee.Reducer.mean(),
-            scale=120,
-            tileScale=4
+            scale=scale,
+            tileScale=tile_scale
         )
         reduced = reduced.map(
             lambda ft: ft.set('year', i.get('year'), 'month', i.get('month')))
@@ -1342,15 +1759,16 @@ def export_image_to_drive(
         }
     )
 
-    task.start()
+    start_export(task)
     print(f"Export task '{description}' started.")
 
-    while task.active():
-        status = task.status()
+    status = get_export_status(task)
+    while status['state'] in ACTIVE_EXPORT_STATES:
         print(f"Task status: {status['state']}")
         time.sleep(10)
+        status = get_export_status(task)
 
-    final_status = task.status()
+    final_status = status
     print(f"Final task status: {final_status['state']}")
     if final_status['state'] == 'COMPLETED':
         print('Export completed successfully.')
@@ -1601,7 +2019,10 @@ def calculate_firefreq(aoi, start_date, end_date):
     return ba_count.rename('fireFreq')
 
 
-def calculate_baseline(aoi, start_date, end_date, is_custom_geom=False):
+def calculate_baseline(
+    aoi, start_date, end_date, is_custom_geom=False,
+    scale=100, tile_scale=1
+):
     """
     Calculate baseline statistics.
 
@@ -1619,6 +2040,47 @@ def calculate_baseline(aoi, start_date, end_date, is_custom_geom=False):
         End date to calculate baseline.
     is_custom_geom : boolean
         If False, then use Communities polygon that intersects with aoi.
+    scale : int
+        Scale in meters of the reduction.
+    tile_scale : int
+        tileScale of the reduction.
+
+    Returns
+    -------
+    ee.FeatureCollection
+    """
+    input_layer = InputLayer()
+    selected_area = input_layer.get_selected_area(aoi, is_custom_geom)
+    combined = get_baseline_image(aoi, start_date, end_date)
+
+    # Reducing regions to extract mean values per polygon
+    reduced = combined.reduceRegions(
+        collection=selected_area,
+        reducer=ee.Reducer.mean(),
+        scale=scale,
+        tileScale=tile_scale
+    )
+    reduced = reduced.distinct(['Name', 'Area ha'])
+
+    return reduced
+
+
+def get_baseline_image(aoi, start_date, end_date):
+    """
+    Get image of baseline indicators.
+
+    Note:
+    - each indicator is checked againts its asset's date availability
+    - only calculate date range or its subset in asset's date availability
+
+    Parameters
+    ----------
+    aoi : ee.Geometry
+        Area of interest.
+    start_date : str
+        Start date to calculate baseline.
+    end_date : str
+        End date to calculate baseline.
 
     Returns
     -------
@@ -1626,7 +2088,6 @@ def calculate_baseline(aoi, start_date, end_date, is_custom_geom=False):
     """
     image_list = []
     input_layer = InputLayer()
-    selected_area = input_layer.get_selected_area(aoi, is_custom_geom)
 
     # Get MODIS vegetation data
     valid, start_dt, end_dt = GEEAsset.get_dates_within_asset_period(
@@ -1754,12 +2215,49 @@ def calculate_baseline(aoi, start_date, end_date, is_custom_geom=False):
         [img['attribute'] for img in image_list],
         [img['label'] for img in image_list]
     )
+    return combined
 
-    # Reducing regions to extract mean values per polygon
-    reduced = combined.reduceRegions(selected_area, ee.Reducer.mean(), 100)
-    reduced = reduced.distinct(['Name', 'Area ha'])
 
-    return reduced
+def calculate_baseline_tiled(
+    geom: dict, start_date, end_date, scale=100, tile_scale=1
+):
+    """
+    Calculate baseline statistics of large custom geometry in tiles.
+
+    Parameters
+    ----------
+    geom : dict
+        GeoJSON geometry of the custom area.
+    start_date : str
+        Start date to calculate baseline.
+    end_date : str
+        End date to calculate baseline.
+    scale : int
+        Scale in meters of the reduction.
+    tile_scale : int
+        tileScale of the reduction.
+
+    Returns
+    -------
+    dict
+        FeatureCollection with the area-weighted means.
+    """
+    image = get_baseline_image(to_ee_geometry(geom), start_date, end_date)
+    bands = get_info(image.bandNames())
+    means = TiledReduction(geom).reduce_image(
+        image, bands, scale, tile_scale
+    )
+    properties = {
+        'name': 'Custom Area',
+        'area': get_geometry_area_ha(geom)
+    }
+    properties.update(means)
+    return build_feature_collection([{
+        'type': 'Feature',
+        'geometry': geom,
+        'id': '0',
+        'properties': properties
+    }])
 
 
 def get_sentinel_by_resolution(
@@ -1800,7 +2298,7 @@ def get_sentinel_by_resolution(
 
 def calculate_temporal(
     aoi, start_date, end_date, resolution, resolution_step,
-    is_custom_geom=False
+    is_custom_geom=False, scale=120, tile_scale=4
 ):
     """
     Calculate temporal timeseries stats.
@@ -1819,6 +2317,10 @@ def calculate_temporal(
         Resolution: 1 for each month or 3 for quarterly.
     is_custom_geom : boolean
         If False, then use Communities polygon that intersects with aoi.
+    scale : int
+        Scale in meters of the reduction.
+    tile_scale : int
+        tileScale of the reduction.
 
     Returns
     -------
@@ -1826,30 +2328,24 @@ def calculate_temporal(
     """
     input_layer = InputLayer()
     selected_area = input_layer.get_selected_area(aoi, is_custom_geom)
-    geo = selected_area.geometry().bounds()
-
-    classifier = train_bgt(
-        geo, GEEAsset.fetch_asset_source('random_forest_training')
-    )
-    col = get_sentinel_by_resolution(
-        geo, start_date, end_date, resolution, resolution_step
+    col = get_temporal_images(
+        selected_area.geometry().bounds(), start_date, end_date,
+        resolution, resolution_step
     )
 
-    def process_image(i):
-        bg = classify_bgt(i, classifier).select('bare')
-        img = i.select(['evi', 'ndvi']).addBands(bg)
+    def process_image(img):
         reduced = img.reduceRegions(
             collection=selected_area,
             reducer=ee.Reducer.mean(),
-            scale=120,
-            tileScale=4
+            scale=scale,
+            tileScale=tile_scale
         )
         reduced = reduced.filter(
             ee.Filter.notNull(['evi', 'ndvi', 'bare'])
         ).map(
             lambda ft: ft.set(
-                'year', i.get('year'),
-                'month', i.get('month')
+                'year', img.get('year'),
+                'month', img.get('month')
             )
         )
         return reduced
@@ -1857,6 +2353,105 @@ def calculate_temporal(
     return col.map(process_image).flatten()
 
 
+def get_temporal_images(
+    geo, start_date, end_date, resolution, resolution_step
+):
+    """
+    Get images of evi, ndvi and bare ground per period.
+
+    Parameters
+    ----------
+    geo : ee.Geometry
+        Bounds of area of interest.
+    start_date : str
+        Start date to calculate baseline.
+    end_date : str
+        End date to calculate baseline.
+    resolution : str
+        Temporal resolution: month or year.
+    resolution_step : str
+        Resolution: 1 for each month or 3 for quarterly.
+
+    Returns
+    -------
+    ee.ImageCollection
+    """
+    classifier = train_bgt(
+        geo, GEEAsset.fetch_asset_source('random_forest_training')
+    )
+    col = get_sentinel_by_resolution(
+        geo, start_date, end_date, resolution, resolution_step
+    )
+
+    def process_image(i):
+        bg = classify_bgt(i, classifier).select('bare')
+        return ee.Image(
+            i.select(['evi', 'ndvi']).addBands(bg).copyProperties(
+                i, ['year', 'month']
+            )
+        )
+
+    return col.map(process_image)
+
+
+def calculate_temporal_tiled(
+    geom: dict, start_date, end_date, resolution, resolution_step,
+    scale=120, tile_scale=4
+):
+    """
+    Calculate temporal timeseries stats of large custom geometry in tiles.
+
+    Parameters
+    ----------
+    geom : dict
+        GeoJSON geometry of the custom area.
+    start_date : str
+        Start date to calculate baseline.
+    end_date : str
+        End date to calculate baseline.
+    resolution : str
+        Temporal resolution: month or year.
+    resolution_step : str
+        Resolution: 1 for each month or 3 for quarterly.
+    scale : int
+        Scale in meters of the reduction.
+    tile_scale : int
+        tileScale of the reduction.
+
+    Returns
+    -------
+    list
+        Features with the area-weighted means of each period.
+    """
+    col = get_temporal_images(
+        to_ee_geometry(geom).bounds(), start_date, end_date,
+        resolution, resolution_step
+    )
+    rows = TiledReduction(geom).reduce_collection(
+        col, ['evi', 'ndvi', 'bare'], ['year', 'month'], scale, tile_scale
+    )
+    features = []
+    for row in rows:
+        # skip periods without data like the notNull filter
+        if None in (row['evi'], row['ndvi'], row['bare']):
+            continue
+        year, month = int(row['year']), int(row['month'])
+        features.append({
+            'type': 'Feature',
+            'geometry': None,
+            'id': f'{year}_{month}',
+            'properties': {
+                'NDVI': row['ndvi'],
+                'EVI': row['evi'],
+                'Bare ground': row['bare'],
+                'year': year,
+                'month': month,
+                'date': period_date_millis(year, month)
+            }
+        })
+    return sort_features(features, 'date')
+
+
 def calculate_temporal_to_img(
     aoi, start_date, end_date, resolution, resolution_step,
     band, is_custom_geom=False
@@ -0,0 +1,334 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Batch analysis of multiple sites.
+
+All sites are combined into one FeatureCollection tagged with site_id,
+so the statistics of every site come from a single reduceRegions and
+getInfo instead of one analysis request per site.
+"""
+import json
+
+import ee
+from django.contrib.gis.geos import GEOSGeometry, Point
+from django.contrib.gis.geos.error import GEOSException
+
+from analysis.adaptive_reduction import (
+    AdaptiveReduction,
+    get_geometry_area_ha
+)
+from analysis.analysis import (
+    AnalysisResultsCacheUtils,
+    InputLayer,
+    get_baseline_image,
+    get_temporal_images,
+    without_geometry
+)
+from analysis.ee_metrics import analysis_type
+from analysis.feature_collection import build_feature_collection
+from analysis.paged_fetch import get_collection_info
+from analysis.statistic_mirror import StatisticMirror
+from analysis.tiled_reduction import should_tile
+
+
+MAX_BATCH_SITES = 100
+
+SITE_ID = 'site_id'
+
+# temporal resolution to quarterly_medians unit and step
+TEMPORAL_RESOLUTIONS = {
+    'Monthly': ('month', 1),
+    'Quarterly': ('month', 3),
+    'Annual': ('year', 1),
+}
+
+
+def parse_sites(sites: list) -> list:
+    """
+    Validate sites of the batch analysis.
+
+    Site is either {'id', 'latitude', 'longitude'} to use the
+    communities at the point, or {'id', 'geometry'} with GeoJSON
+    Polygon or MultiPolygon.
+
+    :return: list of dictionaries of id, name, geometry and is_custom_geom
+    """
+    if not sites:
+        raise ValueError('No site in the batch!')
+    if len(sites) > MAX_BATCH_SITES:
+        raise ValueError(
+            f'Batch analysis is limited to {MAX_BATCH_SITES} sites!'
+        )
+
+    parsed = []
+    site_ids = set()
+    for idx, site in enumerate(sites):
+        site_id = str(site.get('id', idx))
+        if site_id in site_ids:
+            raise ValueError(f'Duplicate site id {site_id}!')
+        site_ids.add(site_id)
+
+        geometry = site.get('geometry')
+        if geometry is None:
+            try:
+                point = Point(
+                    float(site['longitude']), float(site['latitude'])
+                )
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f'Invalid location of site {site_id}!')
+            geometry = json.loads(point.geojson)
+
+        try:
+            geos = GEOSGeometry(json.dumps(geometry), srid=4326)
+        except (GEOSException, ValueError, TypeError):
+            raise ValueError(f'Invalid geometry of site {site_id}!')
+        if geos.geom_type not in ('Point', 'Polygon', 'MultiPolygon'):
+            raise ValueError(
+                f'Unsupported geometry type {geos.geom_type} '
+                f'of site {site_id}!'
+            )
+        is_custom_geom = geos.geom_type != 'Point'
+        if is_custom_geom and should_tile(get_geometry_area_ha(geometry)):
+            raise ValueError(
+                f'Site {site_id} is too large for batch analysis, '
+                'please use the analysis API.'
+            )
+        parsed.append({
+            'id': site_id,
+            'name': site.get('name') or site_id,
+            'geometry': geometry,
+            'is_custom_geom': is_custom_geom
+        })
+    return parsed
+
+
+def get_sites_area_ha(sites: list):
+    """Get total area of custom geometry sites, None for point sites."""
+    areas = [
+        get_geometry_area_ha(site['geometry']) for site in sites
+        if site['is_custom_geom']
+    ]
+    return sum(areas) if areas else None
+
+
+def get_site_collection(sites: list, communities):
+    """
+    Combine the sites into one FeatureCollection tagged with site_id.
+
+    Point site uses the communities at the point, custom geometry site
+    uses its geometry.
+    """
+    collections = []
+    for site in sites:
+        geometry = ee.Geometry(site['geometry'])
+        if site['is_custom_geom']:
+            collection = ee.FeatureCollection([
+                ee.Feature(geometry, {
+                    SITE_ID: site['id'],
+                    'Name': site['name'],
+                    'area': geometry.area().divide(10000)
+                })
+            ])
+        else:
+            collection = communities.filterBounds(geometry).map(
+                lambda feature, site_id=site['id']: feature.set(
+                    SITE_ID, site_id
+                )
+            )
+        collections.append(collection)
+    return ee.FeatureCollection(collections).flatten()
+
+
+def group_by_site(sites: list, features: list) -> dict:
+    """Group features by site_id into FeatureCollection per site."""
+    results = {site['id']: [] for site in sites}
+    for feature in features:
+        site_id = feature.get('properties', {}).pop(SITE_ID, None)
+        if site_id in results:
+            results[site_id].append(feature)
+    return {
+        site_id: build_feature_collection(features)
+        for site_id, features in results.items()
+    }
+
+
+class BatchAnalysis:
+    """Run baseline or temporal analysis of multiple sites."""
+
+    def __init__(self, sites: list, include_geometry: bool = False):
+        """Initialize batch analysis.
+
+        :param sites: list of site dictionaries, see parse_sites
+        :param include_geometry: whether to return feature geometries
+        """
+        self.sites = parse_sites(sites)
+        self.include_geometry = include_geometry
+        self.area_ha = get_sites_area_ha(self.sites)
+        self.input_layers = InputLayer()
+
+    def _cache(self, inputs: dict, reduction: AdaptiveReduction):
+        return AnalysisResultsCacheUtils({
+            'batch': inputs,
+            'sites': self.sites,
+            'include_geometry': self.include_geometry
+        }, reduction)
+
+    def _reduction(self, name: str) -> AdaptiveReduction:
+        return AdaptiveReduction(
+            name, self.area_ha,
+            [site['geometry'] for site in self.sites]
+        )
+
+    def _get_features(self, collection):
+        if not self.include_geometry:
+            collection = without_geometry(collection)
+        return get_collection_info(collection)['features']
+
+    def run_baseline(self, start_date=None, end_date=None) -> dict:
+        """
+        Get baseline statistics of every site.
+
+        Without dates, the pre-exported baseline table is used.
+
+        :return: dictionary of site id to FeatureCollection
+        """
+        reduction = self._reduction('Batch-Baseline')
+        analysis_cache = self._cache({
+            'analysisType': 'Baseline',
+            'startDate': start_date,
+            'endDate': end_date
+        }, reduction)
+        output = analysis_cache.get_analysis_cache()
+        if output:
+            return output
+
+        with analysis_type('Batch-Baseline'):
+            if start_date and end_date:
+                results = self._calculate_baseline(
+                    start_date, end_date, reduction
+                )
+            else:
+                results = self._baseline_table()
+        return analysis_cache.create_analysis_cache(results)
+
+    def _baseline_table(self) -> dict:
+        results = {}
+        for site in self.sites:
+            features = StatisticMirror(
+                GEOSGeometry(json.dumps(site['geometry']), srid=4326)
+            ).baseline_features()
+            if features is None:
+                break
+            if not self.include_geometry:
+                for feature in features:
+                    feature['geometry'] = None
+            results[site['id']] = build_feature_collection(features)
+        else:
+            return results
+
+        # the mirror is not synced, select from the table in one call
+        baseline_table = self.input_layers.get_baseline_table()
+        collection = ee.FeatureCollection([
+            baseline_table.filterBounds(ee.Geometry(site['geometry'])).map(
+                lambda feature, site_id=site['id']: feature.set(
+                    SITE_ID, site_id
+                )
+            ) for site in self.sites
+        ]).flatten()
+        return group_by_site(self.sites, self._get_features(collection))
+
+    def _calculate_baseline(
+            self, start_date, end_date, reduction: AdaptiveReduction
+    ) -> dict:
+        collection = get_site_collection(
+            self.sites, self.input_layers.get_communities()
+        )
+        image = get_baseline_image(
+            collection.geometry(), start_date, end_date
+        )
+
+        def compute(scale_factor, tile_scale):
+            reduced = image.reduceRegions(
+                collection=collection,
+                reducer=ee.Reducer.mean(),
+                scale=100 * scale_factor,
+                tileScale=tile_scale
+            )
+            return self._get_features(reduced)
+
+        features = reduction.run(compute)
+        return group_by_site(self.sites, features)
+
+    def run_temporal(
+        self, start_date, end_date, resolution: str = 'Monthly'
+    ) -> dict:
+        """
+        Get temporal statistics of every site.
+
+        :param start_date: start date in YYYY-MM-DD
+        :param end_date: end date (exclusive) in YYYY-MM-DD
+        :param resolution: Monthly, Quarterly or Annual
+        :return: dictionary of site id to FeatureCollection sorted by date
+        """
+        if resolution not in TEMPORAL_RESOLUTIONS:
+            raise ValueError(f'Invalid temporal resolution {resolution}!')
+        if not start_date or not end_date:
+            raise ValueError('Temporal batch analysis requires dates!')
+        reduction = self._reduction('Batch-Temporal')
+        analysis_cache = self._cache({
+            'analysisType': 'Temporal',
+            'startDate': start_date,
+            'endDate': end_date,
+            't_resolution': resolution
+        }, reduction)
+        output = analysis_cache.get_analysis_cache()
+        if output:
+            return output
+
+        unit, step = TEMPORAL_RESOLUTIONS[resolution]
+        collection = get_site_collection(
+            self.sites, self.input_layers.get_communities()
+        )
+        images = get_temporal_images(
+            collection.geometry().bounds(), start_date, end_date, unit, step
+        )
+
+        def compute(scale_factor, tile_scale):
+            def process_image(img):
+                reduced = img.reduceRegions(
+                    collection=collection,
+                    reducer=ee.Reducer.mean(),
+                    scale=120 * scale_factor,
+                    tileScale=tile_scale
+                )
+                return reduced.filter(
+                    ee.Filter.notNull(['evi', 'ndvi', 'bare'])
+                ).map(
+                    lambda ft: ft.set(
+                        'year', img.get('year'),
+                        'month', img.get('month')
+                    )
+                )
+
+            table = images.map(process_image).flatten().select(
+                [SITE_ID, 'Name', 'ndvi', 'evi', 'bare', 'year', 'month'],
+                [SITE_ID, 'Name', 'NDVI', 'EVI', 'Bare ground', 'year',
+                 'month']
+            ).map(lambda ft: ft.set(
+                'date', ee.Date.parse(
+                    'yyyy-MM-dd',
+                    ee.String(ft.get('year')).cat(ee.String('-01-01'))
+                ).advance(
+                    ee.Number(ft.get('month')), 'months'
+                ).advance(-1, 'months').millis()
+            )).sort('Name').sort('date')
+            return get_collection_info(table.map(
+                lambda feature: feature.setGeometry(None)
+            ))['features']
+
+        with analysis_type('Batch-Temporal'):
+            features = reduction.run(compute)
+        return analysis_cache.create_analysis_cache(
+            group_by_site(self.sites, features)
+        )
@@ -0,0 +1,267 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Pre-generated PMTiles of landscape communities.
+
+Community boundaries only change when the areas are fetched, so they
+are built into a PMTiles archive with tippecanoe, which simplifies the
+geometries per zoom level. The map reads the archive with HTTP range
+requests instead of querying Postgres for every tile. The live vector
+tile endpoint is used while no archive exists, it reads geometries
+simplified per zoom band.
+"""
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from django.contrib.gis.db.models.functions import AsGeoJSON
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection
+
+from analysis.models import LandscapeCommunity
+
+
+logger = logging.getLogger(__name__)
+
+COMMUNITY_TILES_DIR = 'community_tiles'
+# same source layer as the live vector tile
+COMMUNITY_TILES_LAYER = 'default'
+COMMUNITY_TILES_MAX_ZOOM = 12
+COMMUNITY_TILES_CACHE_KEY = 'community-pmtiles-name'
+VECTOR_TILE_EXTENT = 4096
+VECTOR_TILE_BUFFER = 256
+TIPPECANOE_TIMEOUT_IN_S = 30 * 60
+# Wait for more changes before rebuilding, e.g. fetching a landscape
+REBUILD_DELAY_IN_S = 60
+REBUILD_LOCK_KEY = 'community-pmtiles-rebuild'
+# Live vector tiles are cached per version of the communities
+COMMUNITY_TILES_VERSION_KEY = 'community-tiles-version'
+VECTOR_TILE_CACHE_TIMEOUT_IN_S = 7 * 24 * 60 * 60
+VECTOR_TILE_MAX_AGE_IN_S = 5 * 60
+
+
+def query_community_vector_tile(z: int, x: int, y: int) -> bytes:
+    """
+    Query vector tile of communities from Postgres.
+
+    Low zooms read the geometry simplified for the zoom band, so the
+    tile is not built from the full resolution boundaries.
+    """
+    geometry_field = LandscapeCommunity.get_geometry_field(z)
+    table = LandscapeCommunity._meta.db_table
+    sql = f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+        )
+        SELECT ST_AsMVT(tile.*, %s, %s, 'geom')
+        FROM (
+            SELECT
+                ST_AsMVTGeom(
+                    ST_Transform(t.{geometry_field}, 3857),
+                    bounds.geom, %s, %s, true
+                ) AS geom,
+                t.id, t.landscape_id, t.community_id, t.community_name
+            FROM {table} t, bounds
+            WHERE t.{geometry_field} && ST_Transform(bounds.geom, 4326)
+        ) AS tile
+        WHERE tile.geom IS NOT NULL
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            z, x, y,
+            COMMUNITY_TILES_LAYER, VECTOR_TILE_EXTENT,
+            VECTOR_TILE_EXTENT, VECTOR_TILE_BUFFER
+        ])
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] else b''
+
+
+def get_community_tiles_version() -> str:
+    """Get version of the communities that the cached tiles belong to."""
+    version = cache.get(COMMUNITY_TILES_VERSION_KEY)
+    if version is None:
+        version = str(time.time_ns())
+        if not cache.add(COMMUNITY_TILES_VERSION_KEY, version, timeout=None):
+            version = cache.get(COMMUNITY_TILES_VERSION_KEY, version)
+    return version
+
+
+def bump_community_tiles_version():
+    """Invalidate cached vector tiles after the communities change."""
+    cache.set(COMMUNITY_TILES_VERSION_KEY, str(time.time_ns()), timeout=None)
+
+
+def get_community_vector_tile_etag(z: int, x: int, y: int) -> str:
+    """Get ETag of the vector tile for the current communities."""
+    return f'{get_community_tiles_version()}-{z}-{x}-{y}'
+
+
+def get_community_vector_tile(z: int, x: int, y: int) -> bytes:
+    """
+    Get vector tile of communities, cached until the communities change.
+
+    Empty tiles are cached too, so they are not queried again.
+    """
+    key = f'community-tile-{get_community_tiles_version()}-{z}-{x}-{y}'
+    tile = cache.get(key)
+    if tile is None:
+        tile = query_community_vector_tile(z, x, y)
+        cache.set(key, tile, timeout=VECTOR_TILE_CACHE_TIMEOUT_IN_S)
+    return tile
+
+
+def write_communities_geojson(file_path: str) -> int:
+    """
+    Write communities as newline-delimited GeoJSON features.
+
+    :return: number of communities
+    """
+    count = 0
+    queryset = LandscapeCommunity.objects.annotate(
+        geojson=AsGeoJSON('geometry')
+    ).values_list(
+        'id', 'landscape_id', 'community_id', 'community_name', 'geojson'
+    ).order_by('id')
+    with open(file_path, 'w') as file:
+        for pk, landscape_id, community_id, name, geojson in (
+            queryset.iterator(chunk_size=500)
+        ):
+            file.write(
+                '{"type":"Feature","properties":' +
+                json.dumps({
+                    'id': pk,
+                    'landscape_id': landscape_id,
+                    'community_id': community_id,
+                    'community_name': name
+                }) +
+                ',"geometry":' + geojson + '}\n'
+            )
+            count += 1
+    return count
+
+
+def run_tippecanoe(geojson_path: str, output_path: str):
+    """Build PMTiles from the GeoJSON features."""
+    subprocess.run(
+        [
+            'tippecanoe',
+            '-o', output_path,
+            '--force',
+            '--layer', COMMUNITY_TILES_LAYER,
+            '--minimum-zoom', '0',
+            '--maximum-zoom', str(COMMUNITY_TILES_MAX_ZOOM),
+            # simplify shared borders of neighbour communities the same way
+            '--detect-shared-borders',
+            # boundaries are selectable at every zoom, do not drop them
+            '--no-feature-limit',
+            '--no-tile-size-limit',
+            '--read-parallel',
+            geojson_path
+        ],
+        check=True,
+        capture_output=True,
+        timeout=TIPPECANOE_TIMEOUT_IN_S
+    )
+
+
+def get_community_pmtiles_name():
+    """Get storage name of the latest community PMTiles, or None."""
+    name = cache.get(COMMUNITY_TILES_CACHE_KEY)
+    if name and default_storage.exists(name):
+        return name
+    try:
+        _, files = default_storage.listdir(COMMUNITY_TILES_DIR)
+    except FileNotFoundError:
+        return None
+    files = sorted(file for file in files if file.endswith('.pmtiles'))
+    if not files:
+        return None
+    name = f'{COMMUNITY_TILES_DIR}/{files[-1]}'
+    cache.set(COMMUNITY_TILES_CACHE_KEY, name, timeout=None)
+    return name
+
+
+def delete_old_community_pmtiles(keep_count: int = 2):
+    """
+    Delete community PMTiles except the newest keep_count.
+
+    The previous archive is kept for clients that loaded its url before
+    the new build.
+    """
+    try:
+        _, files = default_storage.listdir(COMMUNITY_TILES_DIR)
+    except FileNotFoundError:
+        return
+    files = sorted(file for file in files if file.endswith('.pmtiles'))
+    for file in files[:max(len(files) - keep_count, 0)]:
+        default_storage.delete(f'{COMMUNITY_TILES_DIR}/{file}')
+
+
+def build_community_pmtiles():
+    """
+    Build PMTiles of all communities.
+
+    The archive has a new name on every build, so clients never read
+    tiles of different builds.
+
+    :return: storage name of the archive, or None when there is no
+        community or tippecanoe fails
+    """
+    tmp_dir = tempfile.mkdtemp(prefix='arw-community-tiles-')
+    try:
+        geojson_path = os.path.join(tmp_dir, 'communities.geojsonl')
+        if write_communities_geojson(geojson_path) == 0:
+            delete_old_community_pmtiles(keep_count=0)
+            cache.delete(COMMUNITY_TILES_CACHE_KEY)
+            return None
+
+        output_path = os.path.join(tmp_dir, 'communities.pmtiles')
+        try:
+            run_tippecanoe(geojson_path, output_path)
+        except FileNotFoundError:
+            logger.error('tippecanoe is not installed')
+            return None
+        except subprocess.SubprocessError as ex:
+            stderr = getattr(ex, 'stderr', None) or b''
+            logger.error(
+                f'Failed to build community PMTiles: {ex} '
+                f'{stderr.decode(errors="replace")}'
+            )
+            return None
+
+        with open(output_path, 'rb') as file:
+            name = default_storage.save(
+                f'{COMMUNITY_TILES_DIR}/'
+                f'communities-{time.time_ns()}.pmtiles',
+                File(file)
+            )
+        cache.set(COMMUNITY_TILES_CACHE_KEY, name, timeout=None)
+        delete_old_community_pmtiles()
+        return name
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def schedule_community_pmtiles_build():
+    """Build the PMTiles once after a burst of community changes."""
+    from analysis.tasks import generate_community_pmtiles
+    if not cache.add(REBUILD_LOCK_KEY, 1, timeout=REBUILD_DELAY_IN_S):
+        return
+    try:
+        generate_community_pmtiles.apply_async(countdown=REBUILD_DELAY_IN_S)
+    except Exception as ex:
+        logger.error(f'Failed to schedule community PMTiles build: {ex}')
+        cache.delete(REBUILD_LOCK_KEY)
+
+
+def refresh_community_tiles():
+    """Invalidate cached tiles and rebuild PMTiles of the communities."""
+    bump_community_tiles_version()
+    schedule_community_pmtiles_build()
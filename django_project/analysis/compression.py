@@ -0,0 +1,140 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Compressed storage of analysis result payloads.
+
+Analysis results are large JSON documents with geometries and time
+series. When ANALYSIS_RESULTS_COMPRESSION is set, the full document is
+stored as compressed bytes and the JSON column keeps a small summary
+used for filtering.
+"""
+import gzip
+import json
+
+from django.conf import settings
+from django.contrib.gis.db import models
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 9
+
+
+def get_compression_codec():
+    """
+    Get codec of the payload compression.
+
+    :return: gzip, zstd, or None if compression is disabled
+    """
+    codec = getattr(settings, 'ANALYSIS_RESULTS_COMPRESSION', None)
+    if not codec:
+        return None
+    codec = codec.lower()
+    if codec == ZSTD and zstandard is None:
+        # zstandard is optional, fallback to gzip
+        return GZIP
+    if codec not in (GZIP, ZSTD):
+        raise ValueError(f'Unsupported compression codec {codec}')
+    return codec
+
+
+def compress_payload(data, codec: str = GZIP) -> bytes:
+    """Compress JSON serializable data."""
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    if codec == ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return gzip.compress(raw, compresslevel=GZIP_LEVEL)
+
+
+def decompress_payload(payload):
+    """Decompress payload, the codec is detected from the magic bytes."""
+    payload = bytes(payload)
+    if payload.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise ValueError(
+                'zstandard is required to read zstd compressed payload'
+            )
+        raw = zstandard.ZstdDecompressor().decompress(payload)
+    elif payload.startswith(GZIP_MAGIC):
+        raw = gzip.decompress(payload)
+    else:
+        raise ValueError('Unknown payload compression')
+    return json.loads(raw.decode('utf-8'))
+
+
+class CompressedAnalysisResultsMixin(models.Model):
+    """
+    Store analysis_results compressed when the compression is enabled.
+
+    analysis_results is decompressed when the row is loaded, so reading
+    and assigning it is the same as an uncompressed row. Querying the
+    analysis_results column only sees the summary.
+    """
+
+    # keys of analysis_results kept uncompressed for filtering
+    SUMMARY_KEYS = ()
+
+    analysis_results_payload = models.BinaryField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Compressed analysis results.'
+    )
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Decompress the payload into analysis_results."""
+        instance = super().from_db(db, field_names, values)
+        payload = instance.__dict__.get('analysis_results_payload')
+        if payload:
+            instance.analysis_results = decompress_payload(payload)
+        return instance
+
+    def get_results_summary(self):
+        """Get uncompressed summary of analysis_results."""
+        if not isinstance(self.analysis_results, dict):
+            return None
+        return {
+            key: value for key, value in self.analysis_results.items()
+            if key in self.SUMMARY_KEYS
+        }
+
+    def save(self, *args, **kwargs):
+        """Compress analysis_results before saving."""
+        codec = get_compression_codec()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and (
+            'analysis_results' not in update_fields
+        ):
+            return super().save(*args, **kwargs)
+
+        if update_fields is not None:
+            kwargs['update_fields'] = (
+                set(update_fields) | {'analysis_results_payload'}
+            )
+        results = self.analysis_results
+        if codec is None or results is None:
+            self.analysis_results_payload = None
+            return super().save(*args, **kwargs)
+
+        self.analysis_results_payload = compress_payload(results, codec)
+        self.analysis_results = self.get_results_summary()
+        try:
+            return super().save(*args, **kwargs)
+        finally:
+            # keep the full results on the instance
+            self.analysis_results = results
@@ -0,0 +1,350 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Coordinated Earth Engine calls.
+
+All Earth Engine compute calls (getInfo, getMapId and exports) from web
+workers and Celery tasks go through call_ee. It shares a Redis-backed
+semaphore and token bucket per call type across the cluster and retries
+rate limited calls with jittered exponential backoff.
+"""
+import contextlib
+import contextvars
+import logging
+import random
+import time
+import uuid
+
+import ee
+from django.conf import settings
+
+from analysis.ee_circuit_breaker import circuit_breaker, is_outage_error
+from analysis.ee_metrics import EECallTimer
+
+
+logger = logging.getLogger(__name__)
+
+
+class EECallType:
+    """Type of Earth Engine call."""
+
+    GET_INFO = 'getInfo'
+    GET_MAP_ID = 'getMapId'
+    GET_DOWNLOAD_URL = 'getDownloadURL'
+    EXPORT = 'export'
+    EXPORT_STATUS = 'export_status'
+
+
+class EEPriority:
+    """Priority of Earth Engine call."""
+
+    INTERACTIVE = 'interactive'
+    BATCH = 'batch'
+
+
+# Error messages from EE that should be retried with backoff
+RATE_LIMIT_ERROR_MESSAGES = [
+    '429',
+    'too many requests',
+    'quota exceeded',
+    'rate limit',
+    '503',
+    'service unavailable',
+]
+
+# States of EE export task that is still running
+ACTIVE_EXPORT_STATES = ['UNSUBMITTED', 'READY', 'RUNNING', 'CANCEL_REQUESTED']
+
+DEFAULT_CALL_LIMIT = {
+    'concurrency': 10,
+    'rate': 5,
+    'burst': 10,
+    'interactive_reserve': 2,
+}
+
+_priority = contextvars.ContextVar('ee_call_priority', default=None)
+_default_priority = EEPriority.INTERACTIVE
+
+
+_redis_client = None
+
+
+def get_redis_client():
+    """Get redis client shared by EE limiter and metrics."""
+    global _redis_client
+    if _redis_client is None:
+        import redis
+        _redis_client = redis.Redis.from_url(
+            settings.EE_REDIS_URL,
+            socket_timeout=1,
+            socket_connect_timeout=1
+        )
+    return _redis_client
+
+
+class EECallLimitTimeout(ee.EEException):
+    """Raised when a slot for Earth Engine call is not available."""
+
+
+def is_rate_limit_error(ex: Exception) -> bool:
+    """Check whether EE error is caused by rate or concurrency limit."""
+    # the limiter already waited for its timeout, do not wait again
+    if isinstance(ex, EECallLimitTimeout):
+        return False
+    if not isinstance(ex, ee.EEException):
+        return False
+    message = str(ex).lower()
+    return any(msg in message for msg in RATE_LIMIT_ERROR_MESSAGES)
+
+
+def set_default_priority(priority: str):
+    """Set default priority of EE calls of current process."""
+    global _default_priority
+    _default_priority = priority
+
+
+def get_priority() -> str:
+    """Get priority of EE calls in current context."""
+    return _priority.get() or _default_priority
+
+
+@contextlib.contextmanager
+def ee_priority(priority: str):
+    """Run EE calls in the block with the given priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def get_call_limit(call_type: str) -> dict:
+    """Get limit config of a call type."""
+    limit = dict(DEFAULT_CALL_LIMIT)
+    limit.update(
+        getattr(settings, 'EE_CALL_LIMITS', {}).get(call_type, {})
+    )
+    return limit
+
+
+# Acquire a lease when number of active leases is below the limit.
+# Expired leases from crashed processes are dropped first.
+SEMAPHORE_ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[4])
+    redis.call('PEXPIRE', KEYS[1], ARGV[5])
+    return 1
+end
+return 0
+"""
+
+# Take a token from the bucket, returns (allowed, wait in ms).
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return {allowed, wait}
+"""
+
+
+class EECallLimiter:
+    """Cluster-wide semaphore and token bucket for EE calls."""
+
+    KEY_PREFIX = 'ee-call-limiter'
+    LEASE_TIMEOUT_IN_MS = 10 * 60 * 1000
+    POLL_INTERVAL_IN_S = {
+        EEPriority.INTERACTIVE: 0.1,
+        EEPriority.BATCH: 0.5,
+    }
+
+    def __init__(self):
+        """Initialize limiter."""
+        self._scripts = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Check whether limiter is enabled."""
+        return getattr(settings, 'EE_RATE_LIMITER_ENABLED', False)
+
+    @property
+    def client(self):
+        """Get redis client."""
+        return get_redis_client()
+
+    def _script(self, name: str, script: str):
+        if name not in self._scripts:
+            self._scripts[name] = self.client.register_script(script)
+        return self._scripts[name]
+
+    def _now_ms(self) -> int:
+        return int(time.time() * 1000)
+
+    def _acquire_slot(
+            self, call_type: str, priority: str, lease: str) -> bool:
+        limit = get_call_limit(call_type)
+        concurrency = limit['concurrency']
+        if priority == EEPriority.BATCH:
+            # keep some slots free for interactive calls
+            concurrency = max(1, concurrency - limit['interactive_reserve'])
+        now = self._now_ms()
+        return bool(
+            self._script('semaphore', SEMAPHORE_ACQUIRE_SCRIPT)(
+                keys=[f'{self.KEY_PREFIX}:slots:{call_type}'],
+                args=[
+                    now, now + self.LEASE_TIMEOUT_IN_MS, concurrency,
+                    lease, self.LEASE_TIMEOUT_IN_MS
+                ]
+            )
+        )
+
+    def _take_token(self, call_type: str) -> int:
+        limit = get_call_limit(call_type)
+        allowed, wait = self._script('bucket', TOKEN_BUCKET_SCRIPT)(
+            keys=[f'{self.KEY_PREFIX}:bucket:{call_type}'],
+            args=[self._now_ms(), limit['rate'], limit['burst']]
+        )
+        return 0 if allowed else int(wait)
+
+    @contextlib.contextmanager
+    def acquire(self, call_type: str, priority: str):
+        """Wait for a slot and a token to run the EE call."""
+        if not self.enabled:
+            yield
+            return
+
+        lease = None
+        try:
+            lease = self._wait_for_slot(call_type, priority)
+        except EECallLimitTimeout:
+            raise
+        except Exception as ex:
+            # fail open when redis is not available
+            logger.warning(f'EE call limiter is not available: {ex}')
+
+        try:
+            yield
+        finally:
+            if lease:
+                self._release(call_type, lease)
+
+    def _wait_for_slot(self, call_type: str, priority: str):
+        timeout = settings.EE_CALL_ACQUIRE_TIMEOUT_IN_S.get(priority, 60)
+        deadline = time.monotonic() + timeout
+        poll_interval = self.POLL_INTERVAL_IN_S.get(priority, 0.5)
+        lease = str(uuid.uuid4())
+        while not self._acquire_slot(call_type, priority, lease):
+            if time.monotonic() > deadline:
+                raise EECallLimitTimeout(
+                    f'Earth Engine is busy, no {call_type} slot '
+                    f'available after {timeout} seconds.'
+                )
+            time.sleep(poll_interval)
+
+        try:
+            wait = self._take_token(call_type)
+            while wait > 0:
+                if time.monotonic() > deadline:
+                    raise EECallLimitTimeout(
+                        f'Earth Engine is busy, {call_type} rate limit '
+                        f'is reached for {timeout} seconds.'
+                    )
+                time.sleep(wait / 1000)
+                wait = self._take_token(call_type)
+        except Exception:
+            self._release(call_type, lease)
+            raise
+        return lease
+
+    def _release(self, call_type: str, lease: str):
+        try:
+            self.client.zrem(f'{self.KEY_PREFIX}:slots:{call_type}', lease)
+        except Exception as ex:
+            logger.warning(f'Failed to release EE call slot: {ex}')
+
+
+limiter = EECallLimiter()
+
+
+def call_ee(call_type: str, func, *args, **kwargs):
+    """
+    Run EE call through the cluster-wide limiter.
+
+    Rate limited calls (429/503) are retried with jittered
+    exponential backoff. Calls fail immediately with EEUnavailable
+    while the circuit breaker is open.
+
+    :param call_type: type of the call, see EECallType
+    :param func: function that calls Earth Engine
+    :return: result of the function
+    """
+    priority = get_priority()
+    max_retries = getattr(settings, 'EE_CALL_MAX_RETRIES', 5)
+    base_delay = getattr(settings, 'EE_CALL_BACKOFF_BASE_IN_S', 1)
+    max_delay = getattr(settings, 'EE_CALL_BACKOFF_MAX_IN_S', 30)
+    state = circuit_breaker.check()
+    attempt = 0
+    while True:
+        try:
+            with limiter.acquire(call_type, priority):
+                with EECallTimer(call_type) as timer:
+                    result = func(*args, **kwargs)
+                    timer.finish(result)
+            circuit_breaker.record_success(state)
+            return result
+        except Exception as ex:
+            if not is_rate_limit_error(ex) or attempt >= max_retries:
+                if is_outage_error(ex):
+                    circuit_breaker.record_failure()
+                raise
+            delay = random.uniform(
+                0, min(max_delay, base_delay * (2 ** attempt))
+            )
+            logger.warning(
+                f'EE {call_type} call is rate limited, '
+                f'retry in {delay:.1f}s: {ex}'
+            )
+            time.sleep(delay)
+            attempt += 1
+
+
+def get_info(ee_object):
+    """Call getInfo of the EE object."""
+    return call_ee(EECallType.GET_INFO, ee_object.getInfo)
+
+
+def get_map_id(image, vis_params: dict = None):
+    """Call getMapId of the EE image."""
+    return call_ee(EECallType.GET_MAP_ID, image.getMapId, vis_params)
+
+
+def get_download_url(image, params: dict) -> str:
+    """Call getDownloadURL of the EE image."""
+    return call_ee(
+        EECallType.GET_DOWNLOAD_URL, image.getDownloadURL, params
+    )
+
+
+def start_export(task):
+    """Start EE export task."""
+    return call_ee(EECallType.EXPORT, task.start)
+
+
+def get_export_status(task) -> dict:
+    """Get status of EE export task."""
+    return call_ee(EECallType.EXPORT_STATUS, task.status)
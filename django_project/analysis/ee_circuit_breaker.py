@@ -0,0 +1,175 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Circuit breaker of Earth Engine calls.
+
+When EE calls keep failing with outage errors, the circuit is opened
+and EE calls fail immediately until the reset timeout, instead of
+every request waiting for EE to time out. The state is kept in the
+Django cache, so it is shared by all workers.
+"""
+import logging
+import re
+import time
+
+import ee
+from django.conf import settings
+from django.core.cache import cache
+
+from analysis.adaptive_reduction import is_resource_error
+
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_OPEN_KEY = 'ee-circuit-open'
+CIRCUIT_FAILURES_KEY = 'ee-circuit-failures'
+
+# HTTP status codes that indicate EE is unavailable
+OUTAGE_HTTP_STATUSES = {429, 500, 502, 503, 504}
+
+# Error messages from EE that indicate EE is unavailable, used when the
+# error does not have the HTTP status
+OUTAGE_ERROR_PATTERN = re.compile(
+    r'\b(?:429|500|502|503|504)\b|'
+    r'too many requests|'
+    r'internal error|'
+    r'bad gateway|'
+    r'service unavailable|'
+    r'deadline exceeded|'
+    r'\bconnection (?:reset|refused|aborted)\b|'
+    r'\b(?:read|connect) timed out\b',
+    re.IGNORECASE
+)
+
+DEFAULT_CIRCUIT_BREAKER = {
+    'failure_threshold': 5,
+    'failure_window_in_s': 60,
+    'reset_timeout_in_s': 60,
+}
+
+
+class EEUnavailable(ee.EEException):
+    """Earth Engine calls are stopped by the open circuit."""
+
+
+def get_http_status(ex: Exception):
+    """Get HTTP status of the error or of its cause, or None."""
+    seen = set()
+    while ex is not None and id(ex) not in seen:
+        seen.add(id(ex))
+        status = getattr(ex, 'status_code', None)
+        response = getattr(ex, 'resp', None) or getattr(ex, 'response', None)
+        if status is None and response is not None:
+            status = getattr(
+                response, 'status', getattr(response, 'status_code', None)
+            )
+        if isinstance(status, str) and status.isdigit():
+            status = int(status)
+        if isinstance(status, int):
+            return status
+        ex = ex.__cause__ or ex.__context__
+    return None
+
+
+def is_outage_error(ex: Exception) -> bool:
+    """
+    Check whether the exception means EE is unavailable.
+
+    Errors of a single request, e.g. computation timed out or invalid
+    input, are not outages even when they are retried.
+    """
+    if isinstance(ex, EEUnavailable) or is_resource_error(ex):
+        return False
+    if isinstance(ex, (ConnectionError, TimeoutError)):
+        return True
+    status = get_http_status(ex)
+    if status is not None:
+        return status in OUTAGE_HTTP_STATUSES
+    return OUTAGE_ERROR_PATTERN.search(str(ex)) is not None
+
+
+class EECircuitBreaker:
+    """Circuit breaker shared by workers through the Django cache."""
+
+    def _config(self):
+        config = dict(DEFAULT_CIRCUIT_BREAKER)
+        config.update(getattr(settings, 'EE_CIRCUIT_BREAKER', {}))
+        return config
+
+    def enabled(self) -> bool:
+        """Check whether the circuit breaker is enabled."""
+        return getattr(settings, 'EE_CIRCUIT_BREAKER_ENABLED', True)
+
+    def get_state(self) -> dict:
+        """Get open timestamp and number of recent failures."""
+        if not self.enabled():
+            return {}
+        return cache.get_many([CIRCUIT_OPEN_KEY, CIRCUIT_FAILURES_KEY])
+
+    def is_open(self, state: dict = None) -> bool:
+        """Check whether EE calls are stopped."""
+        if state is None:
+            state = self.get_state()
+        return state.get(CIRCUIT_OPEN_KEY) is not None
+
+    def check(self) -> dict:
+        """
+        Raise EEUnavailable when the circuit is open.
+
+        :return: state of the circuit breaker
+        """
+        state = self.get_state()
+        if self.is_open(state):
+            raise EEUnavailable(
+                'Earth Engine is temporarily unavailable, '
+                'please try again later.'
+            )
+        return state
+
+    def record_success(self, state: dict = None):
+        """Reset recent failures after a successful call."""
+        if state is None or state.get(CIRCUIT_FAILURES_KEY):
+            cache.delete(CIRCUIT_FAILURES_KEY)
+
+    def record_failure(self):
+        """Record outage failure, open the circuit at the threshold."""
+        if not self.enabled():
+            return
+        config = self._config()
+        if cache.add(
+            CIRCUIT_FAILURES_KEY, 1, timeout=config['failure_window_in_s']
+        ):
+            failures = 1
+        else:
+            try:
+                failures = cache.incr(CIRCUIT_FAILURES_KEY)
+            except ValueError:
+                # the key expired after add
+                failures = 1
+                cache.set(
+                    CIRCUIT_FAILURES_KEY, 1,
+                    timeout=config['failure_window_in_s']
+                )
+        if failures >= config['failure_threshold']:
+            cache.set(
+                CIRCUIT_OPEN_KEY, time.time(),
+                timeout=config['reset_timeout_in_s']
+            )
+            # half-open after the reset timeout: the next failure opens
+            # the circuit again, the next success closes it
+            cache.set(
+                CIRCUIT_FAILURES_KEY, config['failure_threshold'] - 1,
+                timeout=(
+                    config['reset_timeout_in_s'] +
+                    config['failure_window_in_s']
+                )
+            )
+            logger.error(
+                f'EE circuit is opened after {failures} failures, '
+                f'EE calls are stopped for '
+                f'{config["reset_timeout_in_s"]}s'
+            )
+
+
+circuit_breaker = EECircuitBreaker()
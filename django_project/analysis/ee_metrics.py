@@ -0,0 +1,334 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Instrumentation of Earth Engine calls.
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import sys
+import time
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = 'ee-metrics'
+
+# Upper bounds of duration histogram in seconds
+DURATION_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+
+# Modules skipped when looking for the function that calls EE
+INTERNAL_MODULES = ['analysis.ee_calls', 'analysis.ee_metrics']
+
+UNKNOWN = 'unknown'
+
+# Number of list items serialized to estimate the payload size
+PAYLOAD_SAMPLE_SIZE = 10
+
+# EE calls made while processing the current request
+_request_calls = contextvars.ContextVar('ee_request_calls', default=None)
+_analysis_type = contextvars.ContextVar('ee_analysis_type', default=None)
+
+
+class EECallRecord:
+    """Record of an Earth Engine call."""
+
+    def __init__(
+        self, call_type: str, caller: str, analysis_type: str,
+        duration: float, payload_size: int, status: str
+    ):
+        """Initialize EE call record."""
+        self.call_type = call_type
+        self.caller = caller
+        self.analysis_type = analysis_type
+        self.duration = duration
+        self.payload_size = payload_size
+        self.status = status
+
+    def to_dict(self):
+        """Get record as dictionary."""
+        return {
+            'call_type': self.call_type,
+            'caller': self.caller,
+            'analysis_type': self.analysis_type,
+            'duration': round(self.duration, 4),
+            'payload_size': self.payload_size,
+            'status': self.status
+        }
+
+
+def is_enabled() -> bool:
+    """Check whether EE metrics is enabled."""
+    return getattr(settings, 'EE_METRICS_ENABLED', False)
+
+
+@contextlib.contextmanager
+def collect_request_calls():
+    """Collect EE calls made in the block, e.g. in one request."""
+    calls = []
+    token = _request_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _request_calls.reset(token)
+
+
+@contextlib.contextmanager
+def analysis_type(name: str):
+    """Label EE calls in the block with the analysis type."""
+    token = _analysis_type.set(name)
+    try:
+        yield
+    finally:
+        _analysis_type.reset(token)
+
+
+def track_analysis_type(get_name):
+    """
+    Label EE calls of decorated function with the analysis type.
+
+    :param get_name: function that returns the analysis type
+        from arguments of decorated function
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with analysis_type(get_name(*args, **kwargs)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_caller() -> str:
+    """Get the first function outside EE call wrappers."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module not in INTERNAL_MODULES:
+            return f'{module}.{frame.f_code.co_name}'
+        frame = frame.f_back
+    return UNKNOWN
+
+
+def _estimate_size(value) -> int:
+    """Estimate JSON size of value, sampling items of long lists."""
+    if isinstance(value, dict):
+        return 2 * len(value) + sum(
+            len(json.dumps(str(key))) + 2 + _estimate_size(item)
+            for key, item in value.items()
+        ) or 2
+    if isinstance(value, (list, tuple)):
+        count = len(value)
+        if count <= PAYLOAD_SAMPLE_SIZE:
+            items = sum(_estimate_size(item) for item in value)
+        else:
+            step = count / PAYLOAD_SAMPLE_SIZE
+            sample = sum(
+                _estimate_size(value[int(i * step)])
+                for i in range(PAYLOAD_SAMPLE_SIZE)
+            )
+            items = round(sample * count / PAYLOAD_SAMPLE_SIZE)
+        return items + 2 * count or 2
+    return len(json.dumps(value))
+
+
+def get_payload_size(result) -> int:
+    """
+    Get size of EE response in bytes.
+
+    The size is exact for small responses and estimated from a sample
+    of the items of long lists (e.g. features or coordinates), so the
+    cost does not grow with the response.
+    """
+    if not isinstance(result, (dict, list)):
+        return 0
+    try:
+        return _estimate_size(result)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _labels(record: EECallRecord) -> str:
+    return json.dumps([
+        record.call_type, record.caller, record.analysis_type
+    ])
+
+
+def _store(record: EECallRecord):
+    """Aggregate record in redis for the metrics endpoint."""
+    from analysis.ee_calls import get_redis_client
+
+    labels = _labels(record)
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.hincrby(METRICS_KEY, f'count|{labels}', 1)
+        pipe.hincrbyfloat(METRICS_KEY, f'sum|{labels}', record.duration)
+        pipe.hincrby(
+            METRICS_KEY, f'payload|{labels}', record.payload_size
+        )
+        if record.status != 'success':
+            pipe.hincrby(METRICS_KEY, f'error|{labels}', 1)
+        for bucket in DURATION_BUCKETS:
+            if record.duration <= bucket:
+                pipe.hincrby(METRICS_KEY, f'bucket|{labels}|{bucket}', 1)
+        pipe.execute()
+    except Exception as ex:
+        logger.debug(f'Failed to store EE metrics: {ex}')
+
+
+def record_call(
+    call_type: str, caller: str, duration: float,
+    payload_size: int = 0, status: str = 'success'
+):
+    """Record EE call to request timing, logs and metrics."""
+    record = EECallRecord(
+        call_type, caller, _analysis_type.get() or UNKNOWN,
+        duration, payload_size, status
+    )
+    calls = _request_calls.get()
+    if calls is not None:
+        calls.append(record)
+    logger.info(json.dumps({'event': 'ee_call', **record.to_dict()}))
+    if is_enabled():
+        _store(record)
+    return record
+
+
+def server_timing(calls) -> str:
+    """Get Server-Timing header value of EE calls."""
+    totals = {}
+    for record in calls:
+        count, duration = totals.get(record.call_type, (0, 0))
+        totals[record.call_type] = (count + 1, duration + record.duration)
+    metrics = [
+        f'ee;dur={sum(r.duration for r in calls) * 1000:.1f};'
+        f'desc="{len(calls)} EE calls"'
+    ]
+    for call_type, (count, duration) in totals.items():
+        metrics.append(
+            f'ee-{call_type};dur={duration * 1000:.1f};'
+            f'desc="{count} calls"'
+        )
+    return ', '.join(metrics)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _prometheus_labels(labels: str, extra: str = '') -> str:
+    call_type, caller, analysis = json.loads(labels)
+    label_str = (
+        f'call_type="{_escape(call_type)}",caller="{_escape(caller)}",'
+        f'analysis_type="{_escape(analysis)}"'
+    )
+    if extra:
+        label_str += f',{extra}'
+    return '{' + label_str + '}'
+
+
+def render_prometheus_metrics() -> str:
+    """Render aggregated EE metrics in Prometheus text format."""
+    from analysis.ee_calls import get_redis_client
+
+    data = get_redis_client().hgetall(METRICS_KEY)
+    counts = {}
+    sums = {}
+    payloads = {}
+    errors = {}
+    buckets = {}
+    for key, value in data.items():
+        key = key.decode() if isinstance(key, bytes) else key
+        value = value.decode() if isinstance(value, bytes) else value
+        kind, labels = key.split('|', 1)
+        if kind == 'count':
+            counts[labels] = int(value)
+        elif kind == 'sum':
+            sums[labels] = float(value)
+        elif kind == 'payload':
+            payloads[labels] = int(value)
+        elif kind == 'error':
+            errors[labels] = int(value)
+        elif kind == 'bucket':
+            labels, bucket = labels.rsplit('|', 1)
+            buckets.setdefault(labels, {})[float(bucket)] = int(value)
+
+    lines = [
+        '# HELP ee_call_duration_seconds Duration of Earth Engine calls.',
+        '# TYPE ee_call_duration_seconds histogram',
+    ]
+    for labels in sorted(counts):
+        label_buckets = buckets.get(labels, {})
+        for bucket in DURATION_BUCKETS:
+            lines.append(
+                'ee_call_duration_seconds_bucket' +
+                _prometheus_labels(labels, f'le="{bucket}"') +
+                f' {label_buckets.get(float(bucket), 0)}'
+            )
+        lines.append(
+            'ee_call_duration_seconds_bucket' +
+            _prometheus_labels(labels, 'le="+Inf"') +
+            f' {counts[labels]}'
+        )
+        lines.append(
+            'ee_call_duration_seconds_sum' + _prometheus_labels(labels) +
+            f' {sums.get(labels, 0)}'
+        )
+        lines.append(
+            'ee_call_duration_seconds_count' +
+            _prometheus_labels(labels) + f' {counts[labels]}'
+        )
+    lines += [
+        '# HELP ee_call_payload_bytes_total Size of Earth Engine responses.',
+        '# TYPE ee_call_payload_bytes_total counter',
+    ]
+    for labels in sorted(payloads):
+        lines.append(
+            'ee_call_payload_bytes_total' + _prometheus_labels(labels) +
+            f' {payloads[labels]}'
+        )
+    lines += [
+        '# HELP ee_call_errors_total Number of failed Earth Engine calls.',
+        '# TYPE ee_call_errors_total counter',
+    ]
+    for labels in sorted(errors):
+        lines.append(
+            'ee_call_errors_total' + _prometheus_labels(labels) +
+            f' {errors[labels]}'
+        )
+    return '\n'.join(lines) + '\n'
+
+
+class EECallTimer:
+    """Measure EE call and record it when finished."""
+
+    def __init__(self, call_type: str):
+        """Initialize timer."""
+        self.call_type = call_type
+        self.caller = get_caller()
+        self.start = None
+
+    def __enter__(self):
+        """Start the timer."""
+        self.start = time.perf_counter()
+        return self
+
+    def finish(self, result=None, status: str = 'success'):
+        """Record the finished call."""
+        return record_call(
+            self.call_type, self.caller,
+            time.perf_counter() - self.start,
+            payload_size=get_payload_size(result),
+            status=status
+        )
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Record failed call."""
+        if exc_type is not None:
+            self.finish(status='error')
+        return False
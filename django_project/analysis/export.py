@@ -0,0 +1,358 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Streaming export of analysis results.
+
+Rows are read from the database with a server-side cursor and written
+in batches, so the export memory is bounded by the batch size. CSV and
+Parquet are streamed as they are written, GeoPackage is written to a
+temporary file first because it is an SQLite database.
+
+Columns are taken from the first batch of rows. Values of other
+properties, or values that do not fit the column type, are written to
+the extra column as JSON.
+"""
+import csv
+import itertools
+import json
+import os
+import shutil
+import tempfile
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+
+class ExportFormat:
+    """File format of the export."""
+
+    CSV = 'csv'
+    PARQUET = 'parquet'
+    GEOPACKAGE = 'gpkg'
+
+    CONTENT_TYPES = {
+        CSV: 'text/csv',
+        PARQUET: 'application/vnd.apache.parquet',
+        GEOPACKAGE: 'application/geopackage+sqlite3',
+    }
+
+    @classmethod
+    def choices(cls):
+        return list(cls.CONTENT_TYPES.keys())
+
+
+EXPORT_BATCH_SIZE = 1000
+FILE_CHUNK_SIZE = 1024 * 1024
+
+EXTRA_COLUMN = 'extra'
+INTEGER = 'int'
+FLOAT = 'float'
+STRING = 'str'
+
+
+def iter_batches(rows, batch_size: int = EXPORT_BATCH_SIZE):
+    """Group rows iterator into lists of batch_size rows."""
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _is_integer(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value) -> bool:
+    return _is_integer(value) or isinstance(value, float)
+
+
+def _value_type(value):
+    if _is_integer(value):
+        return INTEGER
+    if isinstance(value, float):
+        return FLOAT
+    return STRING
+
+
+def infer_columns(batch: list) -> dict:
+    """
+    Get columns and their types from a batch of rows.
+
+    :param batch: list of (properties, geometry)
+    :return: dictionary of column name to int, float or str
+    """
+    columns = {}
+    for properties, _ in batch:
+        for key, value in properties.items():
+            current = columns.get(key)
+            if value is None:
+                columns.setdefault(key, None)
+                continue
+            value_type = _value_type(value)
+            if current is None or current == value_type:
+                columns[key] = value_type
+            elif {current, value_type} == {INTEGER, FLOAT}:
+                columns[key] = FLOAT
+            else:
+                columns[key] = STRING
+    return {
+        key: column_type or STRING for key, column_type in columns.items()
+    }
+
+
+def _to_string(value):
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, default=str)
+
+
+def fit_row(properties: dict, columns: dict) -> dict:
+    """Fit properties to the columns, the rest goes to extra column."""
+    row = {key: None for key in columns}
+    extra = {}
+    for key, value in properties.items():
+        column_type = columns.get(key)
+        if value is None:
+            continue
+        if column_type == INTEGER and _is_integer(value):
+            row[key] = value
+        elif column_type == FLOAT and _is_number(value):
+            row[key] = float(value)
+        elif column_type == STRING:
+            row[key] = _to_string(value)
+        else:
+            extra[key] = value
+    row[EXTRA_COLUMN] = json.dumps(extra, default=str) if extra else None
+    return row
+
+
+def _first_batch(rows, batch_size):
+    batches = iter_batches(rows, batch_size)
+    first = next(batches, [])
+    return first, itertools.chain([first], batches)
+
+
+class _Echo:
+    """File-like object that returns the written value."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Stream rows as CSV.
+
+    :param rows: iterator of (properties, geometry)
+    :return: generator of CSV text chunks
+    """
+    writer = csv.writer(_Echo())
+    first, batches = _first_batch(rows, batch_size)
+    columns = infer_columns(first)
+    yield writer.writerow(list(columns) + [EXTRA_COLUMN])
+    for batch in batches:
+        yield ''.join(
+            writer.writerow(list(fit_row(properties, columns).values()))
+            for properties, _ in batch
+        )
+
+
+class _ChunkSink:
+    """Writable file-like object that collects the written chunks."""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def writable(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+    def pop(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_parquet(rows, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Stream rows as Parquet, a row group per batch.
+
+    :param rows: iterator of (properties, geometry)
+    :return: generator of Parquet bytes chunks
+    """
+    first, batches = _first_batch(rows, batch_size)
+    columns = infer_columns(first)
+    types = {
+        INTEGER: pyarrow.int64(),
+        FLOAT: pyarrow.float64(),
+        STRING: pyarrow.string()
+    }
+    schema = pyarrow.schema(
+        [
+            (key, types[column_type])
+            for key, column_type in columns.items()
+        ] + [(EXTRA_COLUMN, pyarrow.string())]
+    )
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    for batch in batches:
+        writer.write_table(
+            pyarrow.Table.from_pylist(
+                [fit_row(properties, columns) for properties, _ in batch],
+                schema=schema
+            )
+        )
+        yield sink.pop()
+    writer.close()
+    yield sink.pop()
+
+
+def stream_geopackage(
+    rows, batch_size: int = EXPORT_BATCH_SIZE, layer: str = 'export'
+):
+    """
+    Write rows to GeoPackage in batches and stream the file.
+
+    :param rows: iterator of (properties, geometry)
+    :return: generator of GeoPackage bytes chunks
+    """
+    import fiona
+    from fiona.model import Feature
+
+    tmp_dir = tempfile.mkdtemp(prefix='arw-export-')
+    try:
+        path = os.path.join(tmp_dir, f'{layer}.gpkg')
+        first, batches = _first_batch(rows, batch_size)
+        columns = infer_columns(first)
+        schema = {
+            'geometry': 'Unknown',
+            'properties': {
+                key: column_type for key, column_type in columns.items()
+            }
+        }
+        schema['properties'][EXTRA_COLUMN] = STRING
+        with fiona.open(
+            path, 'w', driver='GPKG', schema=schema, crs='EPSG:4326',
+            layer=layer
+        ) as dst:
+            for batch in batches:
+                dst.writerecords([
+                    Feature.from_dict(
+                        geometry=geometry,
+                        properties=fit_row(properties, columns)
+                    ) for properties, geometry in batch
+                ])
+
+        with open(path, 'rb') as file:
+            while chunk := file.read(FILE_CHUNK_SIZE):
+                yield chunk
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def stream_rows(rows, file_format: str, layer: str = 'export'):
+    """Stream rows in the file format."""
+    if file_format == ExportFormat.CSV:
+        return stream_csv(rows)
+    if file_format == ExportFormat.PARQUET:
+        if pyarrow is None:
+            raise ValueError('Parquet export requires pyarrow.')
+        return stream_parquet(rows)
+    if file_format == ExportFormat.GEOPACKAGE:
+        return stream_geopackage(rows, layer=layer)
+    raise ValueError(
+        f'Invalid export format {file_format}, '
+        f'must be one of {", ".join(ExportFormat.choices())}'
+    )
+
+
+def _iter_result_series(results):
+    if isinstance(results, dict) and 'features' in results:
+        yield '', results
+    elif isinstance(results, (list, tuple)):
+        for idx, result in enumerate(results):
+            if isinstance(result, dict) and 'features' in result:
+                yield str(idx), result
+
+
+def iter_analysis_result_rows(queryset, chunk_size: int = 100):
+    """
+    Get feature rows of saved analysis results.
+
+    :param queryset: UserAnalysisResults queryset
+    :return: iterator of (properties, geometry)
+    """
+    for analysis in queryset.iterator(chunk_size=chunk_size):
+        analysis_results = analysis.analysis_results
+        if not isinstance(analysis_results, dict):
+            continue
+        data = analysis_results.get('data')
+        if not isinstance(data, dict):
+            data = {}
+        for series, result in _iter_result_series(
+            analysis_results.get('results')
+        ):
+            for feature in result.get('features', []):
+                properties = {
+                    'analysis_id': analysis.id,
+                    'analysis_type': data.get('analysisType'),
+                    'created_at': analysis.created_at.isoformat(),
+                    'series': series,
+                    'feature_id': feature.get('id'),
+                }
+                properties.update(feature.get('properties') or {})
+                yield properties, feature.get('geometry')
+
+
+def iter_temporal_statistic_rows(
+    queryset, include_geometry=False, chunk_size: int = 2000
+):
+    """
+    Get rows of per-community time series.
+
+    :param queryset: TemporalStatistic queryset
+    :return: iterator of (properties, geometry)
+    """
+    queryset = queryset.select_related('community')
+    if not include_geometry:
+        queryset = queryset.defer('community__geometry')
+    for row in queryset.order_by('name', 'year', 'month').iterator(
+        chunk_size=chunk_size
+    ):
+        properties = {
+            'community_id': (
+                row.community.community_id if row.community else None
+            ),
+            'name': row.name,
+            'year': row.year,
+            'month': row.month,
+            'ndvi': row.ndvi,
+            'evi': row.evi,
+            'bare_ground': row.bare_ground,
+        }
+        geometry = None
+        if include_geometry and row.community and row.community.geometry:
+            geometry = json.loads(row.community.geometry.geojson)
+        yield properties, geometry
@@ -0,0 +1,66 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Build FeatureCollection dictionaries locally.
+
+The dictionaries follow the format of EE FeatureCollection getInfo,
+including the 'columns' key that is used by the frontend.
+"""
+
+
+def get_column_type(value) -> str:
+    """Get EE column type of a property value."""
+    if isinstance(value, bool):
+        return 'Boolean'
+    if isinstance(value, int):
+        return 'Long'
+    if isinstance(value, float):
+        return 'Float'
+    if isinstance(value, str):
+        return 'String'
+    return 'Object'
+
+
+def get_columns(features: list) -> dict:
+    """Get EE columns of the features' properties."""
+    columns = {}
+    for feature in features:
+        for key, value in feature.get('properties', {}).items():
+            if value is None:
+                continue
+            column_type = get_column_type(value)
+            if columns.get(key, column_type) != column_type:
+                # mixed int and float values
+                column_type = 'Float' if {
+                    columns[key], column_type
+                } == {'Long', 'Float'} else 'Object'
+            columns[key] = column_type
+    columns['system:index'] = 'String'
+    return columns
+
+
+def build_feature_collection(features: list) -> dict:
+    """Build FeatureCollection dictionary of the features."""
+    return {
+        'type': 'FeatureCollection',
+        'columns': get_columns(features),
+        'features': features
+    }
+
+
+def sort_features(features: list, *keys) -> list:
+    """
+    Sort features by properties like sorting EE collection by the keys.
+
+    Like chained EE sort calls, the last key is the primary sort key.
+    """
+    for key in keys:
+        features = sorted(
+            features,
+            key=lambda feature: (
+                feature['properties'].get(key) is None,
+                feature['properties'].get(key)
+            )
+        )
+    return features
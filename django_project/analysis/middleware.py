@@ -0,0 +1,23 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Middleware for Earth Engine call instrumentation.
+"""
+from analysis.ee_metrics import collect_request_calls, server_timing
+
+
+class EECallTimingMiddleware:
+    """Add timing of EE calls in the request to Server-Timing header."""
+
+    def __init__(self, get_response):
+        """Initialize middleware."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Collect EE calls made while processing the request."""
+        with collect_request_calls() as calls:
+            response = self.get_response(request)
+        if calls:
+            response['Server-Timing'] = server_timing(calls)
+        return response
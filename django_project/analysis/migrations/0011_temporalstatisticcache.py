@@ -0,0 +1,28 @@
+# Generated by Django 4.2.19 on 2026-10-19 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0010_analysisrasteroutput_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TemporalStatisticCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area_key', models.CharField(help_text='Community name or hash of the custom geometry, e.g. community:Name or geom:sha256.', max_length=255)),
+                ('resolution', models.CharField(help_text='Temporal resolution, e.g. Monthly.', max_length=50)),
+                ('year', models.IntegerField()),
+                ('period', models.IntegerField(help_text='Month or quarter of the year.')),
+                ('feature', models.JSONField(blank=True, help_text='Statistic feature, empty when there is no data.', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('area_key', 'resolution', 'year', 'period')},
+            },
+        ),
+    ]
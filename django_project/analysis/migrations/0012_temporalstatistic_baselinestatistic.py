@@ -0,0 +1,45 @@
+# Generated by Django 4.2.19 on 2026-10-19 09:00
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0011_temporalstatisticcache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TemporalStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(db_index=True, help_text='Source of the GEE asset that the row is synced from.', max_length=512)),
+                ('feature_id', models.CharField(max_length=255)),
+                ('name', models.CharField(max_length=256)),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('ndvi', models.FloatField(blank=True, null=True)),
+                ('evi', models.FloatField(blank=True, null=True)),
+                ('bare_ground', models.FloatField(blank=True, null=True)),
+                ('community', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='analysis.landscapecommunity')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', 'year', 'month'], name='temporal_stat_name_period_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BaselineStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(db_index=True, help_text='Source of the GEE asset that the row is synced from.', max_length=512)),
+                ('feature_id', models.CharField(max_length=255)),
+                ('name', models.CharField(blank=True, max_length=256, null=True)),
+                ('properties', models.JSONField(default=dict)),
+                ('geometry', django.contrib.gis.db.models.fields.GeometryField(blank=True, null=True, srid=4326)),
+                ('community', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='analysis.landscapecommunity')),
+            ],
+        ),
+    ]
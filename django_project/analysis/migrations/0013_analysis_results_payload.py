@@ -0,0 +1,23 @@
+# Generated by Django 4.2.19 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0012_temporalstatistic_baselinestatistic'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisresultscache',
+            name='analysis_results_payload',
+            field=models.BinaryField(blank=True, editable=False, help_text='Compressed analysis results.', null=True),
+        ),
+        migrations.AddField(
+            model_name='useranalysisresults',
+            name='analysis_results_payload',
+            field=models.BinaryField(blank=True, editable=False, help_text='Compressed analysis results.', null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.19 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0013_analysis_results_payload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisresultscache',
+            name='hit_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of times the cache is used.'),
+        ),
+        migrations.AddField(
+            model_name='analysisresultscache',
+            name='last_accessed_at',
+            field=models.DateTimeField(blank=True, help_text='Last time the cache is used.', null=True),
+        ),
+        migrations.AddField(
+            model_name='analysisresultscache',
+            name='size',
+            field=models.PositiveBigIntegerField(default=0, help_text='Stored size of the results in bytes.'),
+        ),
+    ]
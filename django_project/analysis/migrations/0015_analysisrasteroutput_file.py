@@ -0,0 +1,18 @@
+# Generated by Django 4.2.19 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0014_analysisresultscache_hits'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisrasteroutput',
+            name='file',
+            field=models.FileField(blank=True, help_text='Raster downloaded directly from GEE, empty when the raster is exported to Google Drive.', null=True, upload_to='raster_outputs/'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.19 on 2026-10-19 13:00
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def get_fingerprint(analysis):
+    return hashlib.sha256(
+        json.dumps(
+            analysis, sort_keys=True, separators=(',', ':'), default=str
+        ).encode('utf-8')
+    ).hexdigest()
+
+
+def set_fingerprint(apps, schema_editor):
+    """
+    Set fingerprint of existing raster outputs.
+
+    For duplicated analysis, the completed and most recent output gets
+    the fingerprint, the others are kept without it.
+    """
+    AnalysisRasterOutput = apps.get_model('analysis', 'AnalysisRasterOutput')
+    outputs = {}
+    for output in AnalysisRasterOutput.objects.only(
+        'uuid', 'analysis', 'status', 'generate_start_time'
+    ).iterator():
+        fingerprint = get_fingerprint(output.analysis)
+        current = outputs.get(fingerprint)
+        if current is None or _rank(output) > _rank(current):
+            outputs[fingerprint] = output
+    for fingerprint, output in outputs.items():
+        AnalysisRasterOutput.objects.filter(uuid=output.uuid).update(
+            fingerprint=fingerprint
+        )
+
+
+def _rank(output):
+    return (
+        output.status == 'COMPLETED',
+        output.generate_start_time is not None,
+        output.generate_start_time.timestamp()
+        if output.generate_start_time else 0
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0015_analysisrasteroutput_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisrasteroutput',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 of the canonical analysis JSON.', max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(set_fingerprint, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.19 on 2026-10-19 14:00
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+# (field, tolerance in degrees) of LandscapeCommunity.SIMPLIFIED_GEOMETRIES
+SIMPLIFIED_GEOMETRIES = (
+    ('geometry_low', 0.0025),
+    ('geometry_medium', 0.0002),
+)
+
+
+def simplify_sql(field, tolerance):
+    return (
+        f'UPDATE analysis_landscape_community SET {field} = '
+        f'ST_SimplifyPreserveTopology(geometry, {tolerance})'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0016_analysisrasteroutput_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='landscapecommunity',
+            name='geometry_low',
+            field=django.contrib.gis.db.models.fields.GeometryField(blank=True, editable=False, help_text='Simplified geometry for zoom 0 to 5.', null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='landscapecommunity',
+            name='geometry_medium',
+            field=django.contrib.gis.db.models.fields.GeometryField(blank=True, editable=False, help_text='Simplified geometry for zoom 6 to 9.', null=True, srid=4326),
+        ),
+    ] + [
+        migrations.RunSQL(
+            simplify_sql(field, tolerance), migrations.RunSQL.noop
+        )
+        for field, tolerance in SIMPLIFIED_GEOMETRIES
+    ]
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import uuid
 
@@ -8,10 +9,16 @@ from django.utils import timezone
 from django.contrib.auth.models import User
 from django.contrib.gis.db import models
 from django.contrib.gis.geos import GEOSGeometry
-from django.db.models.signals import pre_delete
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
 from django.dispatch import receiver
 
 from alerts.models import Indicator
+from analysis.compression import CompressedAnalysisResultsMixin
 
 
 class InterventionArea(models.Model):
@@ -197,9 +204,20 @@ class Landscape(models.Model):
     class Meta:  # noqa: D106
         ordering = ('name',)
 
-    def fetch_areas(self):
-        """Fetch area from ee."""
+    # Number of communities fetched and upserted at a time
+    COMMUNITY_PAGE_SIZE = 200
+
+    def fetch_areas(self) -> int:
+        """Fetch area from ee.
+
+        Communities are fetched page by page and upserted in bulk, so
+        existing communities get the new name and geometry.
+
+        :return: number of fetched communities
+        """
         from analysis.analysis import initialize_engine_analysis
+        from analysis.community_tiles import refresh_community_tiles
+        from analysis.paged_fetch import iter_collection_pages
 
         # initialize engine
         initialize_engine_analysis()
@@ -211,17 +229,37 @@ class Landscape(models.Model):
         communities = communities.filter(
             ee.Filter.eq('Project', self.project_name)
         )
-        communities = communities.getInfo()['features']
-        for community in communities:
-            geometry = GEOSGeometry(json.dumps(community['geometry']))
-            LandscapeCommunity.objects.get_or_create(
-                landscape=self,
-                community_id=community['id'],
-                defaults={
-                    "community_name": community['properties']['Name'],
-                    "geometry": geometry
-                }
+        update_fields = ['landscape', 'community_name', 'geometry'] + [
+            field for _, field, _ in LandscapeCommunity.SIMPLIFIED_GEOMETRIES
+        ]
+        total = 0
+        for features in iter_collection_pages(
+            communities, self.COMMUNITY_PAGE_SIZE
+        ):
+            # a row can only be upserted once in a statement
+            rows = {}
+            for community in features:
+                row = LandscapeCommunity(
+                    landscape=self,
+                    community_id=community['id'],
+                    community_name=community['properties']['Name'],
+                    geometry=GEOSGeometry(json.dumps(community['geometry']))
+                )
+                # bulk_create does not call save
+                row.update_simplified_geometries()
+                rows[row.community_id] = row
+            LandscapeCommunity.objects.bulk_create(
+                rows.values(),
+                update_conflicts=True,
+                unique_fields=['community_id'],
+                update_fields=update_fields
             )
+            total += len(rows)
+
+        # bulk_create does not send post_save
+        if total:
+            transaction.on_commit(refresh_community_tiles)
+        return total
 
 
 class LandscapeCommunity(models.Model):
@@ -248,6 +286,21 @@ class LandscapeCommunity(models.Model):
     geometry = models.GeometryField(
         srid=4326, help_text="Geometry of community."
     )
+    geometry_low = models.GeometryField(
+        srid=4326, null=True, blank=True, editable=False,
+        help_text="Simplified geometry for zoom 0 to 5."
+    )
+    geometry_medium = models.GeometryField(
+        srid=4326, null=True, blank=True, editable=False,
+        help_text="Simplified geometry for zoom 6 to 9."
+    )
+
+    # (max zoom, field, tolerance in degrees) of simplified geometries,
+    # the tolerance is about a tile pixel at the max zoom
+    SIMPLIFIED_GEOMETRIES = (
+        (5, 'geometry_low', 0.0025),
+        (9, 'geometry_medium', 0.0002),
+    )
 
     class Meta:
         verbose_name_plural = "Landscape Communities"
@@ -257,6 +310,54 @@ class LandscapeCommunity(models.Model):
         """Return string representation of LandscapeArea."""
         return self.community_name
 
+    @classmethod
+    def get_geometry_field(cls, zoom: int) -> str:
+        """Get geometry field to render tiles of the zoom."""
+        for max_zoom, field, _ in cls.SIMPLIFIED_GEOMETRIES:
+            if zoom <= max_zoom:
+                return field
+        return 'geometry'
+
+    def update_simplified_geometries(self):
+        """Simplify geometry preserving topology for each zoom band."""
+        for _, field, tolerance in self.SIMPLIFIED_GEOMETRIES:
+            simplified = None
+            if self.geometry:
+                simplified = self.geometry.simplify(
+                    tolerance, preserve_topology=True
+                )
+                if simplified.empty:
+                    simplified = self.geometry
+            setattr(self, field, simplified)
+
+    def save(self, *args, **kwargs):
+        """Keep simplified geometries in sync with the geometry."""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'geometry' in update_fields:
+            self.update_simplified_geometries()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {
+                    field for _, field, _ in self.SIMPLIFIED_GEOMETRIES
+                }
+        super().save(*args, **kwargs)
+
+
+@receiver(post_save, sender=Landscape)
+@receiver(post_delete, sender=Landscape)
+def landscape_changed(sender, instance: Landscape, *args, **kwargs):
+    """Invalidate landscapes catalog."""
+    from core.catalog_cache import LANDSCAPES, bump_catalog_version_on_commit
+    bump_catalog_version_on_commit(LANDSCAPES)
+
+
+@receiver(post_save, sender=LandscapeCommunity)
+@receiver(post_delete, sender=LandscapeCommunity)
+def landscapecommunity_changed(
+        sender, instance: LandscapeCommunity, *args, **kwargs):
+    """Refresh community tiles when the boundaries change."""
+    from analysis.community_tiles import refresh_community_tiles
+    transaction.on_commit(refresh_community_tiles)
+
 
 class AnalysisRasterOutput(models.Model):
     """Model that stores the raster output of an analysis."""
@@ -287,6 +388,23 @@ class AnalysisRasterOutput(models.Model):
     # temporalResolution, year, month, quarter,
     # communityName
     analysis = models.JSONField(default=dict)
+    fingerprint = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='SHA-256 of the canonical analysis JSON.'
+    )
+    file = models.FileField(
+        upload_to='raster_outputs/',
+        null=True,
+        blank=True,
+        help_text=(
+            'Raster downloaded directly from GEE, '
+            'empty when the raster is exported to Google Drive.'
+        )
+    )
 
     def __str__(self):
         return self.name
@@ -295,6 +413,40 @@ class AnalysisRasterOutput(models.Model):
     def raster_filename(self):
         return f'{self.uuid}.tif'
 
+    @staticmethod
+    def get_fingerprint(analysis: dict) -> str:
+        """Get SHA-256 of the analysis with sorted keys."""
+        return hashlib.sha256(
+            json.dumps(
+                analysis, sort_keys=True, separators=(',', ':'), default=str
+            ).encode('utf-8')
+        ).hexdigest()
+
+    @classmethod
+    def get_or_create_from_analysis(cls, analysis: dict):
+        """
+        Get raster output of the analysis or create a pending one.
+
+        The unique fingerprint makes concurrent calls of the same
+        analysis return the same row, only one of them creates it.
+
+        :return: tuple of (AnalysisRasterOutput, created)
+        """
+        return cls.objects.get_or_create(
+            fingerprint=cls.get_fingerprint(analysis),
+            defaults={
+                'name': cls.generate_name(analysis),
+                'status': 'PENDING',
+                'analysis': analysis
+            }
+        )
+
+    def save(self, *args, **kwargs):
+        """Set fingerprint of the new raster output."""
+        if self._state.adding and self.fingerprint is None:
+            self.fingerprint = self.get_fingerprint(self.analysis)
+        super().save(*args, **kwargs)
+
     @staticmethod
     def generate_name(analysis):
         analysis_type = analysis.get('analysisType').lower()
@@ -360,7 +512,10 @@ def analysisrasteroutput_pre_delete(
     delete_gdrive_file(f'{str(instance.uuid)}.tiff')
 
 
-class UserAnalysisResults(models.Model):
+class UserAnalysisResults(CompressedAnalysisResultsMixin):
+    # analysis inputs are kept for filtering e.g. by landscape
+    SUMMARY_KEYS = ('data',)
+
     created_by = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -512,7 +667,7 @@ class GEEAsset(models.Model):
         db_table = 'analysis_gee_asset'
 
 
-class AnalysisResultsCache(models.Model):
+class AnalysisResultsCache(CompressedAnalysisResultsMixin):
     analysis_results = models.JSONField(
         null=True,
         blank=True
@@ -523,16 +678,192 @@ class AnalysisResultsCache(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     expired_at = models.DateTimeField(null=True, blank=True)
+    hit_count = models.PositiveIntegerField(
+        default=0,
+        help_text='Number of times the cache is used.'
+    )
+    last_accessed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='Last time the cache is used.'
+    )
+    size = models.PositiveBigIntegerField(
+        default=0,
+        help_text='Stored size of the results in bytes.'
+    )
+
+    EVICTION_BATCH_SIZE = 500
 
     @classmethod
     def save_cache_with_ttl(cls, ttl, **kwargs):
         """Save AnalysisResultsCache with ttl."""
-        obj = AnalysisResultsCache.objects.create(**kwargs)
         if ttl is None:
             # default to 1 hour
             ttl = 1
-        obj.expired_at = obj.created_at + timezone.timedelta(
-            hours=ttl
+        # single insert, the payload is not written twice
+        return AnalysisResultsCache.objects.create(
+            expired_at=timezone.now() + timezone.timedelta(hours=ttl),
+            **kwargs
         )
-        obj.save()
-        return obj
+
+    def record_hit(self, ttl=None, max_age=None):
+        """
+        Record usage of the cache.
+
+        The expiry is extended by ttl hours from now, up to max_age hours
+        after the cache is created, so frequently used cache stays warm.
+        """
+        now = timezone.now()
+        fields = {
+            'hit_count': F('hit_count') + 1,
+            'last_accessed_at': now
+        }
+        if ttl and max_age:
+            expired_at = min(
+                now + timezone.timedelta(hours=ttl),
+                self.created_at + timezone.timedelta(hours=max_age)
+            )
+            if self.expired_at is None or expired_at > self.expired_at:
+                fields['expired_at'] = expired_at
+        AnalysisResultsCache.objects.filter(pk=self.pk).update(**fields)
+
+    @classmethod
+    def eviction_order(cls, policy):
+        """Get ordering of the cache to evict first."""
+        from core.models import CacheEvictionPolicy
+        last_used = Coalesce('last_accessed_at', 'created_at')
+        if policy == CacheEvictionPolicy.LFU:
+            return ('hit_count', last_used, 'id')
+        return (last_used, 'id')
+
+    @classmethod
+    def evict(cls, max_size, policy, batch_size=EVICTION_BATCH_SIZE):
+        """
+        Evict cache until the total size is within max_size.
+
+        :param max_size: maximum total size in bytes
+        :param policy: CacheEvictionPolicy of the cache to evict first
+        :param batch_size: number of rows deleted in a query
+        :return: number of evicted cache
+        """
+        total = cls.objects.aggregate(total=Sum('size'))['total'] or 0
+        excess = total - max_size
+        if excess <= 0:
+            return 0
+
+        ids = []
+        freed = 0
+        rows = cls.objects.order_by(
+            *cls.eviction_order(policy)
+        ).values_list('id', 'size')
+        for pk, size in rows.iterator(chunk_size=batch_size):
+            ids.append(pk)
+            freed += size
+            if freed >= excess:
+                break
+
+        for idx in range(0, len(ids), batch_size):
+            cls.objects.filter(id__in=ids[idx:idx + batch_size]).delete()
+        return len(ids)
+
+
+@receiver(pre_save, sender=AnalysisResultsCache)
+def analysisresultscache_pre_save(
+        sender, instance: AnalysisResultsCache, *args, **kwargs):
+    """Set stored size of the results."""
+    if instance.analysis_results_payload:
+        instance.size = len(instance.analysis_results_payload)
+    else:
+        instance.size = len(json.dumps(instance.analysis_results))
+
+
+class TemporalStatisticCache(models.Model):
+    """Statistic row of temporal analysis for a single period.
+
+    Temporal analyses compute only the periods that are not cached
+    yet and assemble the rest from these rows.
+    """
+
+    area_key = models.CharField(
+        max_length=255,
+        help_text=(
+            'Community name or hash of the custom geometry, '
+            'e.g. community:Name or geom:sha256.'
+        )
+    )
+    resolution = models.CharField(
+        max_length=50,
+        help_text='Temporal resolution, e.g. Monthly.'
+    )
+    year = models.IntegerField()
+    period = models.IntegerField(
+        help_text='Month or quarter of the year.'
+    )
+    feature = models.JSONField(
+        null=True,
+        blank=True,
+        help_text='Statistic feature, empty when there is no data.'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:  # noqa: D106
+        unique_together = ('area_key', 'resolution', 'year', 'period')
+
+
+class TemporalStatistic(models.Model):
+    """Local mirror of the temporal_table GEE asset.
+
+    Rows are synced by sync_gee_statistic_tables task and joined to
+    LandscapeCommunity by the community name.
+    """
+
+    source = models.CharField(
+        max_length=512,
+        db_index=True,
+        help_text='Source of the GEE asset that the row is synced from.'
+    )
+    feature_id = models.CharField(max_length=255)
+    community = models.ForeignKey(
+        LandscapeCommunity,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+    name = models.CharField(max_length=256)
+    year = models.IntegerField()
+    month = models.IntegerField()
+    ndvi = models.FloatField(null=True, blank=True)
+    evi = models.FloatField(null=True, blank=True)
+    bare_ground = models.FloatField(null=True, blank=True)
+
+    class Meta:  # noqa: D106
+        indexes = [
+            models.Index(
+                fields=['name', 'year', 'month'],
+                name='temporal_stat_name_period_idx'
+            ),
+        ]
+
+
+class BaselineStatistic(models.Model):
+    """Local mirror of the baseline_table GEE asset.
+
+    Rows are synced by sync_gee_statistic_tables task and joined to
+    LandscapeCommunity by the community name.
+    """
+
+    source = models.CharField(
+        max_length=512,
+        db_index=True,
+        help_text='Source of the GEE asset that the row is synced from.'
+    )
+    feature_id = models.CharField(max_length=255)
+    community = models.ForeignKey(
+        LandscapeCommunity,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+    name = models.CharField(max_length=256, null=True, blank=True)
+    properties = models.JSONField(default=dict)
+    geometry = models.GeometryField(srid=4326, null=True, blank=True)
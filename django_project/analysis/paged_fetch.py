@@ -0,0 +1,83 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Paged retrieval of EE FeatureCollection.
+
+getInfo of a FeatureCollection is capped at 5000 elements and returns
+the whole collection in one response. The collection is fetched in
+toList(count, offset) pages instead, a few pages at a time.
+"""
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import ee
+
+from analysis.ee_calls import get_info
+from analysis.feature_collection import build_feature_collection
+
+
+# Number of features in a page
+PAGE_SIZE = 1000
+
+# Maximum number of pages fetched at the same time
+MAX_PAGE_WORKERS = 4
+
+
+def iter_collection_pages(
+    collection, page_size: int = PAGE_SIZE,
+    max_workers: int = MAX_PAGE_WORKERS
+):
+    """
+    Yield pages of features of EE FeatureCollection in order.
+
+    The first page is fetched together with the collection size.
+    Remaining pages are fetched concurrently, with at most max_workers
+    pages held in memory.
+
+    :param collection: ee.FeatureCollection
+    :param page_size: number of features in a page
+    :param max_workers: number of pages fetched at the same time
+    :return: generator of list of features
+    """
+    first = get_info(
+        ee.Dictionary({
+            'size': collection.size(),
+            'features': collection.toList(page_size)
+        })
+    )
+    yield first['features']
+
+    offsets = range(page_size, first['size'], page_size)
+    if not offsets:
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for offset in offsets:
+            pending.append(
+                executor.submit(
+                    # run in a copy of the context to keep EE call metrics
+                    contextvars.copy_context().run,
+                    get_info,
+                    collection.toList(page_size, offset)
+                )
+            )
+            if len(pending) >= max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def get_collection_info(collection, page_size: int = PAGE_SIZE) -> dict:
+    """
+    Get EE FeatureCollection as dictionary like getInfo, page by page.
+
+    :param collection: ee.FeatureCollection
+    :param page_size: number of features in a page
+    :return: FeatureCollection dictionary
+    """
+    features = []
+    for page in iter_collection_pages(collection, page_size):
+        features.extend(page)
+    return build_feature_collection(features)
@@ -0,0 +1,94 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Direct download of small raster outputs.
+
+Raster of a small AOI is downloaded synchronously from the EE download
+URL and stored locally, instead of waiting for an export to Google
+Drive in the EE batch queue. Large AOIs still use the export.
+"""
+import logging
+import tempfile
+
+import requests
+from django.contrib.gis.db.models import Extent
+from django.contrib.gis.geos import Polygon
+from django.core.files import File
+
+from analysis.adaptive_reduction import EQUAL_AREA_SRID
+from analysis.ee_calls import get_download_url
+from analysis.models import LandscapeCommunity
+
+
+logger = logging.getLogger(__name__)
+
+# EE rejects download requests over 32MB, the visualized raster has
+# 3 bands of 1 byte, so keep it well under the limit
+MAX_DIRECT_DOWNLOAD_PIXELS = 5_000_000
+
+DOWNLOAD_TIMEOUT_IN_S = 120
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def estimate_pixel_count(community_name: str, scale: float):
+    """
+    Estimate pixel count of the bounds of the community.
+
+    The estimate uses the community geometries mirrored in the database,
+    so no EE call is needed.
+
+    :param community_name: name of the community
+    :param scale: pixel resolution in meters
+    :return: number of pixels or None if the community is not found
+    """
+    extent = LandscapeCommunity.objects.filter(
+        community_name=community_name
+    ).aggregate(extent=Extent('geometry'))['extent']
+    if extent is None:
+        return None
+    bounds = Polygon.from_bbox(extent)
+    bounds.srid = 4326
+    bounds.transform(EQUAL_AREA_SRID)
+    return int(bounds.area / (scale * scale))
+
+
+def can_download_directly(community_name: str, scale: float) -> bool:
+    """Check whether the raster is small enough to download directly."""
+    pixel_count = estimate_pixel_count(community_name, scale)
+    return (
+        pixel_count is not None and
+        pixel_count <= MAX_DIRECT_DOWNLOAD_PIXELS
+    )
+
+
+def download_raster_output(raster_output, image, region, scale: float):
+    """
+    Download the image to the file of the raster output.
+
+    :param raster_output: AnalysisRasterOutput object
+    :param image: ee.Image to download
+    :param region: ee.Geometry of the image bounds
+    :param scale: pixel resolution in meters
+    :return: size of the file in bytes
+    """
+    url = get_download_url(image, {
+        'name': str(raster_output.uuid),
+        'scale': scale,
+        'region': region,
+        'format': 'GEO_TIFF'
+    })
+    with tempfile.NamedTemporaryFile(suffix='.tif') as tmp_file:
+        with requests.get(
+            url, stream=True, timeout=DOWNLOAD_TIMEOUT_IN_S
+        ) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                tmp_file.write(chunk)
+        tmp_file.flush()
+        size = tmp_file.tell()
+        tmp_file.seek(0)
+        raster_output.file.save(
+            raster_output.raster_filename, File(tmp_file), save=False
+        )
+    return size
@@ -0,0 +1,95 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Stale-while-revalidate of analysis results cache.
+
+When the analysis results cache is expired, the most recent expired
+result is served immediately and marked stale, while the analysis is
+recomputed by a background task.
+"""
+import contextlib
+import contextvars
+import hashlib
+import json
+import logging
+
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+# Lock of the revalidation task of the same inputs
+REVALIDATE_LOCK_TIMEOUT_IN_S = 15 * 60
+
+_stale_results = contextvars.ContextVar('stale_results', default=None)
+_allow_stale = contextvars.ContextVar('allow_stale', default=True)
+
+
+@contextlib.contextmanager
+def collect_stale_results():
+    """
+    Collect inputs of the stale results served in the context.
+
+    The list is shared by copies of the context, e.g. analyses running
+    in a thread pool.
+    """
+    stale_results = []
+    token = _stale_results.set(stale_results)
+    try:
+        yield stale_results
+    finally:
+        _stale_results.reset(token)
+
+
+def mark_stale(inputs: dict):
+    """Mark that a stale result is served for the inputs."""
+    stale_results = _stale_results.get()
+    if stale_results is not None:
+        stale_results.append(inputs)
+
+
+def is_stale_allowed() -> bool:
+    """Check whether stale results can be served."""
+    return _allow_stale.get()
+
+
+@contextlib.contextmanager
+def without_stale_results():
+    """Do not serve stale results in the context, e.g. revalidation."""
+    token = _allow_stale.set(False)
+    try:
+        yield
+    finally:
+        _allow_stale.reset(token)
+
+
+def revalidate_lock_key(inputs: dict) -> str:
+    """Get cache key of the revalidation lock of the inputs."""
+    digest = hashlib.sha256(
+        json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+    return f'analysis-revalidate-{digest}'
+
+
+def trigger_revalidation(inputs: dict) -> bool:
+    """
+    Trigger background recomputation of the analysis inputs.
+
+    Only one task is triggered for the same inputs until the task
+    finishes or the lock expires.
+
+    :return: True if the task is triggered
+    """
+    from analysis.tasks import revalidate_analysis_cache
+    if not cache.add(
+        revalidate_lock_key(inputs), 1, timeout=REVALIDATE_LOCK_TIMEOUT_IN_S
+    ):
+        return False
+    try:
+        revalidate_analysis_cache.delay(inputs)
+    except Exception as ex:
+        logger.error(f'Failed to trigger analysis revalidation: {ex}')
+        cache.delete(revalidate_lock_key(inputs))
+        return False
+    return True
@@ -0,0 +1,281 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Local mirror of pre-exported GEE statistic tables.
+
+The temporal_table and baseline_table assets are static exports, so
+they are synced to Postgres and the default baseline and
+annual/quarterly temporal queries are answered with SQL.
+"""
+import datetime
+import json
+import logging
+
+import ee
+from dateutil.relativedelta import relativedelta
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import transaction
+from django.db.models import Avg
+
+from analysis.feature_collection import sort_features
+from analysis.models import (
+    BaselineStatistic,
+    GEEAsset,
+    LandscapeCommunity,
+    TemporalStatistic
+)
+from analysis.paged_fetch import iter_collection_pages
+from analysis.temporal_cache import period_date_millis
+
+
+logger = logging.getLogger(__name__)
+
+TEMPORAL_TABLE_KEY = 'temporal_table'
+BASELINE_TABLE_KEY = 'baseline_table'
+TEMPORAL_PAGE_SIZE = 5000
+BASELINE_PAGE_SIZE = 500
+BULK_CREATE_BATCH_SIZE = 1000
+
+
+def _community_by_name() -> dict:
+    """
+    Get communities by name to link the statistic rows.
+
+    The tables only have the community Name, rows of names that are
+    shared by several communities are not linked to one of them.
+    """
+    communities = {}
+    duplicated = set()
+    for community in LandscapeCommunity.objects.exclude(
+        community_name__isnull=True
+    ):
+        if community.community_name in communities:
+            duplicated.add(community.community_name)
+        communities[community.community_name] = community
+    for name in duplicated:
+        del communities[name]
+    return communities
+
+
+def _to_float(value):
+    return None if value is None else float(value)
+
+
+def sync_temporal_table():
+    """Sync temporal_table asset to TemporalStatistic."""
+    source = GEEAsset.fetch_asset_source(TEMPORAL_TABLE_KEY)
+    collection = ee.FeatureCollection(source).select(
+        ['Name', 'ndvi', 'evi', 'bare', 'year', 'month']
+    ).map(lambda feature: feature.setGeometry(None))
+
+    communities = _community_by_name()
+    total = 0
+    with transaction.atomic():
+        TemporalStatistic.objects.all().delete()
+        for features in iter_collection_pages(
+            collection, TEMPORAL_PAGE_SIZE
+        ):
+            rows = []
+            for feature in features:
+                properties = feature.get('properties', {})
+                if (
+                    properties.get('year') is None or
+                    properties.get('month') is None
+                ):
+                    continue
+                rows.append(
+                    TemporalStatistic(
+                        source=source,
+                        feature_id=feature.get('id', ''),
+                        community=communities.get(properties.get('Name')),
+                        name=properties.get('Name'),
+                        year=int(properties['year']),
+                        month=int(properties['month']),
+                        ndvi=_to_float(properties.get('ndvi')),
+                        evi=_to_float(properties.get('evi')),
+                        bare_ground=_to_float(properties.get('bare'))
+                    )
+                )
+            TemporalStatistic.objects.bulk_create(
+                rows, batch_size=BULK_CREATE_BATCH_SIZE
+            )
+            total += len(rows)
+    logger.info(f'Synced {total} rows of {source}')
+    return total
+
+
+def sync_baseline_table():
+    """Sync baseline_table asset to BaselineStatistic."""
+    source = GEEAsset.fetch_asset_source(BASELINE_TABLE_KEY)
+
+    communities = _community_by_name()
+    total = 0
+    with transaction.atomic():
+        BaselineStatistic.objects.all().delete()
+        for features in iter_collection_pages(
+            ee.FeatureCollection(source), BASELINE_PAGE_SIZE
+        ):
+            rows = []
+            for feature in features:
+                properties = feature.get('properties', {})
+                geometry = feature.get('geometry')
+                rows.append(
+                    BaselineStatistic(
+                        source=source,
+                        feature_id=feature.get('id', ''),
+                        community=communities.get(properties.get('Name')),
+                        name=properties.get('Name'),
+                        properties=properties,
+                        geometry=(
+                            GEOSGeometry(json.dumps(geometry), srid=4326)
+                            if geometry else None
+                        )
+                    )
+                )
+            BaselineStatistic.objects.bulk_create(
+                rows, batch_size=BULK_CREATE_BATCH_SIZE
+            )
+            total += len(rows)
+    logger.info(f'Synced {total} rows of {source}')
+    return total
+
+
+def temporal_date_millis(year: int, month: int) -> int:
+    """Get date of temporal_table row, like InputLayer add_date."""
+    date = datetime.date(year, 1, 1) + relativedelta(months=month)
+    return period_date_millis(date.year, date.month)
+
+
+class StatisticMirror:
+    """Query the local mirror of GEE statistic tables."""
+
+    def __init__(self, aoi: GEOSGeometry):
+        """Initialize the mirror query.
+
+        :param aoi: point or custom geometry of the analysis
+        """
+        self.aoi = aoi
+
+    def _source(self, asset_key: str):
+        try:
+            return GEEAsset.fetch_asset_source(asset_key)
+        except KeyError:
+            return None
+
+    def _temporal_rows(self):
+        """
+        Get temporal rows of the communities intersecting AOI.
+
+        Rows are selected by the community Name like the EE query. When
+        any of the communities has no row, the mirror cannot answer the
+        AOI and None is returned, so EE is used instead of returning
+        partial results.
+        """
+        communities = LandscapeCommunity.objects.filter(
+            geometry__intersects=self.aoi
+        ).values_list('community_id', 'community_name')
+        names = {name for _, name in communities}
+        if not names or None in names:
+            return None
+        rows = TemporalStatistic.objects.filter(
+            source=self._source(TEMPORAL_TABLE_KEY),
+            name__in=names
+        )
+        mirrored_names = set(
+            rows.order_by().values_list('name', flat=True).distinct()
+        )
+        if mirrored_names != names:
+            return None
+        return rows
+
+    def temporal_features(self, periods: list = None):
+        """
+        Get temporal_table features of communities intersecting AOI.
+
+        :param periods: list of (year, month) to filter, all if None
+        :return: list of features sorted by Name and date,
+            or None if a community intersecting AOI has no row
+        """
+        rows = self._temporal_rows()
+        if rows is None:
+            return None
+        rows = rows.order_by('name', 'year', 'month')
+        features = []
+        for row in rows:
+            if periods is not None and (row.year, row.month) not in periods:
+                continue
+            features.append({
+                'type': 'Feature',
+                'geometry': None,
+                'id': row.feature_id,
+                'properties': {
+                    'Name': row.name,
+                    'NDVI': row.ndvi,
+                    'EVI': row.evi,
+                    'Bare ground': row.bare_ground,
+                    'year': row.year,
+                    'month': row.month,
+                    'date': temporal_date_millis(row.year, row.month)
+                }
+            })
+        return sort_features(features, 'Name', 'date')
+
+    def annual_features(self, years: list):
+        """
+        Get annual means of temporal_table for the years.
+
+        :return: list of features sorted by Name and date,
+            or None if a community intersecting AOI has no row
+        """
+        rows = self._temporal_rows()
+        if rows is None:
+            return None
+        rows = rows.filter(year__in=years).values(
+            'name', 'year'
+        ).annotate(
+            mean_ndvi=Avg('ndvi'),
+            mean_evi=Avg('evi'),
+            mean_bare_ground=Avg('bare_ground')
+        ).order_by('name', 'year')
+        features = [
+            {
+                'type': 'Feature',
+                'geometry': None,
+                'id': str(idx),
+                'properties': {
+                    'Name': row['name'],
+                    'year': row['year'],
+                    'NDVI': row['mean_ndvi'],
+                    'EVI': row['mean_evi'],
+                    'Bare ground': row['mean_bare_ground'],
+                    'date': period_date_millis(row['year'], 1)
+                }
+            } for idx, row in enumerate(rows)
+        ]
+        return sort_features(features, 'Name', 'date')
+
+    def baseline_features(self):
+        """
+        Get baseline_table features intersecting AOI.
+
+        :return: list of features or None if the mirror is not synced
+        """
+        rows = BaselineStatistic.objects.filter(
+            source=self._source(BASELINE_TABLE_KEY)
+        )
+        if not rows.exists():
+            return None
+        return [
+            {
+                'type': 'Feature',
+                'geometry': (
+                    json.loads(row.geometry.geojson) if row.geometry
+                    else None
+                ),
+                'id': row.feature_id,
+                'properties': row.properties
+            } for row in rows.filter(
+                geometry__intersects=self.aoi
+            ).order_by('id')
+        ]
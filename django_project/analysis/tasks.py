@@ -5,25 +5,37 @@ Africa Rangeland Watch (ARW).
 .. note:: Background task for analysis
 """
 from core.celery import app
+import logging
 import uuid
 import ee
 from datetime import date
 from dateutil.relativedelta import relativedelta
 
+from django.core.cache import cache
 from django.utils import timezone
 from analysis.models import (
     UserAnalysisResults,
     AnalysisResultsCache,
-    AnalysisRasterOutput
+    AnalysisRasterOutput,
+    Landscape
 )
 from analysis.analysis import (
     export_image_to_drive,
     initialize_engine_analysis, InputLayer,
-    get_rel_diff, calculate_temporal_to_img
+    get_rel_diff, calculate_temporal_to_img, run_analysis
 )
+from analysis.ee_calls import get_info
+from analysis.raster_download import (
+    can_download_directly,
+    download_raster_output
+)
+from analysis.stale_results import revalidate_lock_key, without_stale_results
 from analysis.utils import get_gdrive_file, delete_gdrive_file
+from core.models import Preferences
 from layers.models import InputLayer as InputLayerFixture
 
+logger = logging.getLogger(__name__)
+
 
 def _run_spatial_analysis(data):
     """Run spatial analysis to get difference of relative layer."""
@@ -66,9 +78,9 @@ def _get_bounds(data):
         ee.FeatureCollection([ee.Feature(geo)])
     )
     return (
-        communities.filterBounds(
-            selected_geos
-        ).getInfo()['features'][0]['geometry']
+        get_info(
+            communities.filterBounds(selected_geos)
+        )['features'][0]['geometry']
     )
 
 
@@ -109,8 +121,10 @@ def store_spatial_analysis_raster_output(analysis_result_id: int):
 def generate_temporal_analysis_raster_output(raster_output_id):
     """Trigger task to generate temporal analysis raster output."""
     raster_output = AnalysisRasterOutput.objects.get(uuid=raster_output_id)
-    # clear existing raster if exist in gdrive
+    # clear existing raster if exist in gdrive or local storage
     delete_gdrive_file(raster_output.raster_filename)
+    if raster_output.file:
+        raster_output.file.delete(save=False)
     temporal_resolution = raster_output.analysis.get('temporalResolution')
     raster_output.status = 'RUNNING'
     raster_output.generate_start_time = timezone.now()
@@ -183,14 +197,43 @@ def generate_temporal_analysis_raster_output(raster_output_id):
             )
         ).first()
 
+    scale = 120  # same with temporal calc result
+    vis_params = input_layer_fixture.get_vis_params()
+    region = aoi.geometry().bounds()
+    if can_download_directly(
+        raster_output.analysis.get('communityName'), scale
+    ):
+        try:
+            size = download_raster_output(
+                raster_output,
+                img.visualize(**vis_params) if vis_params else img,
+                region,
+                scale
+            )
+        except Exception as ex:
+            logger.warning(
+                f'Direct download of {raster_output.uuid} failed, '
+                f'fallback to export: {ex}'
+            )
+        else:
+            raster_output.status = 'COMPLETED'
+            raster_output.size = size
+            raster_output.generate_end_time = timezone.now()
+            raster_output.status_logs = {
+                'state': 'COMPLETED',
+                'method': 'direct_download'
+            }
+            raster_output.save()
+            return
+
     status = export_image_to_drive(
         image=img,
         description=raster_output.name,
         folder='GEE_EXPORTS',
         file_name_prefix=str(raster_output.uuid),
-        scale=120,  # same with temporal calc result
-        region=aoi.geometry().bounds(),
-        vis_params=input_layer_fixture.get_vis_params()
+        scale=scale,
+        region=region,
+        vis_params=vis_params
     )
 
     final_status = status['state']
@@ -217,6 +260,65 @@ def generate_temporal_analysis_raster_output(raster_output_id):
 @app.task(name='clear_analysis_results_cache', ignore_result=True)
 def clear_analysis_results_cache():
     """Trigger task to generate layers using GEE."""
+    preferences = Preferences.load()
+    # expired cache is kept to be served as stale result
+    expired_at = timezone.now() - timezone.timedelta(
+        hours=preferences.result_cache_stale_ttl or 0
+    )
     AnalysisResultsCache.objects.filter(
-        expired_at__lt=timezone.now()
+        expired_at__lt=expired_at
     ).delete()
+
+    # keep the cache within the maximum size
+    if preferences.result_cache_max_size is not None:
+        evicted = AnalysisResultsCache.evict(
+            preferences.result_cache_max_size * 1024 * 1024,
+            preferences.result_cache_eviction_policy
+        )
+        if evicted:
+            logger.info(f'Evicted {evicted} analysis results cache')
+
+
+@app.task(name='revalidate_analysis_cache', ignore_result=True)
+def revalidate_analysis_cache(inputs):
+    """Recompute analysis of the expired analysis results cache."""
+    try:
+        initialize_engine_analysis()
+        with without_stale_results():
+            run_analysis(
+                inputs['lat'],
+                inputs['lon'],
+                inputs['analysis_dict'],
+                *inputs.get('args', []),
+                **inputs.get('kwargs', {})
+            )
+    finally:
+        cache.delete(revalidate_lock_key(inputs))
+
+
+@app.task(name='sync_gee_statistic_tables', ignore_result=True)
+def sync_gee_statistic_tables():
+    """Trigger task to mirror temporal and baseline tables from GEE."""
+    from analysis.statistic_mirror import (
+        sync_temporal_table,
+        sync_baseline_table
+    )
+    initialize_engine_analysis()
+    sync_temporal_table()
+    sync_baseline_table()
+
+
+@app.task(name='generate_community_pmtiles', ignore_result=True)
+def generate_community_pmtiles():
+    """Build PMTiles of landscape community boundaries."""
+    from analysis.community_tiles import build_community_pmtiles
+    name = build_community_pmtiles()
+    logger.info(f'Community PMTiles: {name}')
+
+
+@app.task(name='fetch_landscape_areas', ignore_result=True)
+def fetch_landscape_areas(landscape_id: int):
+    """Fetch communities of a landscape from GEE."""
+    landscape = Landscape.objects.get(id=landscape_id)
+    total = landscape.fetch_areas()
+    logger.info(f'Fetched {total} communities of {landscape.name}')
@@ -0,0 +1,172 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Per-period cache of temporal analysis statistics.
+"""
+import datetime
+import hashlib
+import json
+
+from django.contrib.gis.geos import Point
+
+from analysis.models import LandscapeCommunity, TemporalStatisticCache
+
+
+def community_area_key(name: str) -> str:
+    """Get area key of a community."""
+    return f'community:{name}'
+
+
+def geometry_area_key(geom: dict) -> str:
+    """Get area key of a custom geometry."""
+    geom_hash = hashlib.sha256(
+        json.dumps(geom, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+    return f'geom:{geom_hash}'
+
+
+def scaled_area_key(area_key: str, scale_factor: int) -> str:
+    """Get area key of rows computed with the scale factor."""
+    if scale_factor == 1:
+        return area_key
+    return f'{area_key}@x{scale_factor}'
+
+
+def get_community_area_keys(lat: float, lon: float) -> list:
+    """Get area keys of the communities that intersect the point."""
+    names = LandscapeCommunity.objects.filter(
+        geometry__intersects=Point(lon, lat, srid=4326)
+    ).exclude(
+        community_name__isnull=True
+    ).values_list('community_name', flat=True)
+    return sorted(set(community_area_key(name) for name in names))
+
+
+def month_periods(start: datetime.date, end: datetime.date) -> list:
+    """Get list of (year, month) from start to end month inclusive."""
+    periods = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        periods.append((year, month))
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return periods
+
+
+def period_date_millis(year: int, month: int) -> int:
+    """Get epoch millis of the first day of the period in UTC."""
+    return int(
+        datetime.datetime(
+            year, month, 1, tzinfo=datetime.timezone.utc
+        ).timestamp() * 1000
+    )
+
+
+def get_today() -> datetime.date:
+    """Get today's date."""
+    return datetime.date.today()
+
+
+class TemporalPeriodCache:
+    """Cache of temporal statistic rows per area and period."""
+
+    def __init__(self, resolution: str, area_keys: list):
+        """Initialize the cache.
+
+        :param resolution: temporal resolution, e.g. Monthly
+        :param area_keys: area keys of the analysis
+        """
+        self.resolution = resolution
+        self.area_keys = area_keys
+
+    def _is_complete(self, year: int, period: int) -> bool:
+        """Check whether the period has ended and can be cached."""
+        today = get_today()
+        return (year, period) < (today.year, today.month)
+
+    def get_rows(self, periods: list) -> dict:
+        """
+        Get cached rows of the periods.
+
+        :return: dictionary of (area_key, year, period) to feature,
+            the feature is None when the period has no data
+        """
+        years = set(year for year, _ in periods)
+        rows = TemporalStatisticCache.objects.filter(
+            area_key__in=self.area_keys,
+            resolution=self.resolution,
+            year__in=years
+        )
+        period_set = set(periods)
+        return {
+            (row.area_key, row.year, row.period): row.feature
+            for row in rows if (row.year, row.period) in period_set
+        }
+
+    def missing_periods(self, periods: list, rows: dict) -> list:
+        """Get periods that are not cached for every area."""
+        return [
+            (year, period) for year, period in periods
+            if not self._is_complete(year, period) or any(
+                (area_key, year, period) not in rows
+                for area_key in self.area_keys
+            )
+        ]
+
+    def save(
+            self, features: list, periods: list, get_area_key) -> bool:
+        """
+        Save computed features of the periods.
+
+        Areas that have features in other periods are saved as empty
+        rows in the periods without feature, so the period is not
+        computed again. Areas without any feature are not saved, as the
+        computed areas may not match the area keys.
+
+        Nothing is saved when a feature belongs to an area that is not
+        in the area keys, because cached results would miss it.
+
+        :param features: computed features
+        :param periods: computed periods
+        :param get_area_key: function to get area key of a feature
+        :return: whether the features are saved
+        """
+        computed = {}
+        for feature in features:
+            properties = feature.get('properties', {})
+            try:
+                key = (
+                    get_area_key(feature),
+                    int(properties['year']),
+                    int(properties['month'])
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+            computed[key] = feature
+
+        computed_area_keys = set(area_key for area_key, _, _ in computed)
+        if not computed_area_keys.issubset(self.area_keys):
+            return False
+
+        rows = []
+        for year, period in periods:
+            if not self._is_complete(year, period):
+                continue
+            for area_key in self.area_keys:
+                if area_key not in computed_area_keys:
+                    continue
+                rows.append(
+                    TemporalStatisticCache(
+                        area_key=area_key,
+                        resolution=self.resolution,
+                        year=year,
+                        period=period,
+                        feature=computed.get((area_key, year, period))
+                    )
+                )
+        TemporalStatisticCache.objects.bulk_create(
+            rows, ignore_conflicts=True
+        )
+        return True
@@ -0,0 +1,87 @@
+import ee
+from unittest.mock import MagicMock
+from django.test import TestCase, override_settings
+
+from analysis.adaptive_reduction import (
+    AdaptiveReduction,
+    REDUCTION_LADDER,
+    is_resource_error
+)
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestAdaptiveReduction(TestCase):
+
+    def test_is_resource_error(self):
+        self.assertTrue(
+            is_resource_error(ee.EEException('Computation timed out.'))
+        )
+        self.assertTrue(
+            is_resource_error(
+                ee.EEException('User memory limit exceeded.')
+            )
+        )
+        self.assertFalse(
+            is_resource_error(ee.EEException('Asset not found.'))
+        )
+        self.assertFalse(
+            is_resource_error(ValueError('Computation timed out.'))
+        )
+
+    def test_start_level_by_area(self):
+        self.assertEqual(AdaptiveReduction('Test').start_level(), 0)
+        self.assertEqual(
+            AdaptiveReduction('Test', 1000).start_level(), 0
+        )
+        self.assertEqual(
+            AdaptiveReduction('Test', 100_000).start_level(), 1
+        )
+        self.assertEqual(
+            AdaptiveReduction('Test', 5_000_000).start_level(), 3
+        )
+
+    def test_run_escalates_on_resource_error(self):
+        compute = MagicMock(side_effect=[
+            ee.EEException('Computation timed out.'),
+            ee.EEException('User memory limit exceeded.'),
+            'result'
+        ])
+        reduction = AdaptiveReduction('Escalate', 1000, aoi=[1, 2])
+        self.assertEqual(reduction.scale_factor, REDUCTION_LADDER[0][0])
+        self.assertEqual(reduction.run(compute), 'result')
+        self.assertEqual(compute.call_count, 3)
+        compute.assert_called_with(*REDUCTION_LADDER[2])
+        self.assertEqual(reduction.scale_factor, REDUCTION_LADDER[2][0])
+
+        # the same AOI starts at the successful level
+        compute = MagicMock(return_value='result')
+        AdaptiveReduction('Escalate', 1000, aoi=[1, 2]).run(compute)
+        compute.assert_called_once_with(*REDUCTION_LADDER[2])
+
+        # other AOI of similar area starts at the area level
+        compute = MagicMock(return_value='result')
+        AdaptiveReduction('Escalate', 2000, aoi=[3, 4]).run(compute)
+        compute.assert_called_once_with(*REDUCTION_LADDER[0])
+
+    def test_run_raises_other_error(self):
+        compute = MagicMock(side_effect=ee.EEException('Asset not found.'))
+        with self.assertRaises(ee.EEException):
+            AdaptiveReduction('Other').run(compute)
+        compute.assert_called_once_with(*REDUCTION_LADDER[0])
+
+    def test_run_raises_on_last_level(self):
+        compute = MagicMock(
+            side_effect=ee.EEException('Computation timed out.')
+        )
+        with self.assertRaises(ee.EEException):
+            AdaptiveReduction('Last', 5_000_000).run(compute)
+        self.assertEqual(
+            compute.call_count, len(REDUCTION_LADDER) - 3
+        )
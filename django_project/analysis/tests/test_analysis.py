@@ -1,6 +1,12 @@
 import datetime
+from unittest.mock import patch
+from django.contrib.gis.geos import Polygon
 from django.test import TestCase
+from analysis import analysis
+from analysis.models import Landscape, LandscapeCommunity
 from analysis.analysis import (
+    add_community_ids,
+    initialize_engine_analysis,
     spatial_get_date_filter,
     validate_spatial_date_range_filter
 )
@@ -105,3 +111,101 @@ class TestSpatialDateFilter(TestCase):
             variable, start_date, end_date
         )
         self.assertTrue(valid)
+
+
+
+class TestInitializeEngineAnalysis(TestCase):
+
+    def setUp(self):
+        self.original_state = dict(analysis._engine_state)
+        analysis._engine_state.update({
+            'pid': None,
+            'credentials': None,
+            'refresh_timer': None
+        })
+
+    def tearDown(self):
+        analysis._engine_state.update(self.original_state)
+
+    @patch('analysis.analysis._schedule_engine_token_refresh')
+    @patch('analysis.analysis._get_service_account_credentials')
+    @patch('analysis.analysis.ee.Initialize')
+    def test_initialize_once_per_process(
+        self, mock_initialize, mock_credentials, mock_schedule
+    ):
+        initialize_engine_analysis()
+        initialize_engine_analysis()
+        mock_initialize.assert_called_once_with(
+            mock_credentials.return_value
+        )
+        mock_credentials.assert_called_once()
+        mock_schedule.assert_called_once()
+
+        # force re-initialization
+        initialize_engine_analysis(force=True)
+        self.assertEqual(mock_initialize.call_count, 2)
+
+    @patch('analysis.analysis._schedule_engine_token_refresh')
+    @patch('analysis.analysis._get_service_account_credentials')
+    @patch('analysis.analysis.ee.Initialize')
+    def test_initialize_after_fork(
+        self, mock_initialize, mock_credentials, mock_schedule
+    ):
+        analysis._engine_state.update({
+            'pid': -1,
+            'credentials': 'parent-credentials'
+        })
+        initialize_engine_analysis()
+        mock_credentials.assert_called_once()
+        mock_initialize.assert_called_once_with(
+            mock_credentials.return_value
+        )
+        mock_schedule.assert_called_once()
+
+
+
+class TestAddCommunityIds(TestCase):
+
+    def setUp(self):
+        landscape = Landscape.objects.create(name='Landscape 1')
+        LandscapeCommunity.objects.create(
+            landscape=landscape,
+            community_id='community-1',
+            community_name='Community 1',
+            geometry=Polygon(((0, 0), (0, 1), (1, 1), (1, 0), (0, 0)))
+        )
+        LandscapeCommunity.objects.create(
+            landscape=landscape,
+            community_id='community-2',
+            community_name='Community 2',
+            geometry=Polygon(((0, 0), (0, 1), (1, 1), (1, 0), (0, 0)))
+        )
+
+    def test_add_community_ids(self):
+        result = add_community_ids({
+            'type': 'FeatureCollection',
+            'features': [
+                {
+                    'id': 'community-1',
+                    'geometry': None,
+                    'properties': {'Name': 'Community 1'}
+                },
+                {
+                    'id': '0_0',
+                    'geometry': None,
+                    'properties': {'Name': 'Community 2'}
+                },
+                {
+                    'id': '0',
+                    'geometry': None,
+                    'properties': {'Name': 'Custom Area'}
+                }
+            ]
+        })
+        self.assertEqual(
+            [
+                feature['properties']['community_id']
+                for feature in result['features']
+            ],
+            ['community-1', 'community-2', None]
+        )
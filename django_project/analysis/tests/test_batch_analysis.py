@@ -0,0 +1,64 @@
+from django.test import TestCase
+
+from analysis.batch_analysis import (
+    MAX_BATCH_SITES,
+    group_by_site,
+    parse_sites
+)
+
+
+POLYGON = {
+    'type': 'Polygon',
+    'coordinates': [[
+        [28.0, -30.0], [28.1, -30.0], [28.1, -29.9],
+        [28.0, -29.9], [28.0, -30.0]
+    ]]
+}
+
+
+class TestBatchAnalysis(TestCase):
+
+    def test_parse_sites(self):
+        sites = parse_sites([
+            {'id': 'a', 'latitude': -30, 'longitude': 28},
+            {'id': 'b', 'name': 'Site B', 'geometry': POLYGON},
+        ])
+        self.assertEqual([site['id'] for site in sites], ['a', 'b'])
+        self.assertFalse(sites[0]['is_custom_geom'])
+        self.assertEqual(sites[0]['geometry']['type'], 'Point')
+        self.assertTrue(sites[1]['is_custom_geom'])
+        self.assertEqual(sites[1]['name'], 'Site B')
+
+    def test_parse_invalid_sites(self):
+        with self.assertRaises(ValueError):
+            parse_sites([])
+        with self.assertRaises(ValueError):
+            parse_sites([{'id': 'a'}])
+        with self.assertRaises(ValueError):
+            parse_sites([
+                {'id': 'a', 'latitude': 1, 'longitude': 1},
+                {'id': 'a', 'latitude': 2, 'longitude': 2},
+            ])
+        with self.assertRaises(ValueError):
+            parse_sites([
+                {'id': 'a', 'geometry': {
+                    'type': 'LineString', 'coordinates': [[0, 0], [1, 1]]
+                }}
+            ])
+        with self.assertRaises(ValueError):
+            parse_sites([
+                {'latitude': 1, 'longitude': 1}
+            ] * (MAX_BATCH_SITES + 1))
+
+    def test_group_by_site(self):
+        sites = parse_sites([
+            {'id': 'a', 'latitude': -30, 'longitude': 28},
+            {'id': 'b', 'geometry': POLYGON},
+        ])
+        results = group_by_site(sites, [
+            {'properties': {'site_id': 'a', 'Name': 'C1', 'NDVI': 0.1}},
+            {'properties': {'site_id': 'a', 'Name': 'C2', 'NDVI': 0.2}},
+        ])
+        self.assertEqual(len(results['a']['features']), 2)
+        self.assertNotIn('site_id', results['a']['features'][0]['properties'])
+        self.assertEqual(results['b']['features'], [])
@@ -0,0 +1,138 @@
+import json
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.gis.geos import GEOSGeometry
+from django.test import TestCase, override_settings
+
+from analysis.community_tiles import (
+    build_community_pmtiles,
+    bump_community_tiles_version,
+    get_community_pmtiles_name,
+    get_community_vector_tile,
+    query_community_vector_tile,
+    write_communities_geojson
+)
+from analysis.models import Landscape, LandscapeCommunity
+
+
+def fake_tippecanoe(geojson_path, output_path):
+    with open(output_path, 'wb') as file:
+        file.write(b'PMTiles')
+
+
+class CommunityTilesTest(TestCase):
+
+    fixtures = ['1.landscape.json']
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root
+        )
+        self.settings_override.enable()
+        self.landscape = Landscape.objects.first()
+        self.community = LandscapeCommunity.objects.create(
+            landscape=self.landscape,
+            community_id='community-1',
+            community_name='Community 1',
+            geometry=GEOSGeometry(
+                'POLYGON((0 0, 0 1, 1 1, 1 0, 0 0))', srid=4326
+            )
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_write_communities_geojson(self):
+        path = f'{self.media_root}/communities.geojsonl'
+        self.assertEqual(write_communities_geojson(path), 1)
+        with open(path) as file:
+            feature = json.loads(file.readline())
+        self.assertEqual(
+            feature['properties'],
+            {
+                'id': self.community.id,
+                'landscape_id': self.landscape.id,
+                'community_id': 'community-1',
+                'community_name': 'Community 1'
+            }
+        )
+        self.assertEqual(feature['geometry']['type'], 'Polygon')
+
+    @patch('analysis.community_tiles.run_tippecanoe', fake_tippecanoe)
+    def test_build_community_pmtiles(self):
+        self.assertIsNone(get_community_pmtiles_name())
+        first = build_community_pmtiles()
+        self.assertTrue(first.startswith('community_tiles/communities-'))
+        self.assertEqual(get_community_pmtiles_name(), first)
+
+        # previous archive is kept, older ones are deleted
+        second = build_community_pmtiles()
+        third = build_community_pmtiles()
+        self.assertEqual(get_community_pmtiles_name(), third)
+        with self.assertRaises(FileNotFoundError):
+            open(f'{self.media_root}/{first}', 'rb')
+        open(f'{self.media_root}/{second}', 'rb').close()
+
+        # no community, no archive
+        LandscapeCommunity.objects.all().delete()
+        self.assertIsNone(build_community_pmtiles())
+        self.assertIsNone(get_community_pmtiles_name())
+
+    @patch('analysis.community_tiles.schedule_community_pmtiles_build')
+    def test_rebuild_scheduled_on_change(self, mock_schedule):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.community.community_name = 'Community 2'
+            self.community.save()
+        mock_schedule.assert_called_once()
+
+    def test_simplified_geometries(self):
+        self.assertEqual(
+            LandscapeCommunity.get_geometry_field(3), 'geometry_low'
+        )
+        self.assertEqual(
+            LandscapeCommunity.get_geometry_field(8), 'geometry_medium'
+        )
+        self.assertEqual(LandscapeCommunity.get_geometry_field(12), 'geometry')
+        self.assertIsNotNone(self.community.geometry_low)
+        self.assertIsNotNone(self.community.geometry_medium)
+
+        # small vertices are removed at low zoom only
+        self.community.geometry = GEOSGeometry(
+            'POLYGON((0 0, 0 1, 0.5 1.001, 1 1, 1 0, 0 0))', srid=4326
+        )
+        self.community.save(update_fields=['geometry'])
+        self.community.refresh_from_db()
+        self.assertEqual(self.community.geometry_low.num_coords, 5)
+        self.assertEqual(self.community.geometry_medium.num_coords, 6)
+
+    def test_query_community_vector_tile(self):
+        self.assertTrue(query_community_vector_tile(0, 0, 0))
+        self.assertTrue(query_community_vector_tile(14, 8192, 8191))
+        self.assertEqual(query_community_vector_tile(3, 0, 0), b'')
+
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }
+    })
+    @patch('analysis.community_tiles.query_community_vector_tile')
+    def test_vector_tile_cached_per_version(self, mock_query):
+        mock_query.return_value = b'tile'
+        self.assertEqual(get_community_vector_tile(0, 0, 0), b'tile')
+        self.assertEqual(get_community_vector_tile(0, 0, 0), b'tile')
+        self.assertEqual(mock_query.call_count, 1)
+
+        bump_community_tiles_version()
+        get_community_vector_tile(0, 0, 0)
+        self.assertEqual(mock_query.call_count, 2)
+
+    @patch('analysis.community_tiles.bump_community_tiles_version')
+    @patch('analysis.community_tiles.schedule_community_pmtiles_build')
+    def test_tiles_version_bumped_on_delete(self, mock_schedule, mock_bump):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.community.delete()
+        mock_bump.assert_called_once()
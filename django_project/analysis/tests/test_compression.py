@@ -0,0 +1,68 @@
+from django.test import TestCase, override_settings
+
+from analysis.compression import (
+    GZIP,
+    compress_payload,
+    decompress_payload,
+    get_compression_codec
+)
+from analysis.models import AnalysisResultsCache, UserAnalysisResults
+
+
+RESULTS = {
+    'data': {'landscape': 'Landscape 1', 'analysisType': 'Baseline'},
+    'results': {
+        'type': 'FeatureCollection',
+        'features': [{'properties': {'NDVI': 0.5}}] * 100
+    }
+}
+
+
+class TestCompression(TestCase):
+
+    def test_compress_payload(self):
+        payload = compress_payload(RESULTS, GZIP)
+        self.assertEqual(decompress_payload(memoryview(payload)), RESULTS)
+        with self.assertRaises(ValueError):
+            decompress_payload(b'{}')
+
+    @override_settings(ANALYSIS_RESULTS_COMPRESSION='')
+    def test_disabled(self):
+        self.assertIsNone(get_compression_codec())
+        obj = UserAnalysisResults.objects.create(analysis_results=RESULTS)
+        obj.refresh_from_db()
+        self.assertIsNone(obj.analysis_results_payload)
+        self.assertEqual(obj.analysis_results, RESULTS)
+
+    @override_settings(ANALYSIS_RESULTS_COMPRESSION='gzip')
+    def test_user_analysis_results(self):
+        obj = UserAnalysisResults.objects.create(analysis_results=RESULTS)
+        self.assertEqual(obj.analysis_results, RESULTS)
+        self.assertEqual(
+            UserAnalysisResults.objects.filter(id=obj.id).values_list(
+                'analysis_results', flat=True
+            ).first(),
+            {'data': RESULTS['data']}
+        )
+        self.assertTrue(
+            UserAnalysisResults.objects.filter(
+                analysis_results__contains={
+                    'data': {'landscape': 'Landscape 1'}
+                }
+            ).exists()
+        )
+        obj = UserAnalysisResults.objects.get(id=obj.id)
+        self.assertEqual(obj.analysis_results, RESULTS)
+
+    @override_settings(ANALYSIS_RESULTS_COMPRESSION='gzip')
+    def test_analysis_results_cache(self):
+        obj = AnalysisResultsCache.save_cache_with_ttl(
+            ttl=2,
+            analysis_inputs={'key': 'value'},
+            analysis_results=[RESULTS]
+        )
+        self.assertIsNotNone(obj.expired_at)
+        obj = AnalysisResultsCache.objects.get(
+            analysis_inputs={'key': 'value'}
+        )
+        self.assertEqual(obj.analysis_results, [RESULTS])
@@ -0,0 +1,90 @@
+import ee
+from unittest.mock import MagicMock, patch
+from django.test import TestCase, override_settings
+
+from analysis.ee_calls import (
+    EECallLimitTimeout,
+    EECallType,
+    EEPriority,
+    call_ee,
+    ee_priority,
+    get_call_limit,
+    get_priority,
+    is_rate_limit_error
+)
+
+
+@override_settings(
+    EE_RATE_LIMITER_ENABLED=False,
+    EE_CALL_MAX_RETRIES=2,
+    EE_CALL_BACKOFF_BASE_IN_S=0
+)
+class TestEECalls(TestCase):
+
+    def test_is_rate_limit_error(self):
+        self.assertTrue(
+            is_rate_limit_error(ee.EEException('Too Many Requests'))
+        )
+        self.assertTrue(
+            is_rate_limit_error(ee.EEException('Quota exceeded.'))
+        )
+        self.assertFalse(
+            is_rate_limit_error(ee.EEException('Asset not found.'))
+        )
+        self.assertFalse(is_rate_limit_error(ValueError('429')))
+        self.assertFalse(
+            is_rate_limit_error(
+                EECallLimitTimeout(
+                    'Earth Engine is busy, getInfo rate limit is reached '
+                    'for 30 seconds.'
+                )
+            )
+        )
+
+    def test_priority(self):
+        self.assertEqual(get_priority(), EEPriority.INTERACTIVE)
+        with ee_priority(EEPriority.BATCH):
+            self.assertEqual(get_priority(), EEPriority.BATCH)
+        self.assertEqual(get_priority(), EEPriority.INTERACTIVE)
+
+    @override_settings(EE_CALL_LIMITS={'getInfo': {'concurrency': 3}})
+    def test_get_call_limit(self):
+        limit = get_call_limit(EECallType.GET_INFO)
+        self.assertEqual(limit['concurrency'], 3)
+        self.assertIn('rate', limit)
+
+    @patch('analysis.ee_calls.time.sleep')
+    def test_call_ee_retries_rate_limit(self, mock_sleep):
+        func = MagicMock(side_effect=[
+            ee.EEException('Too Many Requests'),
+            'result'
+        ])
+        self.assertEqual(call_ee(EECallType.GET_INFO, func), 'result')
+        self.assertEqual(func.call_count, 2)
+
+    @patch('analysis.ee_calls.time.sleep')
+    def test_call_ee_gives_up(self, mock_sleep):
+        func = MagicMock(side_effect=ee.EEException('Too Many Requests'))
+        with self.assertRaises(ee.EEException):
+            call_ee(EECallType.GET_INFO, func)
+        self.assertEqual(func.call_count, 3)
+
+        func = MagicMock(side_effect=ee.EEException('Asset not found.'))
+        with self.assertRaises(ee.EEException):
+            call_ee(EECallType.GET_INFO, func)
+        func.assert_called_once()
+
+    @patch('analysis.ee_calls.time.sleep')
+    @patch('analysis.ee_calls.limiter')
+    def test_call_ee_does_not_retry_limit_timeout(
+            self, mock_limiter, mock_sleep):
+        mock_limiter.acquire.side_effect = EECallLimitTimeout(
+            'Earth Engine is busy, getInfo rate limit is reached '
+            'for 30 seconds.'
+        )
+        func = MagicMock(return_value='result')
+        with self.assertRaises(EECallLimitTimeout):
+            call_ee(EECallType.GET_INFO, func)
+        self.assertEqual(mock_limiter.acquire.call_count, 1)
+        func.assert_not_called()
+        mock_sleep.assert_not_called()
@@ -0,0 +1,111 @@
+from unittest.mock import MagicMock
+
+import ee
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from analysis.adaptive_reduction import REDUCTION_LADDER, AdaptiveReduction
+from analysis.ee_calls import EECallType, call_ee
+from analysis.ee_circuit_breaker import (
+    EEUnavailable,
+    circuit_breaker,
+    is_outage_error
+)
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }
+    },
+    EE_CIRCUIT_BREAKER_ENABLED=True,
+    EE_CIRCUIT_BREAKER={
+        'failure_threshold': 2,
+        'failure_window_in_s': 60,
+        'reset_timeout_in_s': 60,
+    },
+    EE_CALL_MAX_RETRIES=0
+)
+class TestEECircuitBreaker(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_is_outage_error(self):
+        self.assertTrue(is_outage_error(ee.EEException('Internal error.')))
+        self.assertTrue(is_outage_error(ConnectionError('reset')))
+        self.assertFalse(
+            is_outage_error(ee.EEException('Invalid GeoJSON geometry.'))
+        )
+        self.assertFalse(is_outage_error(EEUnavailable('open')))
+        self.assertFalse(
+            is_outage_error(ee.EEException('Computation timed out.'))
+        )
+        self.assertFalse(
+            is_outage_error(
+                ee.EEException(
+                    'Collection query aborted after accumulating over '
+                    '5000 elements.'
+                )
+            )
+        )
+        self.assertFalse(
+            is_outage_error(ee.EEException('Connection of features'))
+        )
+
+    def test_is_outage_error_http_status(self):
+        cause = Exception('error')
+        cause.resp = MagicMock(status=503)
+        ex = ee.EEException('Earth Engine error')
+        ex.__cause__ = cause
+        self.assertTrue(is_outage_error(ex))
+
+        cause.resp = MagicMock(status=400)
+        ex = ee.EEException('Internal error in request 400')
+        ex.__cause__ = cause
+        self.assertFalse(is_outage_error(ex))
+
+    def test_open_circuit(self):
+        func = MagicMock(side_effect=ee.EEException('503 Unavailable'))
+        for _ in range(2):
+            with self.assertRaises(ee.EEException):
+                call_ee(EECallType.GET_INFO, func)
+        self.assertTrue(circuit_breaker.is_open())
+
+        # EE is not called while the circuit is open
+        with self.assertRaises(EEUnavailable):
+            call_ee(EECallType.GET_INFO, func)
+        self.assertEqual(func.call_count, 2)
+
+    def test_success_resets_failures(self):
+        func = MagicMock(side_effect=[ee.EEException('500'), 'ok', 'ok'])
+        with self.assertRaises(ee.EEException):
+            call_ee(EECallType.GET_INFO, func)
+        self.assertEqual(call_ee(EECallType.GET_INFO, func), 'ok')
+        circuit_breaker.record_failure()
+        self.assertFalse(circuit_breaker.is_open())
+
+    def test_user_error_does_not_open(self):
+        func = MagicMock(side_effect=ee.EEException('Invalid geometry'))
+        for _ in range(3):
+            with self.assertRaises(ee.EEException):
+                call_ee(EECallType.GET_INFO, func)
+        self.assertFalse(circuit_breaker.is_open())
+
+    def test_ladder_escalation_does_not_open(self):
+        last_level = len(REDUCTION_LADDER) - 1
+        func = MagicMock(
+            side_effect=(
+                [ee.EEException('Computation timed out.')] * last_level +
+                ['ok']
+            )
+        )
+        result = AdaptiveReduction('Baseline').run(
+            lambda scale_factor, tile_scale: call_ee(
+                EECallType.GET_INFO, func
+            )
+        )
+        self.assertEqual(result, 'ok')
+        self.assertEqual(func.call_count, last_level + 1)
+        self.assertFalse(circuit_breaker.is_open())
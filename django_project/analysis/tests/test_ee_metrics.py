@@ -0,0 +1,69 @@
+import json
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from analysis.ee_metrics import (
+    EECallTimer,
+    collect_request_calls,
+    get_payload_size,
+    server_timing,
+    track_analysis_type
+)
+
+
+@track_analysis_type(lambda name: f'Test-{name}')
+def _make_call(name):
+    with EECallTimer('getInfo') as timer:
+        timer.finish({'name': name})
+
+
+@override_settings(EE_METRICS_ENABLED=False)
+class TestEEMetrics(TestCase):
+
+    def test_get_payload_size(self):
+        self.assertEqual(get_payload_size({'a': 1}), len('{"a": 1}'))
+        self.assertEqual(get_payload_size(None), 0)
+        result = {'features': [{'id': 1, 'value': [1.5, None]}], 'a': {}}
+        self.assertEqual(get_payload_size(result), len(json.dumps(result)))
+
+    def test_get_payload_size_sampled(self):
+        result = {
+            'features': [
+                {'id': 'a' * 10, 'value': i * 1.5} for i in range(1000)
+            ]
+        }
+        with patch(
+            'analysis.ee_metrics.json.dumps', wraps=json.dumps
+        ) as mock_dumps:
+            size = get_payload_size(result)
+        self.assertAlmostEqual(
+            size, len(json.dumps(result)), delta=len(json.dumps(result)) / 20
+        )
+        # only a sample of the features is serialized
+        self.assertLess(mock_dumps.call_count, 100)
+
+    def test_collect_request_calls(self):
+        with collect_request_calls() as calls:
+            _make_call('a')
+            _make_call('b')
+        self.assertEqual(len(calls), 2)
+        record = calls[0]
+        self.assertEqual(record.call_type, 'getInfo')
+        self.assertEqual(record.analysis_type, 'Test-a')
+        self.assertEqual(
+            record.caller, 'analysis.tests.test_ee_metrics._make_call'
+        )
+        self.assertEqual(record.payload_size, len('{"name": "a"}'))
+
+        header = server_timing(calls)
+        self.assertIn('desc="2 EE calls"', header)
+        self.assertIn('ee-getInfo;dur=', header)
+
+    def test_failed_call(self):
+        with collect_request_calls() as calls:
+            with self.assertRaises(ValueError):
+                with EECallTimer('getMapId'):
+                    raise ValueError('failed')
+        self.assertEqual(calls[0].status, 'error')
+        self.assertEqual(calls[0].analysis_type, 'unknown')
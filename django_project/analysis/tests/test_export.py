@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from analysis.export import EXTRA_COLUMN, infer_columns, stream_csv
+from analysis.models import UserAnalysisResults
+
+User = get_user_model()
+
+
+class TestExport(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpassword'
+        )
+        self.client.force_authenticate(user=self.user)
+        UserAnalysisResults.objects.create(
+            created_by=self.user,
+            analysis_results={
+                'data': {'analysisType': 'Temporal'},
+                'results': [
+                    {
+                        'type': 'FeatureCollection',
+                        'features': [
+                            {
+                                'id': '1',
+                                'geometry': None,
+                                'properties': {'Name': 'A', 'NDVI': 0.5}
+                            }
+                        ]
+                    },
+                    {
+                        'type': 'FeatureCollection',
+                        'features': [
+                            {
+                                'id': '2',
+                                'geometry': None,
+                                'properties': {'Name': 'A', 'NDVI': 0.4}
+                            }
+                        ]
+                    }
+                ]
+            }
+        )
+        UserAnalysisResults.objects.create(
+            created_by=self.user,
+            analysis_results={'data': 'invalid'}
+        )
+
+    def test_infer_columns(self):
+        columns = infer_columns([
+            ({'a': 1, 'b': None, 'c': 'x'}, None),
+            ({'a': 1.5, 'b': None, 'c': 2}, None),
+        ])
+        self.assertEqual(columns, {'a': 'float', 'b': 'str', 'c': 'str'})
+
+    def test_stream_csv(self):
+        rows = [
+            ({'Name': 'A', 'year': 2020}, None),
+            ({'Name': 'B', 'year': 'invalid'}, None),
+        ]
+        content = ''.join(stream_csv(iter(rows), batch_size=1))
+        lines = content.splitlines()
+        self.assertEqual(lines[0], f'Name,year,{EXTRA_COLUMN}')
+        self.assertEqual(lines[1], 'A,2020,')
+        self.assertTrue(lines[2].startswith('B,,'))
+
+    def test_export_analysis_results(self):
+        response = self.client.get(
+            '/user_analysis_results/export/', {'file_format': 'csv'}
+        )
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        lines = content.splitlines()
+        self.assertIn('NDVI', lines[0])
+        self.assertEqual(len(lines), 3)
+
+    def test_export_invalid_format(self):
+        response = self.client.get(
+            '/user_analysis_results/export/', {'file_format': 'xlsx'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_fetch_analysis_results_page(self):
+        response = self.client.get(
+            '/user_analysis_results/fetch_analysis_results/',
+            {'page': 1, 'page_size': 1}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['results']), 1)
@@ -1,7 +1,11 @@
+from django.contrib.gis.geos import GEOSGeometry
 from django.test import TestCase
 from django.contrib.auth.models import User
 from unittest.mock import patch
-from analysis.models import UserAnalysisResults, GEEAsset, GEEAssetType
+from analysis.models import (
+    UserAnalysisResults, GEEAsset, GEEAssetType, AnalysisRasterOutput,
+    Landscape, LandscapeCommunity
+)
 
 class UserAnalysisResultsTest(TestCase):
 
@@ -23,6 +27,113 @@ class UserAnalysisResultsTest(TestCase):
         )
 
 
+class AnalysisRasterOutputTest(TestCase):
+
+    def setUp(self):
+        self.analysis = {
+            'analysisType': 'Temporal',
+            'variable': 'NDVI',
+            'landscape': 'Test Landscape',
+            'temporalResolution': 'Annual',
+            'year': 2021,
+            'month': None,
+            'quarter': None,
+            'communityName': 'Test Community'
+        }
+
+    def test_fingerprint_ignores_key_order(self):
+        reordered = dict(reversed(list(self.analysis.items())))
+        self.assertEqual(
+            AnalysisRasterOutput.get_fingerprint(self.analysis),
+            AnalysisRasterOutput.get_fingerprint(reordered)
+        )
+        self.assertNotEqual(
+            AnalysisRasterOutput.get_fingerprint(self.analysis),
+            AnalysisRasterOutput.get_fingerprint(
+                {**self.analysis, 'year': 2022}
+            )
+        )
+
+    def test_get_or_create_from_analysis(self):
+        output, created = AnalysisRasterOutput.get_or_create_from_analysis(
+            self.analysis
+        )
+        self.assertTrue(created)
+        self.assertEqual(output.status, 'PENDING')
+        self.assertEqual(
+            output.name,
+            'Test_Community_ndvi_temporal_annual_2021.tif'
+        )
+
+        same, created = AnalysisRasterOutput.get_or_create_from_analysis(
+            dict(reversed(list(self.analysis.items())))
+        )
+        self.assertFalse(created)
+        self.assertEqual(same.uuid, output.uuid)
+        self.assertEqual(AnalysisRasterOutput.objects.count(), 1)
+
+    def test_fingerprint_set_on_create(self):
+        output = AnalysisRasterOutput.objects.create(
+            name='test.tif',
+            status='PENDING',
+            analysis=self.analysis
+        )
+        self.assertEqual(
+            output.fingerprint,
+            AnalysisRasterOutput.get_fingerprint(self.analysis)
+        )
+
+
+def _community_feature(community_id, name, size):
+    return {
+        'type': 'Feature',
+        'id': community_id,
+        'properties': {'Name': name},
+        'geometry': {
+            'type': 'Polygon',
+            'coordinates': [
+                [[0, 0], [0, size], [size, size], [size, 0], [0, 0]]
+            ]
+        }
+    }
+
+
+class LandscapeFetchAreasTest(TestCase):
+
+    fixtures = ['1.landscape.json']
+
+    @patch('analysis.community_tiles.refresh_community_tiles')
+    @patch('analysis.paged_fetch.iter_collection_pages')
+    @patch('analysis.models.ee')
+    @patch('analysis.analysis.initialize_engine_analysis')
+    def test_fetch_areas_upsert(
+        self, mock_init, mock_ee, mock_pages, mock_refresh
+    ):
+        landscape = Landscape.objects.first()
+        LandscapeCommunity.objects.create(
+            landscape=landscape,
+            community_id='community-1',
+            community_name='Old name',
+            geometry=GEOSGeometry(
+                'POLYGON((0 0, 0 1, 1 1, 1 0, 0 0))', srid=4326
+            )
+        )
+        mock_pages.return_value = iter([
+            [_community_feature('community-1', 'Community 1', 2)],
+            [_community_feature('community-2', 'Community 2', 1)]
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(landscape.fetch_areas(), 2)
+
+        self.assertEqual(LandscapeCommunity.objects.count(), 2)
+        community = LandscapeCommunity.objects.get(community_id='community-1')
+        self.assertEqual(community.community_name, 'Community 1')
+        self.assertEqual(community.geometry.extent, (0, 0, 2, 2))
+        self.assertEqual(community.geometry_low.extent, (0, 0, 2, 2))
+        mock_refresh.assert_called_once()
+
+
 class GEEAssetTest(TestCase):
 
     def setUp(self):
@@ -0,0 +1,68 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+
+from analysis.paged_fetch import get_collection_info, iter_collection_pages
+
+
+def _features(start, end):
+    return [
+        {
+            'type': 'Feature',
+            'geometry': None,
+            'id': str(idx),
+            'properties': {'Name': f'Site {idx}', 'NDVI': 0.5}
+        } for idx in range(start, end)
+    ]
+
+
+class TestPagedFetch(TestCase):
+
+    def setUp(self):
+        self.collection = MagicMock()
+        self.collection.toList.side_effect = (
+            lambda count, offset=0: ('page', count, offset)
+        )
+
+    def _get_info(self, size):
+        def get_info(obj):
+            if isinstance(obj, tuple):
+                _, count, offset = obj
+                return _features(offset, min(offset + count, size))
+            return {'size': size, 'features': _features(0, min(2, size))}
+        return get_info
+
+    @patch('analysis.paged_fetch.ee.Dictionary', side_effect=lambda d: d)
+    def test_iter_collection_pages(self, mock_dict):
+        with patch(
+            'analysis.paged_fetch.get_info', side_effect=self._get_info(7)
+        ) as mock_get_info:
+            pages = list(
+                iter_collection_pages(
+                    self.collection, page_size=2, max_workers=2
+                )
+            )
+        self.assertEqual(
+            [[feature['id'] for feature in page] for page in pages],
+            [['0', '1'], ['2', '3'], ['4', '5'], ['6']]
+        )
+        self.assertEqual(mock_get_info.call_count, 4)
+
+    @patch('analysis.paged_fetch.ee.Dictionary', side_effect=lambda d: d)
+    def test_get_collection_info(self, mock_dict):
+        with patch(
+            'analysis.paged_fetch.get_info', side_effect=self._get_info(5)
+        ):
+            result = get_collection_info(self.collection, page_size=2)
+        self.assertEqual(result['type'], 'FeatureCollection')
+        self.assertEqual(len(result['features']), 5)
+        self.assertIn('NDVI', result['columns'])
+
+    @patch('analysis.paged_fetch.ee.Dictionary', side_effect=lambda d: d)
+    def test_empty_collection(self, mock_dict):
+        with patch(
+            'analysis.paged_fetch.get_info', side_effect=self._get_info(0)
+        ) as mock_get_info:
+            result = get_collection_info(self.collection, page_size=2)
+        self.assertEqual(result['features'], [])
+        self.assertEqual(mock_get_info.call_count, 1)
@@ -0,0 +1,132 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from analysis.adaptive_reduction import AdaptiveReduction, REDUCTION_LADDER
+from analysis.analysis import AnalysisResultsCacheUtils, run_analysis
+from analysis.models import AnalysisResultsCache
+from analysis.stale_results import collect_stale_results
+from analysis.tasks import clear_analysis_results_cache
+from core.models import CacheEvictionPolicy, Preferences
+
+
+class TestAnalysisResultsCache(TestCase):
+
+    def _create_cache(self, key, hit_count=0, last_accessed_at=None):
+        cache = AnalysisResultsCache.save_cache_with_ttl(
+            ttl=1,
+            analysis_inputs={'key': key},
+            analysis_results={'value': 'x' * 100}
+        )
+        AnalysisResultsCache.objects.filter(id=cache.id).update(
+            hit_count=hit_count,
+            last_accessed_at=last_accessed_at
+        )
+        return cache
+
+    def test_size(self):
+        cache = self._create_cache('a')
+        self.assertGreater(cache.size, 100)
+
+    def test_inputs_scale_factor(self):
+        reduction = AdaptiveReduction('Baseline')
+        utils = AnalysisResultsCacheUtils({'key': 'a'}, reduction)
+        self.assertEqual(utils.inputs, {'key': 'a'})
+
+        # results of a coarser level are not shared with the base level
+        reduction.level = len(REDUCTION_LADDER) - 1
+        self.assertEqual(
+            utils.inputs,
+            {'key': 'a', 'scale_factor': REDUCTION_LADDER[-1][0]}
+        )
+
+    def test_record_hit(self):
+        cache = self._create_cache('a')
+        result = AnalysisResultsCacheUtils({'key': 'a'}).get_analysis_cache()
+        self.assertEqual(result, {'value': 'x' * 100})
+        cache.refresh_from_db()
+        self.assertEqual(cache.hit_count, 1)
+        self.assertIsNotNone(cache.last_accessed_at)
+
+        # expiry is extended, up to max age
+        cache.record_hit(ttl=10, max_age=5)
+        cache.refresh_from_db()
+        self.assertEqual(
+            cache.expired_at,
+            cache.created_at + timezone.timedelta(hours=5)
+        )
+
+    def test_evict_lru(self):
+        now = timezone.now()
+        old = self._create_cache(
+            'old', hit_count=10,
+            last_accessed_at=now - timezone.timedelta(hours=2)
+        )
+        new = self._create_cache('new', last_accessed_at=now)
+        evicted = AnalysisResultsCache.evict(
+            new.size, CacheEvictionPolicy.LRU, batch_size=1
+        )
+        self.assertEqual(evicted, 1)
+        self.assertFalse(AnalysisResultsCache.objects.filter(id=old.id))
+        self.assertTrue(AnalysisResultsCache.objects.filter(id=new.id))
+
+    def test_evict_lfu(self):
+        now = timezone.now()
+        old = self._create_cache(
+            'old', hit_count=10,
+            last_accessed_at=now - timezone.timedelta(hours=2)
+        )
+        new = self._create_cache('new', last_accessed_at=now)
+        AnalysisResultsCache.evict(old.size, CacheEvictionPolicy.LFU)
+        self.assertTrue(AnalysisResultsCache.objects.filter(id=old.id))
+        self.assertFalse(AnalysisResultsCache.objects.filter(id=new.id))
+
+    def test_clear_analysis_results_cache(self):
+        expired = self._create_cache('expired')
+        AnalysisResultsCache.objects.filter(id=expired.id).update(
+            expired_at=timezone.now() - timezone.timedelta(hours=1)
+        )
+        self._create_cache('a')
+        self._create_cache('b')
+        preferences = Preferences.load()
+        preferences.result_cache_max_size = 0
+        preferences.save()
+        clear_analysis_results_cache()
+        self.assertFalse(AnalysisResultsCache.objects.exists())
+
+    def test_stale_analysis_cache(self):
+        cache = self._create_cache('a')
+        AnalysisResultsCache.objects.filter(id=cache.id).update(
+            expired_at=timezone.now() - timezone.timedelta(hours=1)
+        )
+        utils = AnalysisResultsCacheUtils({'key': 'a'})
+        self.assertIsNone(utils.get_analysis_cache())
+        self.assertEqual(
+            utils.get_stale_analysis_cache(), {'value': 'x' * 100}
+        )
+
+        # new cache replaces the stale cache
+        utils.create_analysis_cache({'value': 'y'})
+        self.assertEqual(utils.get_analysis_cache(), {'value': 'y'})
+        self.assertEqual(AnalysisResultsCache.objects.count(), 1)
+
+    @patch('analysis.analysis.trigger_revalidation')
+    def test_run_analysis_serves_stale(self, mock_trigger):
+        inputs = {
+            'lat': 1,
+            'lon': 2,
+            'analysis_dict': {'analysisType': 'Baseline'},
+            'args': [],
+            'kwargs': {}
+        }
+        AnalysisResultsCache.save_cache_with_ttl(
+            ttl=-1,
+            analysis_inputs=AnalysisResultsCacheUtils(inputs).inputs,
+            analysis_results={'value': 'stale'}
+        )
+        with collect_stale_results() as stale_results:
+            result = run_analysis(1, 2, {'analysisType': 'Baseline'})
+        self.assertEqual(result, {'value': 'stale'})
+        self.assertEqual(len(stale_results), 1)
+        mock_trigger.assert_called_once()
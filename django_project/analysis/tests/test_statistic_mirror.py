@@ -0,0 +1,129 @@
+from django.contrib.gis.geos import Point, Polygon
+from django.test import TestCase
+
+from analysis.models import (
+    BaselineStatistic,
+    GEEAsset,
+    GEEAssetType,
+    Landscape,
+    LandscapeCommunity,
+    TemporalStatistic
+)
+from analysis.statistic_mirror import StatisticMirror, temporal_date_millis
+
+
+class TestStatisticMirror(TestCase):
+
+    def setUp(self):
+        GEEAsset.objects.create(
+            key='temporal_table',
+            source='temporal/source',
+            type=GEEAssetType.TABLE
+        )
+        GEEAsset.objects.create(
+            key='baseline_table',
+            source='baseline/source',
+            type=GEEAssetType.TABLE
+        )
+        self.landscape = landscape = Landscape.objects.create(
+            name='Landscape 1'
+        )
+        community = LandscapeCommunity.objects.create(
+            landscape=landscape,
+            community_id='community-1',
+            community_name='Community 1',
+            geometry=Polygon(((0, 0), (0, 1), (1, 1), (1, 0), (0, 0)))
+        )
+        for year, month, ndvi in [
+            (2020, 1, 0.2), (2020, 4, 0.4), (2021, 1, 0.6)
+        ]:
+            TemporalStatistic.objects.create(
+                source='temporal/source',
+                feature_id=f'{year}_{month}',
+                community=community,
+                name='Community 1',
+                year=year,
+                month=month,
+                ndvi=ndvi,
+                evi=ndvi,
+                bare_ground=10
+            )
+        BaselineStatistic.objects.create(
+            source='baseline/source',
+            feature_id='0',
+            community=community,
+            name='Community 1',
+            properties={'Name': 'Community 1', 'NDVI': 0.5},
+            geometry=community.geometry
+        )
+
+    def test_temporal_features(self):
+        features = StatisticMirror(
+            Point(0.5, 0.5, srid=4326)
+        ).temporal_features()
+        self.assertEqual(
+            [feature['id'] for feature in features],
+            ['2020_1', '2020_4', '2021_1']
+        )
+        self.assertEqual(
+            features[0]['properties']['date'],
+            temporal_date_millis(2020, 1)
+        )
+        self.assertIsNone(
+            StatisticMirror(Point(5, 5, srid=4326)).temporal_features()
+        )
+
+    def test_temporal_features_partial(self):
+        # a community intersecting the AOI without rows falls back to EE
+        LandscapeCommunity.objects.create(
+            landscape=self.landscape,
+            community_id='community-2',
+            community_name='Community 2',
+            geometry=Polygon(((1, 0), (1, 1), (2, 1), (2, 0), (1, 0)))
+        )
+        aoi = Polygon(((0.5, 0), (0.5, 1), (1.5, 1), (1.5, 0), (0.5, 0)))
+        self.assertIsNone(StatisticMirror(aoi).temporal_features())
+        self.assertIsNone(StatisticMirror(aoi).annual_features([2020]))
+        # only community 1 intersects the point
+        self.assertEqual(
+            len(
+                StatisticMirror(
+                    Point(0.5, 0.5, srid=4326)
+                ).temporal_features()
+            ),
+            3
+        )
+
+    def test_temporal_features_duplicated_name(self):
+        # rows are matched by Name like the EE query
+        LandscapeCommunity.objects.create(
+            landscape=self.landscape,
+            community_id='community-3',
+            community_name='Community 1',
+            geometry=Polygon(((5, 5), (5, 6), (6, 6), (6, 5), (5, 5)))
+        )
+        features = StatisticMirror(
+            Point(5.5, 5.5, srid=4326)
+        ).temporal_features()
+        self.assertEqual(len(features), 3)
+
+    def test_annual_features(self):
+        features = StatisticMirror(
+            Point(0.5, 0.5, srid=4326)
+        ).annual_features([2020, 2021])
+        self.assertEqual(len(features), 2)
+        self.assertEqual(features[0]['properties']['year'], 2020)
+        self.assertAlmostEqual(features[0]['properties']['NDVI'], 0.3)
+        self.assertAlmostEqual(features[1]['properties']['NDVI'], 0.6)
+
+    def test_baseline_features(self):
+        features = StatisticMirror(
+            Point(0.5, 0.5, srid=4326)
+        ).baseline_features()
+        self.assertEqual(len(features), 1)
+        self.assertEqual(features[0]['properties']['NDVI'], 0.5)
+        self.assertEqual(features[0]['geometry']['type'], 'Polygon')
+        self.assertEqual(
+            StatisticMirror(Point(5, 5, srid=4326)).baseline_features(),
+            []
+        )
@@ -207,3 +207,93 @@ class TestStoreAnalysisRasterOutput(TestCase):
             mock_raster_output.status_logs['gdrive_error'],
             f'File {mock_raster_output.raster_filename} not found!'
         )
+
+    @patch('ee.Filter')
+    @patch('analysis.tasks.InputLayer')
+    @patch('analysis.tasks.download_raster_output')
+    @patch('analysis.tasks.can_download_directly')
+    @patch('analysis.tasks.export_image_to_drive')
+    @patch('analysis.tasks.calculate_temporal_to_img')
+    @patch('analysis.tasks.delete_gdrive_file')
+    @patch('analysis.tasks.initialize_engine_analysis')
+    def test_generate_temporal_analysis_raster_output_direct_download(
+        self, mock_initialize_engine_analysis, mock_delete_gdrive_file,
+        mock_calculate_temporal_to_img, mock_export_image_to_drive,
+        mock_can_download_directly, mock_download_raster_output,
+        mock_input_layer, mock_filter
+    ):
+        mock_raster_output = AnalysisRasterOutput.objects.create(
+            analysis={
+                'analysisType': 'Temporal',
+                'temporalResolution': 'Annual',
+                'year': 2021,
+                'communityName': 'Test Community',
+                'variable': 'Bare ground'
+            },
+            name='mock_filename',
+            status='PENDING'
+        )
+        mock_calculate_temporal_to_img.return_value = MagicMock()
+        mock_can_download_directly.return_value = True
+        mock_download_raster_output.return_value = 200
+
+        generate_temporal_analysis_raster_output(mock_raster_output.uuid)
+
+        mock_can_download_directly.assert_called_once_with(
+            'Test Community', 120
+        )
+        mock_download_raster_output.assert_called_once_with(
+            ANY, ANY, ANY, 120
+        )
+        mock_export_image_to_drive.assert_not_called()
+        mock_raster_output.refresh_from_db()
+        self.assertEqual(mock_raster_output.status, 'COMPLETED')
+        self.assertEqual(mock_raster_output.size, 200)
+        self.assertEqual(
+            mock_raster_output.status_logs['method'], 'direct_download'
+        )
+
+    @patch('ee.Filter')
+    @patch('analysis.tasks.InputLayer')
+    @patch('analysis.tasks.download_raster_output')
+    @patch('analysis.tasks.can_download_directly')
+    @patch('analysis.tasks.export_image_to_drive')
+    @patch('analysis.tasks.calculate_temporal_to_img')
+    @patch('analysis.tasks.delete_gdrive_file')
+    @patch('analysis.tasks.get_gdrive_file')
+    @patch('analysis.tasks.initialize_engine_analysis')
+    def test_generate_temporal_analysis_raster_output_download_fallback(
+        self, mock_initialize_engine_analysis,
+        mock_get_gdrive_file, mock_delete_gdrive_file,
+        mock_calculate_temporal_to_img, mock_export_image_to_drive,
+        mock_can_download_directly, mock_download_raster_output,
+        mock_input_layer, mock_filter
+    ):
+        mock_raster_output = AnalysisRasterOutput.objects.create(
+            analysis={
+                'analysisType': 'Temporal',
+                'temporalResolution': 'Annual',
+                'year': 2021,
+                'communityName': 'Test Community',
+                'variable': 'Bare ground'
+            },
+            name='mock_filename',
+            status='PENDING'
+        )
+        mock_calculate_temporal_to_img.return_value = MagicMock()
+        mock_can_download_directly.return_value = True
+        mock_download_raster_output.side_effect = Exception(
+            'Total request size must be less than or equal to 33554432 bytes.'
+        )
+        mock_export_image_to_drive.return_value = {'state': 'COMPLETED'}
+        gdrive_file = MagicMock()
+        gdrive_file.get.return_value = 100
+        mock_get_gdrive_file.return_value = gdrive_file
+
+        generate_temporal_analysis_raster_output(mock_raster_output.uuid)
+
+        mock_export_image_to_drive.assert_called_once()
+        mock_raster_output.refresh_from_db()
+        self.assertEqual(mock_raster_output.status, 'COMPLETED')
+        self.assertEqual(mock_raster_output.size, 100)
+        self.assertFalse(mock_raster_output.file)
@@ -0,0 +1,124 @@
+import datetime
+from unittest.mock import patch
+from django.test import TestCase
+
+from analysis.models import TemporalStatisticCache
+from analysis.temporal_cache import (
+    TemporalPeriodCache,
+    community_area_key,
+    geometry_area_key,
+    month_periods,
+    period_date_millis
+)
+
+
+def _feature(name, year, month):
+    return {
+        'type': 'Feature',
+        'geometry': None,
+        'id': f'{name}_{year}_{month}',
+        'properties': {
+            'Name': name,
+            'year': year,
+            'month': month,
+            'date': period_date_millis(year, month),
+            'NDVI': 0.5
+        }
+    }
+
+
+class TestTemporalPeriodCache(TestCase):
+
+    def test_month_periods(self):
+        self.assertEqual(
+            month_periods(
+                datetime.date(2022, 11, 1), datetime.date(2023, 2, 1)
+            ),
+            [(2022, 11), (2022, 12), (2023, 1), (2023, 2)]
+        )
+
+    def test_period_date_millis(self):
+        self.assertEqual(period_date_millis(2020, 1), 1577836800000)
+
+    def test_geometry_area_key(self):
+        self.assertEqual(
+            geometry_area_key({'type': 'Polygon', 'coordinates': []}),
+            geometry_area_key({'coordinates': [], 'type': 'Polygon'})
+        )
+
+    @patch('analysis.temporal_cache.get_today')
+    def test_save_and_missing_periods(self, mock_today):
+        mock_today.return_value = datetime.date(2023, 3, 15)
+        area_keys = [community_area_key('A'), community_area_key('B')]
+        period_cache = TemporalPeriodCache('Monthly', area_keys)
+        periods = [(2023, 1), (2023, 2), (2023, 3)]
+        self.assertEqual(
+            period_cache.missing_periods(
+                periods, period_cache.get_rows(periods)
+            ),
+            periods
+        )
+
+        # B has no data in February
+        period_cache.save(
+            [
+                _feature('A', 2023, 1), _feature('B', 2023, 1),
+                _feature('A', 2023, 2), _feature('A', 2023, 3)
+            ],
+            periods,
+            lambda feature: community_area_key(
+                feature['properties']['Name']
+            )
+        )
+        # current month is not cached
+        self.assertEqual(TemporalStatisticCache.objects.count(), 4)
+
+        rows = period_cache.get_rows(periods)
+        self.assertIsNone(rows[(community_area_key('B'), 2023, 2)])
+        self.assertEqual(
+            rows[(community_area_key('A'), 2023, 1)]['id'], 'A_2023_1'
+        )
+        self.assertEqual(
+            period_cache.missing_periods(periods, rows), [(2023, 3)]
+        )
+
+    @patch('analysis.temporal_cache.get_today')
+    def test_save_areas_not_matching(self, mock_today):
+        mock_today.return_value = datetime.date(2023, 3, 15)
+        periods = [(2023, 1), (2023, 2)]
+
+        def get_area_key(feature):
+            return community_area_key(feature['properties']['Name'])
+
+        # C is computed by EE but is not a local community
+        period_cache = TemporalPeriodCache(
+            'Monthly', [community_area_key('A')]
+        )
+        self.assertFalse(
+            period_cache.save(
+                [_feature('A', 2023, 1), _feature('C', 2023, 1)],
+                periods, get_area_key
+            )
+        )
+        self.assertEqual(TemporalStatisticCache.objects.count(), 0)
+
+        # B is not computed by EE, it is not saved as empty
+        period_cache = TemporalPeriodCache(
+            'Monthly', [community_area_key('A'), community_area_key('B')]
+        )
+        self.assertTrue(
+            period_cache.save(
+                [_feature('A', 2023, 1)], periods, get_area_key
+            )
+        )
+        rows = period_cache.get_rows(periods)
+        self.assertEqual(
+            set(rows.keys()),
+            {
+                (community_area_key('A'), 2023, 1),
+                (community_area_key('A'), 2023, 2)
+            }
+        )
+        self.assertEqual(
+            period_cache.missing_periods(periods, rows), periods
+        )
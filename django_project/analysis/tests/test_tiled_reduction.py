@@ -0,0 +1,46 @@
+from django.test import TestCase
+
+from analysis.adaptive_reduction import get_geometry_area_ha
+from analysis.tiled_reduction import (
+    combine_sums,
+    should_tile,
+    split_geometry
+)
+
+
+GEOM = {
+    'type': 'Polygon',
+    'coordinates': [[
+        [28.0, -30.0], [30.0, -30.0], [30.0, -28.0],
+        [28.0, -28.0], [28.0, -30.0]
+    ]]
+}
+
+
+class TestTiledReduction(TestCase):
+
+    def test_should_tile(self):
+        self.assertFalse(should_tile(None))
+        self.assertFalse(should_tile(1000))
+        self.assertTrue(should_tile(5_000_000))
+
+    def test_split_geometry(self):
+        area_ha = get_geometry_area_ha(GEOM)
+        tiles = split_geometry(GEOM, max_tile_area_ha=area_ha / 4)
+        self.assertGreaterEqual(len(tiles), 4)
+        tiles_area_ha = sum(get_geometry_area_ha(tile) for tile in tiles)
+        self.assertAlmostEqual(tiles_area_ha / area_ha, 1, places=3)
+
+        tiles = split_geometry(GEOM, max_tile_area_ha=area_ha * 2)
+        self.assertEqual(len(tiles), 1)
+
+    def test_combine_sums(self):
+        means = combine_sums(
+            [
+                {'ndvi': 10, 'ndvi__weight': 20, 'evi__weight': 0},
+                {'ndvi': 30, 'ndvi__weight': 20, 'evi__weight': 0},
+            ],
+            ['ndvi', 'evi']
+        )
+        self.assertEqual(means['ndvi'], 1)
+        self.assertIsNone(means['evi'])
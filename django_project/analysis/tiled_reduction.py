@@ -0,0 +1,215 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Spatially tiled reduction for large custom geometries.
+
+The AOI is split into a grid of sub-polygons that are reduced in
+parallel with weighted sum reducers. Partial sums are combined locally
+into area-weighted means, the same as ee.Reducer.mean over the AOI.
+"""
+import contextvars
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import ee
+from django.contrib.gis.geos import GEOSGeometry, Polygon
+
+from analysis.adaptive_reduction import EQUAL_AREA_SRID
+from analysis.ee_calls import get_info
+from analysis.paged_fetch import get_collection_info
+
+
+# Custom geometries larger than this are reduced in tiles
+TILED_REDUCTION_MIN_AREA_HA = 1_000_000
+
+# Maximum area of a tile
+TILE_MAX_AREA_HA = 250_000
+
+# Maximum number of tiles reduced at the same time
+TILE_MAX_WORKERS = 4
+
+WEIGHT_SUFFIX = '__weight'
+
+
+def should_tile(area_ha: float) -> bool:
+    """Check whether AOI is large enough for tiled reduction."""
+    return area_ha is not None and area_ha >= TILED_REDUCTION_MIN_AREA_HA
+
+
+def split_geometry(geom: dict, max_tile_area_ha=TILE_MAX_AREA_HA) -> list:
+    """
+    Split GeoJSON geometry into a grid of sub-polygons.
+
+    :param geom: GeoJSON geometry in EPSG:4326
+    :param max_tile_area_ha: maximum area of the grid cell
+    :return: list of GeoJSON geometries of the tiles
+    """
+    geometry = GEOSGeometry(json.dumps(geom), srid=4326)
+    projected = geometry.transform(EQUAL_AREA_SRID, clone=True)
+    xmin, ymin, xmax, ymax = projected.extent
+    cell_size = math.sqrt(max_tile_area_ha * 10000)
+    cols = max(1, math.ceil((xmax - xmin) / cell_size))
+    rows = max(1, math.ceil((ymax - ymin) / cell_size))
+    width = (xmax - xmin) / cols
+    height = (ymax - ymin) / rows
+
+    tiles = []
+    for col in range(cols):
+        for row in range(rows):
+            x0 = xmin + col * width
+            y0 = ymin + row * height
+            cell = Polygon.from_bbox(
+                (x0, y0, x0 + width, y0 + height)
+            )
+            cell.srid = EQUAL_AREA_SRID
+            tile = projected.intersection(cell)
+            if tile.empty or tile.area == 0:
+                continue
+            tile.transform(4326)
+            tiles.append(json.loads(tile.geojson))
+    return tiles
+
+
+def to_ee_geometry(geom: dict):
+    """Convert GeoJSON geometry to EE geometry."""
+    return ee.Geometry(geom, opt_geodesic=False)
+
+
+def weighted_sum_image(image):
+    """
+    Add weight bands to the image for the weighted sum reduction.
+
+    The sum of a weight band (the band mask) is the sum of pixel weights,
+    which divides the sum of the band into its weighted mean.
+    """
+    bands = image.bandNames()
+    weights = image.mask().rename(
+        bands.map(lambda band: ee.String(band).cat(WEIGHT_SUFFIX))
+    )
+    return image.addBands(weights)
+
+
+def combine_sums(properties_list: list, bands: list) -> dict:
+    """
+    Combine partial weighted sums into means.
+
+    :param properties_list: properties of the reduced tiles
+    :param bands: band names
+    :return: dictionary of band to mean, None for band without pixel
+    """
+    means = {}
+    for band in bands:
+        total = 0
+        weight = 0
+        for properties in properties_list:
+            band_weight = properties.get(f'{band}{WEIGHT_SUFFIX}') or 0
+            if not band_weight:
+                continue
+            total += properties.get(band) or 0
+            weight += band_weight
+        means[band] = total / weight if weight else None
+    return means
+
+
+class TiledReduction:
+    """Reduce image over tiles of a large geometry in parallel."""
+
+    def __init__(self, geom: dict, max_tile_area_ha=TILE_MAX_AREA_HA):
+        """Initialize tiled reduction.
+
+        :param geom: GeoJSON geometry of AOI
+        :param max_tile_area_ha: maximum area of a tile
+        """
+        self.geom = geom
+        self.tiles = split_geometry(geom, max_tile_area_ha)
+
+    def map_tiles(self, reduce_tile) -> list:
+        """
+        Run reduce_tile for each tile in parallel.
+
+        :param reduce_tile: function that accepts ee.FeatureCollection of
+            the tile and returns getInfo result of the reduction
+        :return: list of features from all tiles
+        """
+        def run(tile):
+            return reduce_tile(
+                ee.FeatureCollection([ee.Feature(to_ee_geometry(tile))])
+            )
+
+        with ThreadPoolExecutor(max_workers=TILE_MAX_WORKERS) as executor:
+            futures = [
+                # run in a copy of the context to keep EE call metrics
+                executor.submit(contextvars.copy_context().run, run, tile)
+                for tile in self.tiles
+            ]
+            results = [future.result() for future in futures]
+
+        features = []
+        for result in results:
+            features += result.get('features', [])
+        return features
+
+    def reduce_image(self, image, bands: list, scale, tile_scale) -> dict:
+        """
+        Get area-weighted means of the image bands over the AOI.
+
+        :return: dictionary of band to mean
+        """
+        weighted = weighted_sum_image(image)
+
+        def reduce_tile(tile_collection):
+            return get_info(
+                weighted.reduceRegions(
+                    collection=tile_collection,
+                    reducer=ee.Reducer.sum(),
+                    scale=scale,
+                    tileScale=tile_scale
+                )
+            )
+
+        features = self.map_tiles(reduce_tile)
+        return combine_sums(
+            [feature.get('properties', {}) for feature in features], bands
+        )
+
+    def reduce_collection(
+        self, collection, bands: list, group_by: list, scale, tile_scale
+    ) -> list:
+        """
+        Get area-weighted means of each image in the collection.
+
+        :param group_by: image properties copied to the results and used
+            to combine the tiles, e.g. year and month
+        :return: list of dictionaries of group_by properties and means
+        """
+        def reduce_tile(tile_collection):
+            def process_image(img):
+                reduced = weighted_sum_image(img).reduceRegions(
+                    collection=tile_collection,
+                    reducer=ee.Reducer.sum(),
+                    scale=scale,
+                    tileScale=tile_scale
+                )
+                return reduced.map(
+                    lambda ft: ft.copyProperties(img, group_by)
+                )
+            return get_collection_info(
+                collection.map(process_image).flatten().map(
+                    lambda ft: ft.setGeometry(None)
+                )
+            )
+
+        groups = {}
+        for feature in self.map_tiles(reduce_tile):
+            properties = feature.get('properties', {})
+            key = tuple(properties.get(prop) for prop in group_by)
+            groups.setdefault(key, []).append(properties)
+
+        results = []
+        for key, properties_list in groups.items():
+            result = dict(zip(group_by, key))
+            result.update(combine_sums(properties_list, bands))
+            results.append(result)
+        return results
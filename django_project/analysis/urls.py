@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserAnalysisResultsViewSet
+from .views import UserAnalysisResultsViewSet, ee_metrics_view
 
 router = DefaultRouter()
 router.register(r'user_analysis_results', UserAnalysisResultsViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('metrics/ee/', ee_metrics_view, name='ee-metrics'),
 ]
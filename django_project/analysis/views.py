@@ -1,16 +1,33 @@
 from dashboard.models import Dashboard
 from rest_framework import viewsets
 from django.shortcuts import get_object_or_404
-from django.http import Http404, StreamingHttpResponse
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, StreamingHttpResponse
+)
 from .models import UserAnalysisResults
 from .serializer import UserAnalysisResultsSerializer
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
-
-from analysis.models import AnalysisRasterOutput
+from rest_framework.pagination import PageNumberPagination
+
+from analysis.export import (
+    ExportFormat,
+    iter_analysis_result_rows,
+    iter_temporal_statistic_rows,
+    stream_rows
+)
+from analysis.models import AnalysisRasterOutput, TemporalStatistic
 from analysis.tasks import generate_temporal_analysis_raster_output
 from analysis.utils import get_gdrive_file
+from analysis.ee_metrics import render_prometheus_metrics
+
+
+class AnalysisResultsPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
 
 
 class UserAnalysisResultsViewSet(viewsets.ModelViewSet):
@@ -29,9 +46,71 @@ class UserAnalysisResultsViewSet(viewsets.ModelViewSet):
         analysis_results = UserAnalysisResults.objects.filter(
             created_by=request.user
         ).order_by('-created_at')
+        if 'page' in request.query_params:
+            paginator = AnalysisResultsPagination()
+            page = paginator.paginate_queryset(
+                analysis_results, request, view=self
+            )
+            serializer = self.get_serializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
         serializer = self.get_serializer(analysis_results, many=True)
         return Response(serializer.data)
 
+    def _export_response(self, rows, file_format, filename):
+        try:
+            content = stream_rows(rows, file_format, layer=filename)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        response = StreamingHttpResponse(
+            content,
+            content_type=ExportFormat.CONTENT_TYPES[file_format]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}.{file_format}"'
+        )
+        return response
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream features of the user analysis results as file."""
+        analysis_results = UserAnalysisResults.objects.filter(
+            created_by=request.user
+        ).order_by('created_at')
+        ids = request.query_params.get('ids')
+        if ids:
+            analysis_results = analysis_results.filter(
+                id__in=[value for value in ids.split(',') if value.isdigit()]
+            )
+        file_format = request.query_params.get(
+            'file_format', ExportFormat.CSV
+        )
+        return self._export_response(
+            iter_analysis_result_rows(analysis_results),
+            file_format,
+            'analysis_results'
+        )
+
+    @action(detail=False, methods=['get'])
+    def export_time_series(self, request):
+        """Stream per-community time series as file."""
+        statistics = TemporalStatistic.objects.all()
+        community_ids = request.query_params.get('community_ids')
+        if community_ids:
+            statistics = statistics.filter(
+                community__community_id__in=community_ids.split(',')
+            )
+        file_format = request.query_params.get(
+            'file_format', ExportFormat.CSV
+        )
+        return self._export_response(
+            iter_temporal_statistic_rows(
+                statistics,
+                include_geometry=file_format == ExportFormat.GEOPACKAGE
+            ),
+            file_format,
+            'time_series'
+        )
+
     @action(detail=False, methods=['post'])
     def save_analysis_results(self, request):
         serializer = self.get_serializer(data=request.data)
@@ -54,18 +133,12 @@ class UserAnalysisResultsViewSet(viewsets.ModelViewSet):
                 output_obj_list = []
                 new_output_list = []
                 for input_dict in raster_dicts:
-                    # check if output already exists
-                    output_obj = AnalysisRasterOutput.objects.filter(
-                        analysis=input_dict
-                    ).last()
-                    if output_obj is None:
-                        output_obj = AnalysisRasterOutput.objects.create(
-                            name=AnalysisRasterOutput.generate_name(
-                                input_dict
-                            ),
-                            status='PENDING',
-                            analysis=input_dict
+                    output_obj, created = (
+                        AnalysisRasterOutput.get_or_create_from_analysis(
+                            input_dict
                         )
+                    )
+                    if created:
                         new_output_list.append(output_obj)
                     output_obj_list.append(output_obj)
                 result_obj.raster_outputs.set(output_obj_list)
@@ -88,6 +161,15 @@ class UserAnalysisResultsViewSet(viewsets.ModelViewSet):
             uuid=uuid
         )
 
+        if raster_output.file:
+            # raster is downloaded directly to the storage
+            return FileResponse(
+                raster_output.file.open('rb'),
+                as_attachment=True,
+                filename=raster_output.name,
+                content_type='image/tiff'
+            )
+
         file = get_gdrive_file(raster_output.raster_filename)
         if not file:
             raise Http404("File not found in Google Drive")
@@ -122,3 +204,17 @@ class UserAnalysisResultsViewSet(viewsets.ModelViewSet):
             {
                 "message": "Analysis deleted successfully"
             }, status=204)
+
+
+def ee_metrics_view(request):
+    """Expose Earth Engine call metrics in Prometheus text format."""
+    token = getattr(settings, 'EE_METRICS_TOKEN', '')
+    authorized = request.user.is_authenticated and request.user.is_staff
+    if token and request.headers.get('Authorization') == f'Bearer {token}':
+        authorized = True
+    if not authorized:
+        return HttpResponse(status=403)
+    return HttpResponse(
+        render_prometheus_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
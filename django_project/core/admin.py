@@ -35,6 +35,10 @@ class PreferencesAdmin(admin.ModelAdmin):
         ('Analysis', {
             'fields': (
                 'result_cache_ttl',
+                'result_cache_stale_ttl',
+                'result_cache_max_age',
+                'result_cache_max_size',
+                'result_cache_eviction_policy',
             )
         }),
     )
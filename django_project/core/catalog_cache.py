@@ -0,0 +1,140 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Conditional and server-side caching of catalog APIs.
+
+Catalogs (layers, landscapes, base maps, map config) are read on every
+map page load and change rarely. Each catalog has a version, the time
+of its last change in nanoseconds, that is bumped by model signals. The
+version is used as ETag and Last-Modified of the responses, and as part
+of the key of the server-side cached response data.
+"""
+import datetime
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+
+LAYERS = 'layers'
+LANDSCAPES = 'landscapes'
+BASE_MAPS = 'base_maps'
+MAP_CONFIG = 'map_config'
+
+CATALOG_CACHE_TIMEOUT_IN_S = 60 * 60
+
+
+def get_catalog_version_key(catalog: str) -> str:
+    """Get cache key of the catalog version."""
+    return f'catalog-version-{catalog}'
+
+
+def get_catalog_version(catalog: str) -> int:
+    """Get version of the catalog."""
+    key = get_catalog_version_key(catalog)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_catalog_version(*catalogs: str):
+    """Mark the catalogs as changed."""
+    version = time.time_ns()
+    cache.set_many(
+        {get_catalog_version_key(catalog): version for catalog in catalogs},
+        timeout=None
+    )
+
+
+def bump_catalog_version_on_commit(*catalogs: str):
+    """Mark the catalogs as changed after the transaction is committed."""
+    transaction.on_commit(lambda: bump_catalog_version(*catalogs))
+
+
+def get_user_class(request) -> str:
+    """Get class of the user that the catalog responses are shared by."""
+    if request.user.is_authenticated:
+        return 'authenticated'
+    return 'anonymous'
+
+
+def _path_hash(request) -> str:
+    return hashlib.md5(
+        request.get_full_path().encode('utf-8')
+    ).hexdigest()
+
+
+def get_catalog_etag(catalog: str, request, per_user: bool = False) -> str:
+    """Get ETag of the catalog response for the request."""
+    owner = get_user_class(request)
+    if per_user and request.user.is_authenticated:
+        owner = f'user-{request.user.id}'
+    return f'{catalog}-{get_catalog_version(catalog)}-{owner}'
+
+
+def get_catalog_last_modified(catalog: str) -> datetime.datetime:
+    """Get time of the last change of the catalog."""
+    return datetime.datetime.fromtimestamp(
+        # HTTP dates have a second resolution, round up to not miss a change
+        -(-get_catalog_version(catalog) // 10 ** 9),
+        tz=datetime.timezone.utc
+    )
+
+
+def get_cached_catalog(catalog: str, request, build_data):
+    """
+    Get response data of the catalog, shared by the user class.
+
+    :param catalog: name of the catalog
+    :param request: request of the catalog, the path and query string
+        are part of the cache key
+    :param build_data: function that returns the response data
+    """
+    key = (
+        f'catalog-{catalog}-{get_catalog_version(catalog)}-'
+        f'{get_user_class(request)}-{_path_hash(request)}'
+    )
+    data = cache.get(key)
+    if data is None:
+        data = build_data()
+        cache.set(key, data, timeout=CATALOG_CACHE_TIMEOUT_IN_S)
+    return data
+
+
+def catalog_condition(catalog: str, per_user: bool = False):
+    """
+    Decorate a view to answer conditional requests of the catalog.
+
+    The browser keeps the response and revalidates it on every request,
+    which is answered with 304 while the catalog is not changed.
+
+    :param catalog: name of the catalog
+    :param per_user: whether the response has data of the user
+    """
+    def etag_func(request, *args, **kwargs):
+        return get_catalog_etag(catalog, request, per_user)
+
+    def last_modified_func(request, *args, **kwargs):
+        return get_catalog_last_modified(catalog)
+
+    def decorator(view):
+        conditional_view = condition(
+            etag_func=etag_func, last_modified_func=last_modified_func
+        )(view)
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return inner
+    return decorator
@@ -2,6 +2,7 @@ from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init
 from django.db import OperationalError
 import logging
 
@@ -46,6 +47,11 @@ app.conf.beat_schedule = {
         # Run every hour
         'schedule': crontab(minute='00', hour='*'),
     },
+    'sync-gee-statistic-tables': {
+        'task': 'sync_gee_statistic_tables',
+        # Run every Sunday at 01:00 UTC
+        'schedule': crontab(minute='00', hour='01', day_of_week='0'),
+    },
 }
 
 
@@ -76,3 +82,20 @@ def get_dynamic_schedule():
 def setup_periodic_tasks(sender, **kwargs):
     """Update beat schedule after Celery is fully initialized."""
     app.conf.beat_schedule.update(get_dynamic_schedule())
+
+
+@worker_process_init.connect
+def set_ee_call_priority(**kwargs):
+    """Run Earth Engine calls from workers with batch priority."""
+    from analysis.ee_calls import EEPriority, set_default_priority
+    set_default_priority(EEPriority.BATCH)
+
+
+@worker_process_init.connect
+def initialize_earth_engine(**kwargs):
+    """Initialize Earth Engine once in each worker process."""
+    from analysis.analysis import initialize_engine_analysis
+    try:
+        initialize_engine_analysis()
+    except Exception as e:
+        logger.warning(f'Earth Engine initialization failed: {e}')
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.19 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_preferences_result_cache_ttl'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='preferences',
+            name='result_cache_max_age',
+            field=models.FloatField(blank=True, default=24, help_text='The maximum number of hours a result cache is kept when its expiry is extended by hits. Empty to disable extension.', null=True),
+        ),
+        migrations.AddField(
+            model_name='preferences',
+            name='result_cache_max_size',
+            field=models.IntegerField(blank=True, default=1024, help_text='The maximum total size of the result cache in MB. Empty for unlimited size.', null=True),
+        ),
+        migrations.AddField(
+            model_name='preferences',
+            name='result_cache_eviction_policy',
+            field=models.CharField(choices=[('LRU', 'Least recently used'), ('LFU', 'Least frequently used')], default='LRU', help_text='The policy of evicting result cache when the cache exceeds the maximum size.', max_length=10),
+        ),
+    ]
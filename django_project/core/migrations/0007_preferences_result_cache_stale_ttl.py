@@ -0,0 +1,18 @@
+# Generated by Django 4.2.19 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_preferences_result_cache_eviction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='preferences',
+            name='result_cache_stale_ttl',
+            field=models.FloatField(blank=True, default=24, help_text='The number of hours an expired result cache is kept and served as stale result while it is recomputed.', null=True),
+        ),
+    ]
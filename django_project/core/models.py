@@ -7,6 +7,8 @@ Africa Rangeland Watch (ARW).
 """
 
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 
 
@@ -42,6 +44,20 @@ def default_map_initial_bound():
     ]
 
 
+class CacheEvictionPolicy:
+    """Eviction policy of the analysis results cache."""
+
+    LRU = 'LRU'
+    LFU = 'LFU'
+
+    @classmethod
+    def choices(cls):
+        return (
+            (cls.LRU, 'Least recently used'),
+            (cls.LFU, 'Least frequently used'),
+        )
+
+
 class Preferences(SingletonModel):
     """Preference settings specifically for ARW."""
 
@@ -72,6 +88,46 @@ class Preferences(SingletonModel):
         default=1
     )
 
+    result_cache_stale_ttl = models.FloatField(
+        null=True,
+        blank=True,
+        help_text=(
+            "The number of hours an expired result cache is kept and "
+            "served as stale result while it is recomputed."
+        ),
+        default=24
+    )
+
+    result_cache_max_age = models.FloatField(
+        null=True,
+        blank=True,
+        help_text=(
+            "The maximum number of hours a result cache is kept when "
+            "its expiry is extended by hits. Empty to disable extension."
+        ),
+        default=24
+    )
+
+    result_cache_max_size = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text=(
+            "The maximum total size of the result cache in MB. "
+            "Empty for unlimited size."
+        ),
+        default=1024
+    )
+
+    result_cache_eviction_policy = models.CharField(
+        max_length=10,
+        choices=CacheEvictionPolicy.choices(),
+        default=CacheEvictionPolicy.LRU,
+        help_text=(
+            "The policy of evicting result cache when the cache "
+            "exceeds the maximum size."
+        )
+    )
+
 
 class UserSession(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -82,3 +138,10 @@ class UserSession(models.Model):
 
     def __str__(self):
         return f"Session for {self.user.username}"
+
+
+@receiver(post_save, sender=Preferences)
+def preferences_changed(sender, instance: Preferences, *args, **kwargs):
+    """Invalidate map config catalog."""
+    from core.catalog_cache import MAP_CONFIG, bump_catalog_version_on_commit
+    bump_catalog_version_on_commit(MAP_CONFIG)
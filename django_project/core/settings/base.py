@@ -70,6 +70,7 @@ MIDDLEWARE = (
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.contrib.redirects.middleware.RedirectFallbackMiddleware',
+    'analysis.middleware.EECallTimingMiddleware',
 )
 
 ROOT_URLCONF = 'core.urls'
@@ -155,3 +156,76 @@ RESEND_API_KEY = os.environ.get(
 EARTH_RANGER_API_URL = os.environ.get("EARTH_RANGER_API_URL", "https://csah4h.pamdas.org/api/v1.0/")
 EARTH_RANGER_AUTH_TOKEN = os.environ.get("EARTH_RANGER_AUTH_TOKEN", "")
 EARTH_RANGER_CSRF_TOKEN = os.environ.get("EARTH_RANGER_CSRF_TOKEN", "")
+
+# Cluster-wide limiter of Earth Engine calls
+EE_RATE_LIMITER_ENABLED = (
+    os.environ.get('EE_RATE_LIMITER_ENABLED', 'True').lower() == 'true'
+)
+# Redis used by EE call limiter and metrics
+EE_REDIS_URL = (
+    f'redis://default:{os.environ.get("REDIS_PASSWORD", "")}'
+    f'@{os.environ.get("REDIS_HOST", "")}'
+)
+# concurrency: max running calls, rate: calls per second,
+# burst: bucket size, interactive_reserve: slots batch calls cannot use
+EE_CALL_LIMITS = {
+    'getInfo': {
+        'concurrency': int(os.environ.get('EE_GET_INFO_CONCURRENCY', 20)),
+        'rate': int(os.environ.get('EE_GET_INFO_RATE', 10)),
+        'burst': 20,
+        'interactive_reserve': 5,
+    },
+    'getMapId': {
+        'concurrency': int(os.environ.get('EE_GET_MAP_ID_CONCURRENCY', 10)),
+        'rate': int(os.environ.get('EE_GET_MAP_ID_RATE', 5)),
+        'burst': 10,
+        'interactive_reserve': 3,
+    },
+    'getDownloadURL': {
+        'concurrency': 5,
+        'rate': 2,
+        'burst': 5,
+        'interactive_reserve': 0,
+    },
+    'export': {
+        'concurrency': int(os.environ.get('EE_EXPORT_CONCURRENCY', 5)),
+        'rate': 1,
+        'burst': 5,
+        'interactive_reserve': 0,
+    },
+    'export_status': {
+        'concurrency': 10,
+        'rate': 5,
+        'burst': 10,
+        'interactive_reserve': 0,
+    },
+}
+EE_CALL_ACQUIRE_TIMEOUT_IN_S = {
+    'interactive': 30,
+    'batch': 600,
+}
+EE_CALL_MAX_RETRIES = 5
+EE_CALL_BACKOFF_BASE_IN_S = 1
+EE_CALL_BACKOFF_MAX_IN_S = 30
+
+# Stop EE calls for a while when EE keeps failing
+EE_CIRCUIT_BREAKER_ENABLED = (
+    os.environ.get('EE_CIRCUIT_BREAKER_ENABLED', 'True').lower() == 'true'
+)
+EE_CIRCUIT_BREAKER = {
+    'failure_threshold': 5,
+    'failure_window_in_s': 60,
+    'reset_timeout_in_s': 60,
+}
+
+# Aggregate EE call metrics in redis for the Prometheus endpoint
+EE_METRICS_ENABLED = (
+    os.environ.get('EE_METRICS_ENABLED', 'True').lower() == 'true'
+)
+# Bearer token for scraping the metrics endpoint without staff login
+EE_METRICS_TOKEN = os.environ.get('EE_METRICS_TOKEN', '')
+
+# Compression of stored analysis results: gzip, zstd, or empty to disable
+ANALYSIS_RESULTS_COMPRESSION = os.environ.get(
+    'ANALYSIS_RESULTS_COMPRESSION', ''
+)
@@ -15,6 +15,26 @@ ADMINS = (
 )
 NO_REPLY_EMAIL = os.getenv("NO_REPLY_EMAIL", "noreply@kartoza.com")
 DJANGO_BACKEND_URL = os.getenv("DJANGO_BACKEND_URL", "http://localhost:8888/")
+
+# Handoff of PMTiles generated by the worker:
+# http uploads the file to Django, storage writes it to the storage
+# shared with Django (PMTILES_STORAGE or the media volume)
+PMTILES_HANDOFF = os.getenv("PMTILES_HANDOFF", "http")
+PMTILES_STORAGE = None
+if os.getenv("PMTILES_S3_BUCKET"):
+    # requires django-storages[s3]
+    PMTILES_STORAGE = {
+        'BACKEND': 'storages.backends.s3.S3Storage',
+        'OPTIONS': {
+            'bucket_name': os.getenv("PMTILES_S3_BUCKET"),
+            'endpoint_url': os.getenv("PMTILES_S3_ENDPOINT_URL") or None,
+            'access_key': os.getenv("PMTILES_S3_ACCESS_KEY_ID"),
+            'secret_key': os.getenv("PMTILES_S3_SECRET_ACCESS_KEY"),
+            'custom_domain': os.getenv("PMTILES_S3_CUSTOM_DOMAIN") or None,
+            'querystring_auth': False,
+            'file_overwrite': True,
+        }
+    }
 DATABASES = {
     'default': {
         'ENGINE': 'django.contrib.gis.db.backends.postgis',
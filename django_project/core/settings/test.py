@@ -8,4 +8,9 @@ CACHES = {
 
 WEBPACK_LOADER['DEFAULT']['STATS_FILE'] = absolute_path(
     'frontend', 'webpack-stats.prod.json'
-)
\ No newline at end of file
+)
+
+EE_RATE_LIMITER_ENABLED = False
+EE_CALL_BACKOFF_BASE_IN_S = 0
+EE_METRICS_ENABLED = False
+EE_CIRCUIT_BREAKER_ENABLED = False
@@ -14,3 +14,19 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings.prod')
 
 application = get_wsgi_application()
+
+
+try:
+    from uwsgidecorators import postfork
+except ImportError:
+    postfork = None
+
+if postfork is not None:
+    @postfork
+    def initialize_earth_engine():
+        """Initialize Earth Engine once in each uWSGI worker."""
+        from analysis.analysis import initialize_engine_analysis
+        try:
+            initialize_engine_analysis()
+        except Exception as e:
+            print('Earth Engine initialization failed:', e)
@@ -4,6 +4,7 @@ Africa Rangeland Watch (ARW).
 
 .. note:: Analysis APIs
 """
+import contextvars
 import uuid
 from collections import OrderedDict
 from datetime import date
@@ -24,6 +25,10 @@ from analysis.analysis import (
     spatial_get_date_filter,
     validate_spatial_date_range_filter
 )
+from analysis.batch_analysis import BatchAnalysis
+from analysis.ee_calls import get_map_id
+from analysis.ee_circuit_breaker import EEUnavailable
+from analysis.stale_results import collect_stale_results
 
 
 def _temporal_analysis(lat, lon, analysis_dict, custom_geom):
@@ -50,6 +55,18 @@ def get_reference_layer_geom(data):
     return None
 
 
+def get_geometry_mode_kwargs(data):
+    """Get run_analysis kwargs of the requested geometry mode.
+
+    When geometry is 'reference', features are returned without
+    geometry and with properties['community_id'] that references
+    the landscape vector tile features.
+    """
+    if data.get('geometry', 'full') == 'reference':
+        return {'include_geometry': False}
+    return {}
+
+
 class AnalysisAPI(APIView):
     """API to do analysis."""
 
@@ -86,7 +103,8 @@ class AnalysisAPI(APIView):
             lon=float(data['longitude']),
             lat=float(data['latitude']),
             analysis_dict=analysis_dict,
-            custom_geom=data.get('custom_geom', None)
+            custom_geom=data.get('custom_geom', None),
+            **get_geometry_mode_kwargs(data)
         )
 
     def _combine_temporal_analysis_results(self, years, input_results):
@@ -305,6 +323,8 @@ class AnalysisAPI(APIView):
             # Submit tasks to the executor
             futures = [
                 executor.submit(
+                    # run in a copy of the context to keep EE call metrics
+                    contextvars.copy_context().run,
                     _temporal_analysis,
                     data['latitude'],
                     data['longitude'],
@@ -405,7 +425,7 @@ class AnalysisAPI(APIView):
                 'type': 'raster',
                 'group': 'spatial_analysis',
                 'metadata': metadata,
-                'url': rel_diff.getMapId({
+                'url': get_map_id(rel_diff, {
                     'min': metadata['minValue'],
                     'max': metadata['maxValue'],
                     'palette': metadata['colors'],
@@ -424,7 +444,8 @@ class AnalysisAPI(APIView):
             lat=float(data['latitude']),
             analysis_dict=analysis_dict,
             reference_layer=reference_layer_geom,
-            custom_geom=data.get('custom_geom', None)
+            custom_geom=data.get('custom_geom', None),
+            **get_geometry_mode_kwargs(data)
         )
 
         if data.get('custom_geom', None):
@@ -443,18 +464,66 @@ class AnalysisAPI(APIView):
         """Fetch list of Landscape."""
         data = request.data
         try:
-            if data['analysisType'] == 'Baseline':
-                results = self.run_baseline_analysis(data)
-            elif data['analysisType'] == 'Temporal':
-                results = self.run_temporal_analysis(data)
-            elif data['analysisType'] == 'Spatial':
-                results = self.run_spatial_analysis(data)
+            with collect_stale_results() as stale_results:
+                if data['analysisType'] == 'Baseline':
+                    results = self.run_baseline_analysis(data)
+                elif data['analysisType'] == 'Temporal':
+                    results = self.run_temporal_analysis(data)
+                elif data['analysisType'] == 'Spatial':
+                    results = self.run_spatial_analysis(data)
+                else:
+                    raise ValueError('Invalid analysis type')
+            return Response({
+                'data': data,
+                'results': results,
+                # results are recomputed in background when stale
+                'stale': len(stale_results) > 0
+            })
+        except EEUnavailable as e:
+            return Response(
+                {'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except Exception as e:
+            return Response(
+                {'error': str(e)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+
+class BatchAnalysisAPI(APIView):
+    """API to do baseline or temporal analysis of multiple sites."""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """Run analysis of the sites, results are keyed by site id."""
+        data = request.data
+        try:
+            initialize_engine_analysis()
+            batch = BatchAnalysis(
+                data.get('sites', []),
+                include_geometry=data.get('geometry', 'none') == 'full'
+            )
+            if data.get('analysisType') == 'Baseline':
+                results = batch.run_baseline(
+                    data.get('baselineStartDate', None),
+                    data.get('baselineEndDate', None)
+                )
+            elif data.get('analysisType') == 'Temporal':
+                results = batch.run_temporal(
+                    data.get('startDate', None),
+                    data.get('endDate', None),
+                    data.get('temporalResolution', 'Monthly')
+                )
             else:
                 raise ValueError('Invalid analysis type')
             return Response({
                 'data': data,
                 'results': results
             })
+        except EEUnavailable as e:
+            return Response(
+                {'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         except Exception as e:
             return Response(
                 {'error': str(e)}, status=status.HTTP_400_BAD_REQUEST
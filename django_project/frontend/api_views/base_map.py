@@ -5,10 +5,17 @@ Africa Rangeland Watch (ARW).
 .. note:: BaseMap APIs
 """
 
+from django.utils.decorators import method_decorator
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core.catalog_cache import (
+    BASE_MAPS,
+    MAP_CONFIG,
+    catalog_condition,
+    get_cached_catalog
+)
 from core.models import Preferences
 from frontend.models import BaseMap
 from frontend.serializers.base_map import BaseMapSerializer
@@ -19,14 +26,18 @@ class BaseMapAPI(APIView):
 
     permission_classes = [AllowAny]
 
+    @method_decorator(catalog_condition(BASE_MAPS))
     def get(self, request, *args, **kwargs):
         """Fetch list of BaseMap."""
         return Response(
             status=200,
-            data=BaseMapSerializer(
-                BaseMap.objects.all(),
-                many=True
-            ).data
+            data=get_cached_catalog(
+                BASE_MAPS, request,
+                lambda: BaseMapSerializer(
+                    BaseMap.objects.all(),
+                    many=True
+                ).data
+            )
         )
 
 
@@ -35,16 +46,19 @@ class MapConfigAPI(APIView):
 
     permission_classes = [AllowAny]
 
-    def get(self, request, *args, **kwargs):
-        """Fetch map config."""
+    def _get_config(self):
         preferences = Preferences.load()
+        return {
+            'initial_bound': preferences.map_initial_bound,
+            'spatial_reference_layer_max_area': (
+                preferences.spatial_reference_layer_max_area
+            )
+        }
 
+    @method_decorator(catalog_condition(MAP_CONFIG))
+    def get(self, request, *args, **kwargs):
+        """Fetch map config."""
         return Response(
             status=200,
-            data={
-                'initial_bound': preferences.map_initial_bound,
-                'spatial_reference_layer_max_area': (
-                    preferences.spatial_reference_layer_max_area
-                )
-            }
+            data=get_cached_catalog(MAP_CONFIG, request, self._get_config)
         )
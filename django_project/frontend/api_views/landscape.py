@@ -4,18 +4,119 @@ Africa Rangeland Watch (ARW).
 
 .. note:: Landscape APIs
 """
-from cloud_native_gis.utils.vector_tile import querying_vector_tile
-from django.http import Http404, HttpResponse
+import os
+import re
+
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
 from rest_framework.viewsets import mixins, GenericViewSet
 
-from analysis.models import Landscape, LandscapeCommunity
+from analysis.community_tiles import (
+    COMMUNITY_TILES_DIR,
+    VECTOR_TILE_MAX_AGE_IN_S,
+    get_community_pmtiles_name,
+    get_community_vector_tile,
+    get_community_vector_tile_etag
+)
+from analysis.models import Landscape
+from core.catalog_cache import (
+    LANDSCAPES,
+    LAYERS,
+    catalog_condition,
+    get_cached_catalog,
+    get_catalog_version
+)
 from core.pagination import Pagination
 from frontend.serializers.landscape import LandscapeSerializer
 from layers.models import InputLayer
 
 
+COMMUNITY_PMTILES_FILE_PATTERN = re.compile(r'^communities-\d+\.pmtiles$')
+# not in gzip_types of nginx, byte ranges of gzipped responses are ignored
+PMTILES_CONTENT_TYPE = 'application/vnd.pmtiles'
+# archive names change on every build
+PMTILES_MAX_AGE_IN_S = 24 * 60 * 60
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# (layers catalog version, uuids) of near-real-time layers
+_nrt_layers = (None, [])
+
+
+def get_nrt_layer_uuids() -> list:
+    """
+    Get uuids of near-real-time layers, memoized in the process.
+
+    The memo is invalidated when the layers catalog version is bumped by
+    InputLayer changes in any process.
+    """
+    global _nrt_layers
+    version = get_catalog_version(LAYERS)
+    if _nrt_layers[0] != version:
+        _nrt_layers = (
+            version,
+            [
+                str(uuid) for uuid in InputLayer.objects.filter(
+                    group__name='near-real-time'
+                ).values_list('uuid', flat=True)
+            ]
+        )
+    return _nrt_layers[1]
+
+
+def get_range_response(request, name: str) -> HttpResponse:
+    """
+    Return file of the default storage, or the requested byte range.
+
+    PMTiles clients read the archive with HTTP range requests.
+    """
+    try:
+        size = default_storage.size(name)
+    except (FileNotFoundError, OSError):
+        raise Http404()
+
+    match = RANGE_PATTERN.match(request.headers.get('Range', '').strip())
+    if not match or match.groups() == ('', ''):
+        response = FileResponse(
+            default_storage.open(name, 'rb'),
+            content_type=PMTILES_CONTENT_TYPE
+        )
+    else:
+        start, end = match.groups()
+        if start:
+            start = int(start)
+            end = min(int(end), size - 1) if end else size - 1
+        else:
+            # suffix range, the last bytes of the file
+            start = max(size - int(end), 0)
+            end = size - 1
+        if start > end:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        with default_storage.open(name, 'rb') as file:
+            file.seek(start)
+            content = file.read(end - start + 1)
+        response = HttpResponse(
+            content, status=206, content_type=PMTILES_CONTENT_TYPE
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    patch_cache_control(response, public=True, max_age=PMTILES_MAX_AGE_IN_S)
+    return response
+
+
+def vector_tile_etag(request, z, x, y):
+    """Return ETag of the landscape vector tile."""
+    return get_community_vector_tile_etag(z, x, y)
+
+
 class LandscapeViewSet(
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -34,31 +135,71 @@ class LandscapeViewSet(
         Extra context provided to the serializer class.
         """
         context = super().get_serializer_context()
-        nrt_layers = InputLayer.objects.filter(
-            group__name='near-real-time'
-        )
-        context['nrt_layers'] = [str(layer.uuid) for layer in nrt_layers]
+        context['nrt_layers'] = get_nrt_layer_uuids()
         return context
 
+    @method_decorator(catalog_condition(LANDSCAPES))
+    def list(self, request, *args, **kwargs):
+        """Return landscapes, cached until a landscape or url changes."""
+        return Response(
+            get_cached_catalog(
+                LANDSCAPES, request,
+                lambda: super(LandscapeViewSet, self).list(
+                    request, *args, **kwargs
+                ).data
+            )
+        )
+
     def get_throttles(self):
         """Get throttle classes."""
         throttles = super().get_throttles()
-        if self.action == 'vector_tile':
+        if self.action in (
+            'vector_tile', 'community_tiles', 'community_pmtiles'
+        ):
             throttles = []
         return throttles
 
     @action(detail=False, methods=["get"])
+    def community_tiles(self, request):
+        """Return url of pre-generated PMTiles of the communities.
+
+        The url is null while the PMTiles is not generated, the client
+        should use the vector_tile endpoint instead.
+        """
+        name = get_community_pmtiles_name()
+        url = None
+        if name:
+            url = 'pmtiles://' + request.build_absolute_uri(
+                reverse(
+                    'frontend-api:landscape-community-pmtiles',
+                    kwargs={'file_name': os.path.basename(name)}
+                )
+            )
+        return Response({'url': url})
+
+    @action(detail=False, methods=["get"])
+    def community_pmtiles(self, request, file_name):
+        """Return community PMTiles, supporting byte range requests."""
+        if not COMMUNITY_PMTILES_FILE_PATTERN.match(file_name):
+            raise Http404()
+        return get_range_response(
+            request, f'{COMMUNITY_TILES_DIR}/{file_name}'
+        )
+
+    @action(detail=False, methods=["get"])
+    @method_decorator(condition(etag_func=vector_tile_etag))
     def vector_tile(self, request, z, x, y):
         """Return vector tile of landscape."""
-        tiles = querying_vector_tile(
-            LandscapeCommunity._meta.db_table,
-            field_names=[
-                'id', 'landscape_id', 'community_id', 'community_name'
-            ],
-            z=z, x=x, y=y
-        )
+        tiles = get_community_vector_tile(z, x, y)
 
         # If no tile 404
         if not len(tiles):
             raise Http404()
-        return HttpResponse(tiles, content_type="application/x-protobuf")
+        response = HttpResponse(
+            tiles, content_type="application/x-protobuf"
+        )
+        # revalidated with the ETag after the communities change
+        patch_cache_control(
+            response, public=True, max_age=VECTOR_TILE_MAX_AGE_IN_S
+        )
+        return response
@@ -6,6 +6,7 @@ Africa Rangeland Watch (ARW).
 """
 
 import os
+import tempfile
 from django.core.files.storage import FileSystemStorage
 from django.http import FileResponse
 from django.conf import settings
@@ -18,21 +19,28 @@ from rest_framework.exceptions import ValidationError
 from cloud_native_gis.models import Layer, LayerUpload
 from cloud_native_gis.utils.main import id_generator
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
 from cloud_native_gis.utils.fiona import (
     FileType,
     validate_shapefile_zip,
-    validate_collection_crs,
-    delete_tmp_shapefile,
-    open_fiona_collection,
-    list_layers
+    delete_tmp_shapefile
 )
 
+from core.catalog_cache import (
+    LAYERS,
+    catalog_condition,
+    get_cached_catalog
+)
 from layers.models import InputLayer, DataProvider, LayerGroupType
 from frontend.serializers.layers import LayerSerializer
 from layers.tasks.import_layer import (
     import_layer,
     detect_file_type_by_extension
 )
+from layers.vector_validation import (
+    VectorValidationError,
+    validate_vector_file
+)
 
 
 class LayerAPI(APIView):
@@ -40,26 +48,34 @@ class LayerAPI(APIView):
 
     permission_classes = [AllowAny]
 
+    @method_decorator(catalog_condition(LAYERS, per_user=True))
     def get(self, request, *args, **kwargs):
         """Fetch list of Layer."""
-        layers = InputLayer.objects.exclude(
-            group__name='user-defined'
+        # layers that are shared by all users are cached
+        data = list(
+            get_cached_catalog(
+                LAYERS, request,
+                lambda: LayerSerializer(
+                    InputLayer.objects.exclude(
+                        group__name='user-defined'
+                    ),
+                    many=True
+                ).data
+            )
         )
         if self.request.user.is_authenticated:
-            layers = layers.union(
+            data += LayerSerializer(
                 InputLayer.objects.filter(
                     group__name='user-defined',
                     created_by=request.user
                 ).exclude(
                     url__isnull=True
-                )
-            )
-        return Response(
-            status=200,
-            data=LayerSerializer(
-                layers,
+                ),
                 many=True
             ).data
+        return Response(
+            status=200,
+            data=data
         )
 
 
@@ -94,6 +110,24 @@ class UploadLayerAPI(APIView):
             )
         return ''
 
+    def _get_local_path(self, file_obj: any):
+        """Get local path of uploaded file.
+
+        :param file_obj: uploaded file
+        :type file_obj: file
+        :return: path and whether the path is a copy to be removed
+        :rtype: tuple
+        """
+        if isinstance(file_obj, TemporaryUploadedFile):
+            return file_obj.temporary_file_path(), False
+        with tempfile.NamedTemporaryFile(
+            suffix=os.path.splitext(file_obj.name)[-1], delete=False
+        ) as tmp_file:
+            for chunk in file_obj.chunks():
+                tmp_file.write(chunk)
+        file_obj.seek(0)
+        return tmp_file.name, True
+
     def _remove_temp_files(self, file_obj_list: list) -> None:
         """Remove temporary files.
 
@@ -151,33 +185,16 @@ class UploadLayerAPI(APIView):
                 self._on_validation_error(
                     validate_shp_file, tmp_file_obj_list)
 
-        # validate has a layer
-        layers = list_layers(file, file_type)
-        if not layers:
-            self._on_validation_error(
-                'The uploaded file must have at least 1 layer!',
-                tmp_file_obj_list
-            )
-
-        # open fiona collection
-        collection = open_fiona_collection(file, file_type)
-        tmp_file_obj_list.append(collection.path)
-
-        is_valid_crs, crs = validate_collection_crs(collection)
-        if not is_valid_crs:
-            collection.close()
-            self._on_validation_error(
-                f'Incorrect CRS type: {crs}! Please use epsg:4326 (WGS84)!',
-                tmp_file_obj_list
-            )
-
-        # validate feature count > 0
-        if len(collection) == 0:
-            collection.close()
-            self._on_validation_error(
-                'The uploaded file does not have any feature!',
-                tmp_file_obj_list
-            )
+        # validate layer, CRS and first feature in one open,
+        # the features are checked by the import task
+        file_path, is_copy = self._get_local_path(file)
+        try:
+            validate_vector_file(file_path, file_type)
+        except VectorValidationError as ex:
+            self._on_validation_error(str(ex), tmp_file_obj_list)
+        finally:
+            if is_copy:
+                os.remove(file_path)
 
         # create layer
         layer = Layer.objects.create(
@@ -210,9 +227,6 @@ class UploadLayerAPI(APIView):
             input_layer.save()
         instance.save()
 
-        # close collection
-        collection.close()
-
         # remove temporary uploaded file if any
         self._remove_temp_files(tmp_file_obj_list)
 
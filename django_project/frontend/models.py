@@ -5,6 +5,8 @@ Africa Rangeland Watch (ARW).
 .. note:: Models for frontend app
 """
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 
 class BaseMap(models.Model):
@@ -37,3 +39,11 @@ class BaseMap(models.Model):
 
     def __str__(self):
         return self.name
+
+
+@receiver(post_save, sender=BaseMap)
+@receiver(post_delete, sender=BaseMap)
+def base_map_changed(sender, instance: BaseMap, *args, **kwargs):
+    """Invalidate base maps catalog."""
+    from core.catalog_cache import BASE_MAPS, bump_catalog_version_on_commit
+    bump_catalog_version_on_commit(BASE_MAPS)
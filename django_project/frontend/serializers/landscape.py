@@ -5,12 +5,46 @@ Africa Rangeland Watch (ARW).
 .. note:: Serializers for Landscape
 """
 
+from django.db import models
 from rest_framework import serializers
 from django.core.cache import cache
 
 from analysis.models import Landscape
 
 
+def get_cached_urls(landscape_ids, nrt_layers) -> dict:
+    """
+    Get NRT layer urls of the landscapes with one cache read.
+
+    :return: dictionary of (layer uuid, landscape id) to url
+    """
+    keys = {
+        (layer_uuid, landscape_id): f'{layer_uuid}-{landscape_id}'
+        for landscape_id in landscape_ids
+        for layer_uuid in nrt_layers
+    }
+    if not keys:
+        return {}
+    values = cache.get_many(keys.values())
+    return {
+        item: values[key] for item, key in keys.items() if values.get(key)
+    }
+
+
+class LandscapeListSerializer(serializers.ListSerializer):
+    """Serializer for list of Landscape that reads the urls in bulk."""
+
+    def to_representation(self, data):
+        """Read urls of all landscapes before serializing them."""
+        if isinstance(data, models.Manager):
+            data = data.all()
+        data = list(data)
+        self.context['cached_urls'] = get_cached_urls(
+            [obj.id for obj in data], self.context['nrt_layers']
+        )
+        return super().to_representation(data)
+
+
 class LandscapeSerializer(serializers.ModelSerializer):
     """Serializer for Landscape model."""
 
@@ -23,17 +57,19 @@ class LandscapeSerializer(serializers.ModelSerializer):
 
     def get_urls(self, obj: Landscape):
         """Get tile url."""
-        urls = {}
         nrt_layers = self.context['nrt_layers']
-
+        cached_urls = self.context.get('cached_urls')
+        if cached_urls is None:
+            cached_urls = get_cached_urls([obj.id], nrt_layers)
+        urls = {}
         # get url for each nrt layer
         for layer_uuid in nrt_layers:
-            url = cache.get(f'{layer_uuid}-{obj.id}', '')
+            url = cached_urls.get((layer_uuid, obj.id))
             if url:
                 urls[layer_uuid] = url
-
         return urls
 
     class Meta:  # noqa
         model = Landscape
         fields = ['id', 'name', 'bbox', 'zoom', 'urls']
+        list_serializer_class = LandscapeListSerializer
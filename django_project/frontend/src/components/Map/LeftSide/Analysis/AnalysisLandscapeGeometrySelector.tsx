@@ -1,4 +1,4 @@
-import React, { useEffect } from 'react';
+import React, { useEffect, useState } from 'react';
 import maplibregl from "maplibre-gl";
 import { COMMUNITY_ID } from "../../DataTypes";
 import { Community, Landscape } from "../../../../store/landscapeSlice";
@@ -25,21 +25,50 @@ export default function AnalysisLandscapeGeometrySelector(
   { landscape, enableSelection, onSelected, featureId }: Props
 ) {
   const { map } = useMap();
+  const [sourceReady, setSourceReady] = useState<boolean>(false);
 
   useEffect(() => {
+    if (!map) {
+      return
+    }
+    let cancelled = false;
+    // use pre-generated PMTiles, fallback to live vector tiles
+    fetch('/frontend-api/landscapes/community_tiles/')
+      .then(response => response.ok ? response.json() : {})
+      .catch(() => ({}))
+      .then((data: { url?: string }) => {
+        if (!cancelled) {
+          renderCommunityLayer(data?.url)
+        }
+      })
+    return () => {
+      cancelled = true;
+    }
+  }, [map])
+
+  const renderCommunityLayer = (pmtilesUrl?: string) => {
     try {
-      if (!map) {
+      if (!map || typeof map.getSource(COMMUNITY_ID) !== 'undefined') {
         return
       }
       // render community layer
-      map.addSource(
-        COMMUNITY_ID, {
-          type: 'vector',
-          tiles: [
-            document.location.origin + '/frontend-api/landscapes/vector_tile/{z}/{x}/{y}/'
-          ]
-        }
-      );
+      if (pmtilesUrl) {
+        map.addSource(
+          COMMUNITY_ID, {
+            type: 'vector',
+            url: pmtilesUrl
+          }
+        );
+      } else {
+        map.addSource(
+          COMMUNITY_ID, {
+            type: 'vector',
+            tiles: [
+              document.location.origin + '/frontend-api/landscapes/vector_tile/{z}/{x}/{y}/'
+            ]
+          }
+        );
+      }
       map.addLayer({
         'id': COMMUNITY_ID,
         'type': 'line',
@@ -82,10 +111,11 @@ export default function AnalysisLandscapeGeometrySelector(
           'fill-opacity': 0
         }
       });
+      setSourceReady(true);
     } catch (err) {
       console.log(err)
     }
-  }, [map])
+  }
 
   useEffect(() => {
     if (!map) {
@@ -175,7 +205,7 @@ export default function AnalysisLandscapeGeometrySelector(
       map.off('mousemove', COMMUNITY_ID, hoverFunction);
     }
       
-  }, [map, landscape, featureId, enableSelection])
+  }, [map, sourceReady, landscape, featureId, enableSelection])
 
   return <></>
 }
@@ -5,6 +5,7 @@ Africa Rangeland Watch (ARW).
 .. note:: Unit tests for BaseMap API.
 """
 
+from django.test import override_settings
 from django.urls import reverse
 
 from core.models import Preferences
@@ -65,3 +66,34 @@ class MapConfigAPITest(BaseAPIViewTest):
             response.data['initial_bound'],
             Preferences.load().map_initial_bound
         )
+
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }
+    })
+    def test_map_config_not_modified(self):
+        """Test map config is revalidated until preferences change."""
+        view = MapConfigAPI.as_view()
+        url = reverse('frontend-api:map-config')
+        response = view(self.factory.get(url))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+
+        response = view(self.factory.get(url, HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+
+        # authenticated users do not share the response
+        request = self.factory.get(url, HTTP_IF_NONE_MATCH=etag)
+        request.user = self.user
+        self.assertEqual(view(request).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            preferences = Preferences.load()
+            preferences.map_initial_bound = [0, 0, 1, 1]
+            preferences.save()
+        response = view(self.factory.get(url, HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['initial_bound'], [0, 0, 1, 1])
+        self.assertNotEqual(response['ETag'], etag)
@@ -5,6 +5,12 @@ Africa Rangeland Watch (ARW).
 .. note:: Unit tests for Landscape API.
 """
 
+import os
+import shutil
+import tempfile
+
+import mock
+from django.test import override_settings
 from django.urls import reverse
 
 from analysis.models import Landscape
@@ -39,3 +45,164 @@ class LandscapeAPITest(BaseAPIViewTest):
             ['name', 'bbox', 'zoom', 'urls']
         )
         self.assertEqual(len(item['bbox']), 4)
+
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }
+    })
+    def test_get_landscape_list_not_modified(self):
+        """Test landscape list is revalidated until a landscape changes."""
+        view = LandscapeViewSet.as_view({'get': 'list'})
+        url = reverse('frontend-api:landscapes-list')
+        response = view(self.factory.get(url))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+
+        response = view(self.factory.get(url, HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            landscape = Landscape.objects.first()
+            landscape.name = 'Changed'
+            landscape.save(update_fields=['name'])
+        response = view(self.factory.get(url, HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn(
+            'Changed', [item['name'] for item in response.data['results']]
+        )
+
+    @mock.patch(
+        'frontend.api_views.landscape.get_nrt_layer_uuids',
+        return_value=['layer-1', 'layer-2']
+    )
+    @mock.patch('frontend.serializers.landscape.cache')
+    def test_get_landscape_list_urls(self, mock_cache, mock_nrt_layers):
+        """Test urls of all landscapes are read with one cache call."""
+        landscape = Landscape.objects.first()
+        mock_cache.get_many.return_value = {
+            f'layer-1-{landscape.id}': 'http://tile/layer-1'
+        }
+        view = LandscapeViewSet.as_view({'get': 'list'})
+        request = self.factory.get(
+            reverse('frontend-api:landscapes-list')
+        )
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        mock_cache.get_many.assert_called_once()
+        mock_cache.get.assert_not_called()
+        for item in response.data['results']:
+            self.assertEqual(
+                item['urls'],
+                {'layer-1': 'http://tile/layer-1'}
+                if item['id'] == landscape.id else {}
+            )
+
+    @mock.patch(
+        'frontend.api_views.landscape.get_community_pmtiles_name',
+        return_value=None
+    )
+    def test_community_tiles_not_generated(self, mock_name):
+        """Test community tiles url when PMTiles is not generated."""
+        view = LandscapeViewSet.as_view({'get': 'community_tiles'})
+        request = self.factory.get(
+            reverse('frontend-api:landscapes-community-tiles')
+        )
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['url'])
+
+    @mock.patch(
+        'frontend.api_views.landscape.get_community_pmtiles_name',
+        return_value='community_tiles/communities-1.pmtiles'
+    )
+    def test_community_tiles(self, mock_name):
+        """Test community tiles url of generated PMTiles."""
+        view = LandscapeViewSet.as_view({'get': 'community_tiles'})
+        request = self.factory.get(
+            reverse('frontend-api:landscapes-community-tiles')
+        )
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['url'].startswith('pmtiles://http'))
+        self.assertTrue(
+            response.data['url'].endswith(
+                'landscapes/community_tiles/communities-1.pmtiles/'
+            )
+        )
+
+    def test_community_pmtiles_range(self):
+        """Test community PMTiles is served with byte ranges."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media_root):
+            os.makedirs(os.path.join(media_root, 'community_tiles'))
+            with open(
+                os.path.join(
+                    media_root, 'community_tiles', 'communities-1.pmtiles'
+                ), 'wb'
+            ) as file:
+                file.write(b'0123456789')
+            view = LandscapeViewSet.as_view({'get': 'community_pmtiles'})
+            kwargs = {'file_name': 'communities-1.pmtiles'}
+            url = reverse(
+                'frontend-api:landscape-community-pmtiles', kwargs=kwargs
+            )
+
+            response = view(
+                self.factory.get(url, HTTP_RANGE='bytes=2-5'), **kwargs
+            )
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response.content, b'2345')
+            self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+            self.assertEqual(
+                response['Content-Type'], 'application/vnd.pmtiles'
+            )
+
+            response = view(
+                self.factory.get(url, HTTP_RANGE='bytes=-3'), **kwargs
+            )
+            self.assertEqual(response.content, b'789')
+
+            response = view(
+                self.factory.get(url, HTTP_RANGE='bytes=20-'), **kwargs
+            )
+            self.assertEqual(response.status_code, 416)
+
+            response = view(self.factory.get(url), **kwargs)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                b''.join(response.streaming_content), b'0123456789'
+            )
+
+            response = view(
+                self.factory.get(url), file_name='../secret.pmtiles'
+            )
+            self.assertEqual(response.status_code, 404)
+
+    @mock.patch(
+        'frontend.api_views.landscape.get_community_vector_tile_etag',
+        return_value='1-0-0-0'
+    )
+    @mock.patch(
+        'frontend.api_views.landscape.get_community_vector_tile',
+        return_value=b'tile'
+    )
+    def test_vector_tile_cache_headers(self, mock_tile, mock_etag):
+        """Test vector tile is revalidated with the ETag."""
+        view = LandscapeViewSet.as_view({'get': 'vector_tile'})
+        kwargs = {'z': 0, 'x': 0, 'y': 0}
+        url = reverse('frontend-api:landscape-vector-tile', kwargs=kwargs)
+        response = view(self.factory.get(url), **kwargs)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'tile')
+        self.assertEqual(response['ETag'], '"1-0-0-0"')
+        self.assertIn('public', response['Cache-Control'])
+
+        response = view(
+            self.factory.get(url, HTTP_IF_NONE_MATCH='"1-0-0-0"'), **kwargs
+        )
+        self.assertEqual(response.status_code, 304)
+        mock_tile.assert_called_once()
@@ -5,13 +5,16 @@ Africa Rangeland Watch (ARW).
 .. note:: Unit tests for Layers API.
 """
 
+import fiona
 import mock
+from django.test import override_settings
 from django.urls import reverse
 from django.core.files.storage import FileSystemStorage
 from django.core.files.uploadedfile import SimpleUploadedFile
 from cloud_native_gis.models.layer import Layer
 from cloud_native_gis.models.layer_upload import LayerUpload
 
+from core.factories import UserF
 from core.settings.utils import absolute_path
 from core.tests.common import BaseAPIViewTest
 from layers.models import (
@@ -76,6 +79,60 @@ class LayerAPITest(BaseAPIViewTest):
             ['id', 'name', 'url', 'type', 'group', 'metadata']
         )
 
+    def _get_layers(self, user=None, etag=None):
+        """Get layer list as the user."""
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        request = self.factory.get(reverse('frontend-api:layer'), **headers)
+        if user:
+            request.user = user
+        return LayerAPI.as_view()(request)
+
+    def _layer_ids(self, response):
+        return [layer['id'] for layer in response.data]
+
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }
+    })
+    def test_layer_list_not_modified(self):
+        """Test user-defined layers are not shared by the cached list."""
+        self.input_layer.url = 'https://example.com/layer.pmtiles'
+        self.input_layer.save()
+        layer_id = str(self.input_layer.uuid)
+        other_user = UserF.create(is_active=True)
+
+        response = self._get_layers(self.user)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(layer_id, self._layer_ids(response))
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+
+        # the cached list of authenticated users has no user layers
+        response = self._get_layers(other_user)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(layer_id, self._layer_ids(response))
+        self.assertNotEqual(response['ETag'], etag)
+        response = self._get_layers()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(layer_id, self._layer_ids(response))
+
+        # the ETag is not valid for other users
+        response = self._get_layers(other_user, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(layer_id, self._layer_ids(response))
+        self.assertEqual(self._get_layers(None, etag).status_code, 200)
+        self.assertEqual(self._get_layers(self.user, etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.input_layer.name = 'Changed'
+            self.input_layer.save()
+        response = self._get_layers(self.user, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        names = {layer['id']: layer['name'] for layer in response.data}
+        self.assertEqual(names[layer_id], 'Changed')
+
     def test_upload_layer_no_auth(self):
         """Test upload without auth."""
         view = UploadLayerAPI.as_view()
@@ -229,8 +286,11 @@ class LayerAPITest(BaseAPIViewTest):
             400
         )
     
-    @mock.patch('frontend.api_views.layers.list_layers', return_value=[])
-    def test_upload_layer_no_layers(self, mock_list_layers):
+    @mock.patch(
+        'layers.vector_validation.fiona.open',
+        side_effect=fiona.errors.DriverError('No layer')
+    )
+    def test_upload_layer_no_layers(self, mock_fiona_open):
         """Test upload layer with no layers in the file."""
         view = UploadLayerAPI.as_view()
         file_path = absolute_path(
@@ -243,7 +303,7 @@ class LayerAPITest(BaseAPIViewTest):
             'The uploaded file must have at least 1 layer!',
             400
         )
-        mock_list_layers.assert_called_once()
+        mock_fiona_open.assert_called_once()
 
     def test_upload_layer_no_features(self):
         """Test upload layer with no features in the file."""
@@ -8,7 +8,7 @@ Africa Rangeland Watch (ARW).
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from frontend.api_views.analysis import AnalysisAPI
+from frontend.api_views.analysis import AnalysisAPI, BatchAnalysisAPI
 from frontend.api_views.base_map import BaseMapAPI, MapConfigAPI
 from frontend.api_views.landscape import LandscapeViewSet
 from frontend.api_views.layers import LayerAPI, UploadLayerAPI, PMTileLayerAPI
@@ -56,9 +56,19 @@ urlpatterns = base_map_urls + layers_urls + router.urls + [
         LandscapeViewSet.as_view({'get': 'vector_tile'}),
         name='landscape-vector-tile'
     ),
+    path(
+        'landscapes/community_tiles/<str:file_name>/',
+        LandscapeViewSet.as_view({'get': 'community_pmtiles'}),
+        name='landscape-community-pmtiles'
+    ),
     path(
         'analysis/',
         AnalysisAPI.as_view(),
         name='analysis'
     ),
+    path(
+        'analysis/batch/',
+        BatchAnalysisAPI.as_view(),
+        name='analysis-batch'
+    ),
 ]
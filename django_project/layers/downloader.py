@@ -0,0 +1,274 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Resumable download of remote layer files.
+
+When the server supports HTTP Range requests, large files are downloaded
+in parallel segments and every segment resumes from its last written
+byte after a network error. Otherwise the file is streamed on one
+connection and restarted on error.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Minimum file size to download in parallel segments
+PARALLEL_MIN_SIZE = 32 * 1024 * 1024
+MAX_SEGMENTS = 4
+MAX_RETRIES = 5
+RETRY_BACKOFF_IN_S = 2
+# (connect, read) timeout of the requests
+REQUEST_TIMEOUT = (10, 60)
+
+
+class DownloadError(Exception):
+    """Download cannot be completed."""
+
+
+def supports_ranges(response) -> bool:
+    """Check whether the server accepts byte Range requests."""
+    return response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+
+
+class ProgressThrottle:
+    """
+    Report download progress without slowing down the download.
+
+    Progress is reported when the percentage increases by min_step and
+    the interval has passed. The interval grows with the time taken by
+    the callback, e.g. a slow database write, so reporting takes at most
+    max_share of the download time.
+    """
+
+    def __init__(
+        self, callback, total_size: int, min_interval: float = 1,
+        min_step: float = 1, max_share: float = 0.05
+    ):
+        self.callback = callback
+        self.total_size = total_size
+        self.min_interval = min_interval
+        self.min_step = min_step
+        self.max_share = max_share
+        self.interval = min_interval
+        self.last_time = time.monotonic()
+        self.last_percentage = 0
+        self.downloaded = 0
+        self._lock = threading.Lock()
+        self._report_lock = threading.Lock()
+
+    def add(self, size: int):
+        """Add downloaded bytes and report progress if due."""
+        with self._lock:
+            self.downloaded += size
+            downloaded = self.downloaded
+        self.report(downloaded)
+
+    def reset(self, downloaded: int = 0):
+        """Reset downloaded bytes, e.g. when the download restarts."""
+        with self._lock:
+            self.downloaded = downloaded
+
+    def report(self, downloaded: int):
+        """Call the callback if the progress is due."""
+        if self.callback is None or self.total_size <= 0:
+            return
+        percentage = min(downloaded / self.total_size * 100, 100)
+        now = time.monotonic()
+        if (
+            now - self.last_time < self.interval or
+            percentage - self.last_percentage < self.min_step
+        ):
+            return
+        # other segments skip reporting while the callback runs, the
+        # downloaded counter is not locked by the callback
+        if not self._report_lock.acquire(blocking=False):
+            return
+        try:
+            start = time.monotonic()
+            self.callback(percentage)
+            elapsed = time.monotonic() - start
+            self.interval = max(self.min_interval, elapsed / self.max_share)
+            self.last_time = time.monotonic()
+            self.last_percentage = percentage
+        finally:
+            self._report_lock.release()
+
+
+def _wait_before_retry(attempt: int, ex):
+    if attempt > MAX_RETRIES:
+        raise DownloadError(
+            f'Download failed after {MAX_RETRIES} retries: {ex}'
+        )
+    logger.warning(f'Download interrupted ({ex}), retry {attempt}')
+    time.sleep(RETRY_BACKOFF_IN_S * 2 ** (attempt - 1))
+
+
+def download_range(
+    url, headers: dict, full_path: str, start: int, end: int,
+    progress: ProgressThrottle
+):
+    """
+    Download bytes from start to end (inclusive) into the file.
+
+    The download resumes from the last written byte after an error.
+    """
+    position = start
+    attempt = 0
+    while position <= end:
+        try:
+            with requests.get(
+                url,
+                headers={**headers, 'Range': f'bytes={position}-{end}'},
+                stream=True,
+                timeout=REQUEST_TIMEOUT
+            ) as response:
+                if response.status_code != 206:
+                    raise DownloadError(
+                        'Range request is not supported: '
+                        f'HTTP {response.status_code}'
+                    )
+                with open(full_path, 'r+b') as file:
+                    file.seek(position)
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        chunk = chunk[:end - position + 1]
+                        file.write(chunk)
+                        position += len(chunk)
+                        progress.add(len(chunk))
+                        attempt = 0
+            if position <= end:
+                raise requests.ConnectionError(
+                    f'Connection closed at byte {position}'
+                )
+        except requests.RequestException as ex:
+            attempt += 1
+            _wait_before_retry(attempt, ex)
+
+
+def _stream_response(response, file, progress: ProgressThrottle) -> int:
+    written = 0
+    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+        file.write(chunk)
+        written += len(chunk)
+        progress.add(len(chunk))
+    return written
+
+
+def stream_download(
+    response, url, headers: dict, full_path: str, total_size: int,
+    progress: ProgressThrottle
+):
+    """
+    Download the response on one connection.
+
+    After an error, the download resumes with a Range request when the
+    server supports it, otherwise it restarts from the beginning.
+    """
+    ranged = supports_ranges(response) and total_size > 0
+    with open(full_path, 'wb') as file:
+        try:
+            downloaded = _stream_response(response, file, progress)
+            if total_size > 0 and downloaded < total_size:
+                raise requests.ConnectionError(
+                    f'Connection closed at byte {downloaded}'
+                )
+            return
+        except requests.RequestException as ex:
+            error = ex
+            downloaded = file.tell()
+        finally:
+            response.close()
+
+    if ranged:
+        logger.warning(f'Download interrupted ({error}), resuming')
+        download_range(
+            url, headers, full_path, downloaded, total_size - 1, progress
+        )
+        return
+
+    attempt = 0
+    while True:
+        attempt += 1
+        _wait_before_retry(attempt, error)
+        progress.reset()
+        try:
+            with requests.get(
+                url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT
+            ) as retry_response, open(full_path, 'wb') as file:
+                retry_response.raise_for_status()
+                downloaded = _stream_response(retry_response, file, progress)
+            if total_size > 0 and downloaded < total_size:
+                raise requests.ConnectionError(
+                    f'Connection closed at byte {downloaded}'
+                )
+            return
+        except requests.RequestException as ex:
+            error = ex
+
+
+def parallel_download(
+    url, headers: dict, full_path: str, total_size: int,
+    progress: ProgressThrottle, segments: int = MAX_SEGMENTS
+):
+    """Download the file in parallel Range segments."""
+    with open(full_path, 'wb') as file:
+        file.truncate(total_size)
+    segment_size = -(-total_size // segments)
+    ranges = [
+        (start, min(start + segment_size, total_size) - 1)
+        for start in range(0, total_size, segment_size)
+    ]
+    with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [
+            executor.submit(
+                download_range, url, headers, full_path, start, end,
+                progress
+            ) for start, end in ranges
+        ]
+        for future in futures:
+            future.result()
+
+
+def download_to_file(
+    response, url, full_path: str, headers: dict = None,
+    progress_callback=None
+):
+    """
+    Download the opened response to full_path.
+
+    :param response: streamed response of the GET request
+    :param url: url of the file, used for Range requests
+    :param full_path: path of the downloaded file
+    :param headers: headers of the requests, e.g. Authorization
+    :param progress_callback: called with the download percentage
+    """
+    headers = headers or {}
+    total_size = int(response.headers.get('Content-Length', 0))
+    progress = ProgressThrottle(progress_callback, total_size)
+    if supports_ranges(response) and total_size >= PARALLEL_MIN_SIZE:
+        response.close()
+        try:
+            parallel_download(url, headers, full_path, total_size, progress)
+            return
+        except DownloadError as ex:
+            if os.path.exists(full_path):
+                os.remove(full_path)
+            logger.warning(
+                f'Parallel download failed ({ex}), fallback to one stream'
+            )
+        progress.reset()
+        response = requests.get(
+            url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT
+        )
+        response.raise_for_status()
+    stream_download(
+        response, url, headers, full_path, total_size, progress
+    )
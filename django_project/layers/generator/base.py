@@ -10,6 +10,8 @@ from typing import List
 from django.core.cache import cache
 
 from analysis.models import GEEAsset
+from analysis.ee_metrics import analysis_type
+from core.catalog_cache import LANDSCAPES, LAYERS, bump_catalog_version
 from layers.models import InputLayer, DataProvider
 
 
@@ -74,11 +76,13 @@ class BaseLayerGenerator:
     def generate(self):
         """Generate layer using GEE."""
         try:
-            layers = self._generate()
+            with analysis_type(self.__class__.__name__):
+                layers = self._generate()
 
             # save layers url to cache
             for layer in layers:
                 self.save_url_to_cache(layer.cache_key(), layer.file_url)
+            bump_catalog_version(LAYERS, LANDSCAPES)
         except Exception as ex:
             logger.error(f'Failed {self.__class__.__name__} generator!')
             logger.error(ex)
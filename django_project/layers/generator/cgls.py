@@ -7,6 +7,7 @@ Africa Rangeland Watch (ARW).
 import ee
 
 from analysis.models import GEEAsset
+from analysis.ee_calls import get_map_id
 from layers.models import InputLayer
 from layers.generator.base import BaseLayerGenerator, LayerCacheResult
 
@@ -82,19 +83,22 @@ class CGLSGenerator(BaseLayerGenerator):
         return [
             LayerCacheResult(
                 bg_layer,
-                bg_baseline.getMapId(
+                get_map_id(
+                    bg_baseline,
                     self.metadata_to_vis_params(bg_layer)
                 )['tile_fetcher'].url_format
             ),
             LayerCacheResult(
                 woody_layer,
-                woody_baseline.getMapId(
+                get_map_id(
+                    woody_baseline,
                     self.metadata_to_vis_params(woody_layer)
                 )['tile_fetcher'].url_format
             ),
             LayerCacheResult(
                 grass_layer,
-                grass_baseline.getMapId(
+                get_map_id(
+                    grass_baseline,
                     self.metadata_to_vis_params(grass_layer)
                 )['tile_fetcher'].url_format
             )
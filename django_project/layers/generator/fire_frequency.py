@@ -7,6 +7,7 @@ Africa Rangeland Watch (ARW).
 import ee
 
 from analysis.models import GEEAsset
+from analysis.ee_calls import get_map_id
 from layers.models import InputLayer
 from layers.generator.base import BaseLayerGenerator, LayerCacheResult
 
@@ -34,7 +35,8 @@ class FireFrequencyGenerator(BaseLayerGenerator):
         return [
             LayerCacheResult(
                 ff_layer,
-                fire_freq.getMapId(
+                get_map_id(
+                    fire_freq,
                     self.metadata_to_vis_params(ff_layer)
                 )['tile_fetcher'].url_format
             )
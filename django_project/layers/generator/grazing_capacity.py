@@ -7,6 +7,7 @@ Africa Rangeland Watch (ARW).
 import ee
 
 from analysis.models import GEEAsset
+from analysis.ee_calls import get_map_id
 from layers.models import InputLayer
 from layers.generator.base import BaseLayerGenerator, LayerCacheResult
 
@@ -56,7 +57,8 @@ class GrazingCapacityGenerator(BaseLayerGenerator):
         return [
             LayerCacheResult(
                 gc_layer,
-                grazing_capacity.getMapId(
+                get_map_id(
+                    grazing_capacity,
                     self.metadata_to_vis_params(gc_layer)
                 )['tile_fetcher'].url_format
             )
@@ -7,6 +7,7 @@ Africa Rangeland Watch (ARW).
 import ee
 
 from analysis.models import GEEAsset
+from analysis.ee_calls import get_map_id
 from layers.models import InputLayer
 from layers.generator.base import BaseLayerGenerator, LayerCacheResult
 
@@ -49,13 +50,15 @@ class ModisVegetationGenerator(BaseLayerGenerator):
         return [
             LayerCacheResult(
                 evi_layer,
-                evi_baseline.getMapId(
+                get_map_id(
+                    evi_baseline,
                     self.metadata_to_vis_params(evi_layer)
                 )['tile_fetcher'].url_format
             ),
             LayerCacheResult(
                 ndvi_layer,
-                ndvi_baseline.getMapId(
+                get_map_id(
+                    ndvi_baseline,
                     self.metadata_to_vis_params(ndvi_layer)
                 )['tile_fetcher'].url_format
             )
@@ -9,6 +9,7 @@ import ee
 
 from analysis.models import Landscape, GEEAsset
 from analysis.analysis import get_nrt_sentinel, train_bgt, classify_bgt
+from analysis.ee_calls import get_map_id
 from layers.models import InputLayer
 from layers.generator.base import BaseLayerGenerator, LayerCacheResult
 
@@ -39,7 +40,8 @@ class NearRealTimeGenerator(BaseLayerGenerator):
 
             return LayerCacheResult(
                 evi_layer,
-                evi_img.getMapId(
+                get_map_id(
+                    evi_img,
                     self.metadata_to_vis_params(evi_layer)
                 )['tile_fetcher'].url_format,
                 f'{landscape.id}'
@@ -64,7 +66,8 @@ class NearRealTimeGenerator(BaseLayerGenerator):
 
             return LayerCacheResult(
                 ndvi_layer,
-                ndvi_img.getMapId(
+                get_map_id(
+                    ndvi_img,
                     self.metadata_to_vis_params(ndvi_layer)
                 )['tile_fetcher'].url_format,
                 f'{landscape.id}'
@@ -94,7 +97,8 @@ class NearRealTimeGenerator(BaseLayerGenerator):
 
             return LayerCacheResult(
                 bg_layer,
-                bg.getMapId(
+                get_map_id(
+                    bg,
                     self.metadata_to_vis_params(bg_layer)
                 )['tile_fetcher'].url_format,
                 f'{landscape.id}'
@@ -7,6 +7,7 @@ Africa Rangeland Watch (ARW).
 import ee
 
 from analysis.models import GEEAsset
+from analysis.ee_calls import get_map_id
 from layers.models import InputLayer
 from layers.generator.base import BaseLayerGenerator, LayerCacheResult
 
@@ -99,13 +100,15 @@ class SoilOrganicCarbonGenerator(BaseLayerGenerator):
         return [
             LayerCacheResult(
                 soc_layer,
-                soc_lt_mean.getMapId(
+                get_map_id(
+                    soc_lt_mean,
                     self.metadata_to_vis_params(soc_layer)
                 )['tile_fetcher'].url_format
             ),
             LayerCacheResult(
                 socc_layer,
-                soc_lt_trend.getMapId(
+                get_map_id(
+                    soc_lt_trend,
                     self.metadata_to_vis_params(socc_layer)
                 )['tile_fetcher'].url_format
             )
@@ -1,7 +1,7 @@
 import uuid
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from cloud_native_gis.models.layer import Layer
 
@@ -232,9 +232,30 @@ class DataFeedSetting(models.Model):
 @receiver(post_delete, sender=InputLayer)
 def input_layer_on_delete(sender, instance: InputLayer, using, **kwargs):
     """Delete layer in cloud_native_gis."""
+    from layers.pmtiles_storage import delete_pmtiles
+    delete_pmtiles(instance.uuid)
     layer = Layer.objects.filter(
         unique_id=instance.uuid
     ).first()
     if layer is None:
         return
     layer.delete()
+
+
+@receiver(post_save, sender=InputLayer)
+@receiver(post_delete, sender=InputLayer)
+def input_layer_changed(sender, instance: InputLayer, *args, **kwargs):
+    """Invalidate catalogs that list the layers."""
+    from core.catalog_cache import (
+        LANDSCAPES,
+        LAYERS,
+        bump_catalog_version_on_commit
+    )
+    bump_catalog_version_on_commit(LAYERS, LANDSCAPES)
+
+
+@receiver(post_save, sender=Layer)
+def layer_changed(sender, instance: Layer, *args, **kwargs):
+    """Invalidate layers catalog when style of the layer changes."""
+    from core.catalog_cache import LAYERS, bump_catalog_version_on_commit
+    bump_catalog_version_on_commit(LAYERS)
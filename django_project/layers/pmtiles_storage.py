@@ -0,0 +1,86 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Handoff of PMTiles generated by the worker.
+
+With PMTILES_HANDOFF=http, the worker uploads the PMTiles to the web
+through PMTileLayerAPI. With PMTILES_HANDOFF=storage, the worker writes
+it to storage shared with the web and only registers the url:
+PMTILES_STORAGE (e.g. S3-compatible) when configured, otherwise the
+media volume that is mounted by both.
+"""
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+
+HTTP = 'http'
+STORAGE = 'storage'
+
+
+def use_shared_storage() -> bool:
+    """Check whether PMTiles are handed off through shared storage."""
+    return getattr(settings, 'PMTILES_HANDOFF', HTTP) == STORAGE
+
+
+def get_pmtiles_storage():
+    """Get PMTILES_STORAGE, or None to use the media volume."""
+    config = getattr(settings, 'PMTILES_STORAGE', None)
+    if not config:
+        return None
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+def get_pmtiles_name(layer_uuid) -> str:
+    """Get name of PMTiles of the layer in PMTILES_STORAGE."""
+    return f'pmtiles/{layer_uuid}.pmtiles'
+
+
+def get_serve_pmtiles_url(layer, base_url: str) -> str:
+    """Get url of PMTiles of the layer served by Django."""
+    return (
+        f'pmtiles://{base_url}' +
+        reverse('serve-pmtiles', kwargs={
+            'layer_uuid': layer.unique_id,
+        })
+    )
+
+
+def publish_pmtiles(layer, base_url: str) -> str:
+    """
+    Publish PMTiles written by the worker to the shared storage.
+
+    :param layer: cloud_native_gis Layer with pmtile
+    :param base_url: url of Django without trailing slash
+    :return: url of the PMTiles for the InputLayer
+    """
+    storage = get_pmtiles_storage()
+    if storage is None:
+        # media volume is shared, the web serves the same file
+        return get_serve_pmtiles_url(layer, base_url)
+
+    name = get_pmtiles_name(layer.unique_id)
+    with layer.pmtile.open('rb') as file:
+        name = storage.save(name, file)
+    # the tiles are read from the storage, remove the worker copy
+    layer.pmtile.delete(save=True)
+
+    url = storage.url(name)
+    if not urlparse(url).scheme:
+        url = base_url + url
+    return f'pmtiles://{url}'
+
+
+def delete_pmtiles(layer_uuid):
+    """Delete PMTiles of the layer from PMTILES_STORAGE."""
+    if not use_shared_storage():
+        return
+    storage = get_pmtiles_storage()
+    if storage is None:
+        return
+    name = get_pmtiles_name(layer_uuid)
+    if storage.exists(name):
+        storage.delete(name)
@@ -8,15 +8,25 @@ Africa Rangeland Watch (ARW).
 import os
 import requests
 import mimetypes
-from datetime import datetime
 from django.urls import reverse
 from django.conf import settings
 from celery.utils.log import get_task_logger
 from cloud_native_gis.models import Layer, LayerUpload, UploadStatus
+from cloud_native_gis.utils.fiona import FileType
 
 from core.celery import app
 from core.models import Preferences
+from layers.downloader import REQUEST_TIMEOUT, download_to_file
 from layers.models import InputLayer, InputLayerType
+from layers.pmtiles_storage import (
+    get_serve_pmtiles_url,
+    publish_pmtiles,
+    use_shared_storage
+)
+from layers.vector_validation import (
+    VectorValidationError,
+    validate_vector_file
+)
 
 
 logger = get_task_logger(__name__)
@@ -40,13 +50,16 @@ def download_file_from_url(
         if 'drive.google' in file_url:
             file_url = get_link_from_gdrive(file_url)
 
-        headers = None
+        # Content-Length and Range offsets are of the raw bytes
+        headers = {
+            'Accept-Encoding': 'identity'
+        }
         if auth_header:
-            headers = {
-                'Authorization': auth_header
-            }
+            headers['Authorization'] = auth_header
 
-        response = requests.get(file_url, stream=True, headers=headers)
+        response = requests.get(
+            file_url, stream=True, headers=headers, timeout=REQUEST_TIMEOUT
+        )
 
         # Check if the request was successful
         if response.status_code == 200:
@@ -68,31 +81,14 @@ def download_file_from_url(
                     if extension and not local_filename.endswith(extension):
                         local_filename += extension
 
-            # Write the content to a local file
+            # Write the content to a local file, in parallel segments
+            # when the server supports Range requests
             full_path = os.path.join(download_dir, local_filename)
-            total_size = int(response.headers.get('Content-Length', 0))
-            downloaded_size = 0
-            last_update = datetime.now()
-
-            with open(full_path, 'wb') as file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    file.write(chunk)
-                    downloaded_size += len(chunk)
-
-                    # Report progress if callback is provided
-                    if (
-                        progress_callback and total_size > 0 and
-                        (
-                            last_update is None or
-                            (datetime.now() - last_update).total_seconds() >
-                            0.5
-                        )
-                    ):
-                        progress_percentage = (
-                            downloaded_size / total_size
-                        ) * 100
-                        progress_callback(progress_percentage)
-                        last_update = datetime.now()
+            download_to_file(
+                response, file_url, full_path,
+                headers=headers,
+                progress_callback=progress_callback
+            )
 
             return local_filename
         else:
@@ -155,6 +151,16 @@ def update_layer_upload_progress(
     )
 
 
+def update_layer_validation_progress(
+        layer_upload: LayerUpload, feature_count):
+    """Update layer upload progress of the validation."""
+    layer_upload.update_status(
+        status=UploadStatus.RUNNING,
+        progress=0,
+        note=f'Validating file: {feature_count} features'
+    )
+
+
 @app.task
 def import_layer(layer_id, upload_id, file_url):
     """Import data from url."""
@@ -199,11 +205,39 @@ def import_layer(layer_id, upload_id, file_url):
         if filename:
             input_layer.layer_type = detect_file_type_by_extension(filename)
             input_layer.save()
+
+            # count features and check geometries in one pass
+            note = 'Processing file'
+            file_type = FileType.guess_type(filename)
+            if file_type:
+                try:
+                    result = validate_vector_file(
+                        os.path.join(layer_upload.folder, filename),
+                        file_type,
+                        check_features=True,
+                        progress_callback=(
+                            lambda count: update_layer_validation_progress(
+                                layer_upload, count)
+                        )
+                    )
+                except VectorValidationError as ex:
+                    layer_upload.update_status(
+                        status=UploadStatus.FAILED,
+                        note=str(ex)
+                    )
+                    return
+                if result['invalid_count']:
+                    note = (
+                        f'Processing file, {result["invalid_count"]} of '
+                        f'{result["feature_count"]} features have invalid '
+                        'geometry'
+                    )
+
             # reset the status of layer_upload
             layer_upload.update_status(
                 status=UploadStatus.START,
                 progress=0,
-                note='Processing file'
+                note=note
             )
         else:
             layer_upload.update_status(
@@ -222,7 +256,19 @@ def import_layer(layer_id, upload_id, file_url):
 
         # upload pmtiles to Django
         if layer.pmtile:
-            if not settings.DEBUG:
+            if use_shared_storage():
+                # write to the storage shared with Django, no upload
+                try:
+                    input_layer.url = publish_pmtiles(layer, base_url)
+                except Exception as ex:
+                    logger.warning(
+                        f'PMTile publish for layer {layer_id} failed: {ex}')
+                    layer.pmtile.delete(save=True)
+
+                    # fallback to use vector tile
+                    input_layer.url = base_url + layer.tile_url
+                input_layer.save()
+            elif not settings.DEBUG:
                 auth = f'Token {preferences.worker_layer_api_key}'
                 upload_path = (
                     base_url + reverse('frontend-api:pmtile-layer', kwargs={
@@ -249,12 +295,7 @@ def import_layer(layer_id, upload_id, file_url):
                 if base_url.endswith('/'):
                     base_url = base_url[:-1]
                 if layer.pmtile:
-                    input_layer.url = (
-                        f'pmtiles://{base_url}' +
-                        reverse('serve-pmtiles', kwargs={
-                            'layer_uuid': layer.unique_id,
-                        })
-                    )
+                    input_layer.url = get_serve_pmtiles_url(layer, base_url)
                 else:
                     input_layer.url = base_url + layer.tile_url
 
@@ -12,6 +12,7 @@ from django.test import TestCase
 from django.core.files.storage import FileSystemStorage
 from cloud_native_gis.models.layer import Layer
 from cloud_native_gis.models.layer_upload import LayerUpload
+from cloud_native_gis.models import UploadStatus
 
 from core.settings.utils import absolute_path
 from core.factories import UserF
@@ -118,3 +119,50 @@ class TestImportLayer(TestCase):
         input_layer.refresh_from_db()
         self.assertTrue(input_layer.url)
         layer_upload.delete_folder()
+
+    @patch.object(LayerUpload, 'import_data')
+    def test_import_layer_no_features(self, mock_import_data):
+        """Test import layer stops when the file has no feature."""
+        layer = Layer.objects.create(
+            created_by=self.user,
+            is_ready=True
+        )
+        InputLayer.objects.create(
+            uuid=layer.unique_id,
+            name=str(layer.unique_id),
+            data_provider=DataProvider.objects.get(name='User defined'),
+            group=LayerGroupType.objects.get(name='user-defined'),
+            created_by=self.user,
+            updated_by=self.user
+        )
+        layer_upload = LayerUpload.objects.create(
+            created_by=self.user, layer=layer
+        )
+        layer_upload.emptying_folder()
+        file_path = absolute_path(
+            'frontend', 'tests', 'data', 'empty_test.gpkg'
+        )
+        with open(file_path, 'rb') as data:
+            content = data.read()
+
+        with requests_mock.Mocker() as mock_request:
+            mock_request.get(
+                self.test_url,
+                content=content,
+                headers={
+                    "Content-Length": str(len(content)),
+                    "Content-Disposition": (
+                        'attachment; filename="empty_test.gpkg"'
+                    ),
+                }
+            )
+            import_layer(layer.unique_id, layer_upload.id, self.test_url)
+
+        mock_import_data.assert_not_called()
+        layer_upload.refresh_from_db()
+        self.assertEqual(layer_upload.status, UploadStatus.FAILED)
+        self.assertEqual(
+            layer_upload.note,
+            'The uploaded file does not have any feature!'
+        )
+        layer_upload.delete_folder()
@@ -0,0 +1,130 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Unit tests for resumable downloader.
+"""
+
+import itertools
+import os
+import re
+import shutil
+import tempfile
+import threading
+import requests
+import requests_mock
+from unittest.mock import patch
+from django.test import TestCase
+
+from layers.downloader import ProgressThrottle, download_to_file
+
+
+class TestDownloader(TestCase):
+    """Test ranged and resumed downloads."""
+
+    def setUp(self):
+        """Setup for tests."""
+        self.url = 'https://example.com/layer.gpkg'
+        self.content = bytes(range(256)) * 400
+        self.tmp_dir = tempfile.mkdtemp()
+        self.full_path = os.path.join(self.tmp_dir, 'layer.gpkg')
+        self.range_requests = []
+
+    def tearDown(self):
+        """Clean up after tests."""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _content(self, request, context):
+        range_header = request.headers.get('Range')
+        if not range_header:
+            context.status_code = 200
+            context.headers['Content-Length'] = str(len(self.content))
+            context.headers['Accept-Ranges'] = 'bytes'
+            return self.content
+        start, end = re.match(r'bytes=(\d+)-(\d+)', range_header).groups()
+        self.range_requests.append((int(start), int(end)))
+        context.status_code = 206
+        return self.content[int(start):int(end) + 1]
+
+    def _download(self, mock):
+        mock.get(self.url, content=self._content)
+        response = requests.get(self.url, stream=True)
+        download_to_file(response, self.url, self.full_path)
+        with open(self.full_path, 'rb') as file:
+            return file.read()
+
+    @patch('layers.downloader.PARALLEL_MIN_SIZE', 1024)
+    @requests_mock.Mocker()
+    def test_parallel_download(self, mock):
+        """Test file is downloaded in parallel segments."""
+        self.assertEqual(self._download(mock), self.content)
+        self.assertEqual(len(self.range_requests), 4)
+        self.assertEqual(
+            sum(end - start + 1 for start, end in self.range_requests),
+            len(self.content)
+        )
+
+    @requests_mock.Mocker()
+    def test_small_file_single_stream(self, mock):
+        """Test small file is downloaded on one connection."""
+        self.assertEqual(self._download(mock), self.content)
+        self.assertEqual(self.range_requests, [])
+
+    @patch('layers.downloader.RETRY_BACKOFF_IN_S', 0)
+    @patch('layers.downloader.PARALLEL_MIN_SIZE', 1024)
+    @requests_mock.Mocker()
+    def test_segment_resumes_after_error(self, mock):
+        """Test failed segment resumes from the last written byte."""
+        failures = []
+
+        def content(request, context):
+            if request.headers.get('Range') and not failures:
+                failures.append(request.headers['Range'])
+                raise requests.ConnectionError('Connection reset')
+            return self._content(request, context)
+
+        mock.get(self.url, content=content)
+        response = requests.get(self.url, stream=True)
+        download_to_file(response, self.url, self.full_path)
+        with open(self.full_path, 'rb') as file:
+            self.assertEqual(file.read(), self.content)
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(len(self.range_requests), 4)
+
+    @patch('layers.downloader.time.monotonic')
+    def test_progress_throttle(self, mock_monotonic):
+        """Test progress is reported when the percentage changes."""
+        mock_monotonic.side_effect = itertools.count(0, 100)
+        reported = []
+        progress = ProgressThrottle(
+            reported.append, total_size=100, min_interval=0, max_share=1
+        )
+        progress.add(10)
+        progress.add(0)
+        progress.add(90)
+        self.assertEqual(reported, [10, 100])
+
+    def test_progress_callback_does_not_block_add(self):
+        """Test segments keep adding bytes while the callback runs."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_callback(percentage):
+            started.set()
+            release.wait(5)
+
+        progress = ProgressThrottle(
+            slow_callback, total_size=100, min_interval=0, max_share=1
+        )
+        reporter = threading.Thread(target=progress.add, args=(50,))
+        reporter.start()
+        try:
+            self.assertTrue(started.wait(5))
+            segment = threading.Thread(target=progress.add, args=(10,))
+            segment.start()
+            segment.join(1)
+            self.assertFalse(segment.is_alive())
+            self.assertEqual(progress.downloaded, 60)
+        finally:
+            release.set()
+            reporter.join()
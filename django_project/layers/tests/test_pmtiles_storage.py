@@ -0,0 +1,79 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Unit tests for PMTiles handoff through shared storage.
+"""
+
+import os
+import shutil
+import tempfile
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from cloud_native_gis.models.layer import Layer
+
+from core.factories import UserF
+from layers.pmtiles_storage import (
+    delete_pmtiles,
+    get_pmtiles_name,
+    publish_pmtiles
+)
+
+
+class TestPMTilesStorage(TestCase):
+    """Test PMTiles handoff."""
+
+    def setUp(self):
+        """Setup for tests."""
+        self.base_url = 'http://localhost:8888'
+        self.tmp_dir = tempfile.mkdtemp()
+        self.layer = Layer.objects.create(
+            created_by=UserF.create(),
+            is_ready=True
+        )
+        self.layer.pmtile.save(
+            'test.pmtiles', ContentFile(b'PMTiles'), save=True
+        )
+        self.storage_settings = {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {
+                'location': self.tmp_dir,
+                'base_url': '/pmtiles-storage/'
+            }
+        }
+
+    def tearDown(self):
+        """Clean up after tests."""
+        if self.layer.pmtile:
+            self.layer.pmtile.delete(save=False)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    @override_settings(PMTILES_HANDOFF='storage', PMTILES_STORAGE=None)
+    def test_publish_media_volume(self):
+        """Test PMTiles on the shared media volume is served by Django."""
+        url = publish_pmtiles(self.layer, self.base_url)
+        self.assertTrue(url.startswith(f'pmtiles://{self.base_url}'))
+        self.assertIn(str(self.layer.unique_id), url)
+        self.layer.refresh_from_db()
+        self.assertTrue(self.layer.pmtile)
+
+    def test_publish_storage(self):
+        """Test PMTiles is written to PMTILES_STORAGE."""
+        with override_settings(
+            PMTILES_HANDOFF='storage',
+            PMTILES_STORAGE=self.storage_settings
+        ):
+            url = publish_pmtiles(self.layer, self.base_url)
+            name = get_pmtiles_name(self.layer.unique_id)
+            path = os.path.join(self.tmp_dir, name)
+            self.assertEqual(
+                url,
+                f'pmtiles://{self.base_url}/pmtiles-storage/{name}'
+            )
+            with open(path, 'rb') as file:
+                self.assertEqual(file.read(), b'PMTiles')
+            self.layer.refresh_from_db()
+            self.assertFalse(self.layer.pmtile)
+
+            delete_pmtiles(self.layer.unique_id)
+            self.assertFalse(os.path.exists(path))
@@ -0,0 +1,109 @@
+# coding=utf-8
+"""
+Africa Rangeland Watch (ARW).
+
+.. note:: Validation of uploaded vector layers.
+
+The file is opened once. The upload request only checks the header
+(layer, CRS and the first feature), the import task reads every feature
+in one streaming pass to count them and check the geometries.
+"""
+import json
+import time
+
+import fiona
+from django.contrib.gis.geos import GEOSGeometry
+from django.contrib.gis.geos.error import GEOSException
+from cloud_native_gis.utils.fiona import FileType, validate_collection_crs
+
+
+# KML is readable by GDAL but not enabled in fiona by default
+fiona.drvsupport.supported_drivers.setdefault('KML', 'r')
+fiona.drvsupport.supported_drivers.setdefault('LIBKML', 'r')
+
+# Minimum seconds between progress reports of the feature pass
+PROGRESS_INTERVAL_IN_S = 0.5
+
+
+class VectorValidationError(Exception):
+    """Uploaded vector layer is invalid."""
+
+
+def get_ogr_path(file_path: str, file_type: str) -> str:
+    """Get path to open the file with fiona, zip is read in place."""
+    if file_type == FileType.SHAPEFILE:
+        return f'/vsizip/{file_path}'
+    return file_path
+
+
+def _is_valid_geometry(geometry) -> bool:
+    if geometry is None:
+        return False
+    try:
+        return GEOSGeometry(
+            json.dumps(geometry.__geo_interface__), srid=4326
+        ).valid
+    except (GEOSException, ValueError, TypeError):
+        return False
+
+
+def validate_vector_file(
+    file_path: str, file_type: str, check_features: bool = False,
+    progress_callback=None
+) -> dict:
+    """
+    Validate vector file in one pass.
+
+    :param file_path: path of the file
+    :param file_type: FileType of the file
+    :param check_features: read every feature to count them and check
+        the geometry validity, otherwise only the first feature is read
+    :param progress_callback: called with number of features read
+    :raises VectorValidationError: when the file is invalid
+    :return: dictionary of feature_count and invalid_count,
+        feature_count is None when check_features is False
+    """
+    try:
+        collection = fiona.open(get_ogr_path(file_path, file_type))
+    except (fiona.errors.DriverError, fiona.errors.FionaValueError):
+        raise VectorValidationError(
+            'The uploaded file must have at least 1 layer!'
+        )
+
+    with collection:
+        is_valid_crs, crs = validate_collection_crs(collection)
+        if not is_valid_crs:
+            raise VectorValidationError(
+                f'Incorrect CRS type: {crs}! Please use epsg:4326 (WGS84)!'
+            )
+
+        if not check_features:
+            if next(iter(collection), None) is None:
+                raise VectorValidationError(
+                    'The uploaded file does not have any feature!'
+                )
+            return {'feature_count': None, 'invalid_count': 0}
+
+        feature_count = 0
+        invalid_count = 0
+        last_update = time.monotonic()
+        for feature in collection:
+            feature_count += 1
+            if not _is_valid_geometry(feature.geometry):
+                invalid_count += 1
+            if (
+                progress_callback and
+                time.monotonic() - last_update > PROGRESS_INTERVAL_IN_S
+            ):
+                progress_callback(feature_count)
+                last_update = time.monotonic()
+
+    if feature_count == 0:
+        raise VectorValidationError(
+            'The uploaded file does not have any feature!'
+        )
+    if invalid_count == feature_count:
+        raise VectorValidationError(
+            'The uploaded file does not have any valid geometry!'
+        )
+    return {'feature_count': feature_count, 'invalid_count': invalid_count}